@@ -0,0 +1,84 @@
+"""
+Helpers shared by the tests: a fake clock, fake search and cross-encoder backends and a local
+HTTP server for the crawler tests.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from factcheck.utils.circuit_breaker import get_breaker
+
+
+class FakeClock:
+    """A clock that only moves when a test sets `now`."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse:
+    """A search API response with a fixed JSON payload."""
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class FakeCrossEncoder:
+    """Scores a pair by the number of query words found in the passage, records every call."""
+
+    def __init__(self):
+        self.calls = []
+        self.scored = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=None):
+        self.calls.append(list(pairs))
+        self.scored += list(pairs)
+        return [float(sum(word in passage.lower() for word in query.lower().split())) for query, passage in pairs]
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    """Keep-alive request handler that does not log, with a helper to answer with a page."""
+
+    protocol_version = "HTTP/1.1"
+
+    def send_page(self, body: bytes, content_type: str = "text/html", status: int = 200, headers: dict = None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def serve():
+    """Start a local HTTP server for a handler class and return its base url.
+
+    The crawl circuit is closed first, so failures of an earlier test do not skip the fetches.
+    """
+    servers = []
+
+    def start(handler):
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+        get_breaker("crawl").reset()
+        return f"http://127.0.0.1:{httpd.server_address[1]}"
+
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
@@ -9,6 +9,9 @@ from flask_cors import CORS
 from factcheck.utils.llmclient import CLIENTS
 from factcheck.utils.multimodal import modal_normalization
 from factcheck.utils.utils import load_yaml
+from factcheck.utils.circuit_breaker import CircuitBreaker, breaker_states, get_breaker
+from factcheck.utils.query_util import query_stats
+from factcheck.utils.web_util import crawler_stats
 from factcheck import FactCheck
 import argparse
 import json
@@ -69,13 +72,29 @@ def initialize_factcheck(config_path="api_config.yaml"):
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint for the Chrome extension."""
+    upstreams = breaker_states()
+    degraded = any(u['state'] != CircuitBreaker.CLOSED for u in upstreams.values())
     status = {
-        'status': 'healthy',
+        'status': 'degraded' if degraded else 'healthy',
         'factcheck_ready': factcheck_instance is not None,
+        'upstreams': upstreams,
         'timestamp': time.time()
     }
     return jsonify(status)
 
+
+def llm_unavailable_response():
+    """Fail fast while the Gemini circuit is open instead of holding a worker thread."""
+    breaker = get_breaker('gemini')
+    if breaker.state != CircuitBreaker.OPEN:
+        return None
+    response = jsonify({
+        'success': False,
+        'error': 'The language model service is temporarily unavailable. Please retry shortly.'
+    })
+    response.headers['Retry-After'] = str(int(breaker.recovery_timeout))
+    return response, 503
+
 @app.route('/api/factcheck', methods=['POST'])
 def factcheck_text():
     """Fact-check text content."""
@@ -85,6 +104,10 @@ def factcheck_text():
             'error': 'FactCheck service not initialized. Please check server configuration.'
         }), 503
 
+    unavailable = llm_unavailable_response()
+    if unavailable:
+        return unavailable
+
     try:
         data = request.get_json()
         if not data or 'text' not in data:
@@ -139,6 +162,10 @@ def factcheck_file():
             'error': 'FactCheck service not initialized. Please check server configuration.'
         }), 503
 
+    unavailable = llm_unavailable_response()
+    if unavailable:
+        return unavailable
+
     try:
         if 'file' not in request.files:
             return jsonify({
@@ -324,8 +351,19 @@ def get_stats():
         'api_keys_configured': {
             'gemini': bool(api_config.get('GEMINI_API_KEY')),
             'serper': bool(api_config.get('SERPER_API_KEY'))
-        }
+        },
+        'search_queries': dict(query_stats),
+        'crawler': crawler_stats()
     }
+    search_cache = getattr(getattr(factcheck_instance, 'evidence_crawler', None), 'search_cache', None)
+    if search_cache is not None:
+        stats['search_cache'] = search_cache.snapshot()
+    passage_ranker = getattr(getattr(factcheck_instance, 'evidence_crawler', None), 'passage_ranker', None)
+    if passage_ranker is not None:
+        stats['passage_ranker'] = passage_ranker.snapshot()
+    evidence_store = getattr(getattr(factcheck_instance, 'evidence_crawler', None), 'evidence_store', None)
+    if evidence_store is not None:
+        stats['evidence_store'] = evidence_store.snapshot()
     return jsonify(stats)
 
 @app.errorhandler(404)
@@ -33,6 +33,9 @@ class FactCheck:
         claim_verify_model: str = None,  # "gpt-3.5-turbo",
         api_config: dict = None,
         num_seed_retries: int = 3,
+        num_hedged_seeds: int = 1,
+        packed_query_generation: bool = False,
+        incremental_checkworthy: bool = False,
     ):
         # TODO: better handle raw token count
         self.encoding = tiktoken.get_encoding("cl100k_base")
@@ -63,9 +66,19 @@ class FactCheck:
             setattr(self, key, LLMClient(model=_model_name, api_config=self.api_config))
 
         # sub-modules
-        self.decomposer = Decompose(llm_client=self.decompose_model, prompt=self.prompt)
-        self.checkworthy = Checkworthy(llm_client=self.checkworthy_model, prompt=self.prompt)
-        self.query_generator = QueryGenerator(llm_client=self.query_generator_model, prompt=self.prompt)
+        # Decompose heads the critical path, num_hedged_seeds > 1 races seed variants instead of retrying them in turn
+        self.decomposer = Decompose(llm_client=self.decompose_model, prompt=self.prompt, num_hedged_seeds=num_hedged_seeds)
+        # incremental_checkworthy keeps the valid answers of each response and re-asks only for the missing claims
+        self.checkworthy = Checkworthy(
+            llm_client=self.checkworthy_model, prompt=self.prompt, incremental=incremental_checkworthy
+        )
+        # packed_query_generation asks for the questions of many claims in one prompt and sizes the count per claim
+        self.query_generator = QueryGenerator(
+            llm_client=self.query_generator_model,
+            prompt=self.prompt,
+            packed=packed_query_generation,
+            adaptive_query_count=packed_query_generation,
+        )
         self.evidence_crawler = retriever_mapper(retriever_name=retriever)(
             llm_client=self.evidence_retrieval_model, api_config=self.api_config
         )
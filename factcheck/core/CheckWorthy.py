@@ -1,18 +1,26 @@
+import re
+
 from factcheck.utils.logger import CustomLogger
+from factcheck.utils.circuit_breaker import CircuitOpenError
+from factcheck.utils.response_parser import ResponseParseError, parse_json_response
 
 logger = CustomLogger(__name__).getlog()
 
 
 class Checkworthy:
-    def __init__(self, llm_client, prompt):
+    def __init__(self, llm_client, prompt, incremental: bool = False, max_batch_tokens: int = 1500):
         """Initialize the Checkworthy class
 
         Args:
             llm_client (BaseClient): The LLM client used for identifying checkworthiness of claims.
             prompt (BasePrompt): The prompt used for identifying checkworthiness of claims.
+            incremental (bool, optional): keep the valid items of each response and only re-ask for the missing ones. Defaults to False.
+            max_batch_tokens (int, optional): token budget of the claims sent in one prompt in incremental mode. Defaults to 1500.
         """
         self.llm_client = llm_client
         self.prompt = prompt
+        self.incremental = incremental
+        self.max_batch_tokens = max_batch_tokens
 
     def identify_checkworthiness(self, texts: list[str], num_retries: int = 3, prompt: str = None) -> list[str]:
         """Use GPT to identify whether candidate claims are worth fact checking. if gpt is unable to return correct checkworthy_claims, we assume all texts are checkworthy.
@@ -24,7 +32,11 @@ class Checkworthy:
         Returns:
             list[str]: a list of checkworthy claims, pairwise outputs
         """
+        if self.incremental:
+            return self._identify_incrementally(texts, num_retries=num_retries, prompt=prompt)
+
         checkworthy_claims = texts
+        claim2checkworthy = {}
         joint_texts = "\n".join([str(i + 1) + ". " + j for i, j in enumerate(texts)])
 
         if prompt is None:
@@ -36,7 +48,7 @@ class Checkworthy:
         for i in range(num_retries):
             response = self.llm_client.call(messages, num_retries=1, seed=42 + i)
             try:
-                claim2checkworthy = eval(response)
+                claim2checkworthy = parse_json_response(response, expected_type=dict)
                 valid_answer = list(
                     filter(
                         lambda x: x[1].startswith("Yes") or x[1].startswith("No"),
@@ -51,3 +63,88 @@ class Checkworthy:
                 logger.error(f"====== Error: {e}, the LLM response is: {response}")
                 logger.error(f"====== Our input is: {messages}")
         return checkworthy_claims, claim2checkworthy
+
+    def _identify_incrementally(self, texts: list[str], num_retries: int = 3, prompt: str = None):
+        """Identify checkworthiness item by item: claims are split into sub-batches by token budget and
+        sent concurrently, valid answers are kept and only missing or malformed claims are asked again.
+        Claims still unanswered after num_retries attempts are assumed to be checkworthy.
+
+        Returns:
+            tuple[list[str], dict[str, str]]: the checkworthy claims and the answer for every claim, both in input order.
+        """
+        answers = {}
+        pending = list(dict.fromkeys(texts))
+        for attempt in range(num_retries):
+            if not pending:
+                break
+            batches = self._split_batches(pending)
+            user_inputs = [self._format_prompt(batch, prompt) for batch in batches]
+            messages_list = self.llm_client.construct_message_list(user_inputs)
+            responses = self.llm_client.multi_call(messages_list, return_exceptions=True, seed=42 + attempt)
+
+            for batch, response in zip(batches, responses):
+                if isinstance(response, CircuitOpenError):
+                    raise response
+                if isinstance(response, Exception):
+                    logger.error(f"====== Checkworthy LLM call failed: {response}")
+                    continue
+                answers.update(self._collect_valid_answers(batch, response))
+
+            pending = [text for text in pending if text not in answers]
+            if pending:
+                logger.info(f"Checkworthy attempt {attempt + 1}: {len(pending)} claims missing or malformed, asking again.")
+
+        if pending:
+            logger.error(f"====== No valid checkworthy answer for {len(pending)} claims, assume they are checkworthy.")
+        claim2checkworthy = {
+            text: answers.get(text, "Yes ([System Warning] Can not identify the checkworthiness of the claim.)")
+            for text in texts
+        }
+        checkworthy_claims = [text for text, answer in claim2checkworthy.items() if answer.startswith("Yes")]
+        return checkworthy_claims, claim2checkworthy
+
+    def _split_batches(self, texts: list[str]) -> list[list[str]]:
+        """Split claims into consecutive sub-batches whose token count stays within self.max_batch_tokens."""
+        batches, batch, batch_tokens = [], [], 0
+        for text in texts:
+            # rough estimate of ~4 characters per token, plus the numbering and line break
+            num_tokens = len(text) // 4 + 4
+            if batch and batch_tokens + num_tokens > self.max_batch_tokens:
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += num_tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _format_prompt(self, texts: list[str], prompt: str = None) -> str:
+        joint_texts = "\n".join([str(i + 1) + ". " + j for i, j in enumerate(texts)])
+        if prompt is None:
+            return self.prompt.checkworthy_prompt.format(texts=joint_texts)
+        return prompt.format(texts=joint_texts)
+
+    def _collect_valid_answers(self, texts: list[str], response: str) -> dict[str, str]:
+        """Keep the answers of a (possibly partial) response that belong to one of texts and start with Yes/No."""
+        try:
+            claim2checkworthy = parse_json_response(response, expected_type=dict)
+        except ResponseParseError as e:
+            logger.error(f"====== Error: {e}, the LLM response is: {response}")
+            return {}
+
+        # the LLM sometimes echoes the numbering or changes the spacing of a statement
+        normalized = {_normalize_claim(text): text for text in texts}
+        valid_answers = {}
+        for claim, answer in claim2checkworthy.items():
+            text = normalized.get(_normalize_claim(str(claim)))
+            if text is None or not isinstance(answer, str):
+                continue
+            answer = answer.strip()
+            if answer.startswith("Yes") or answer.startswith("No"):
+                valid_answers[text] = answer
+        return valid_answers
+
+
+def _normalize_claim(text: str) -> str:
+    text = re.sub(r"^\s*\d+\.\s*", "", text)
+    return " ".join(text.split()).lower()
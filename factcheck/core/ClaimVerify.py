@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-import json
 from factcheck.utils.logger import CustomLogger
+from factcheck.utils.response_parser import parse_json_response
 from factcheck.utils.data_class import Evidence
 
 logger = CustomLogger(__name__).getlog()
@@ -69,7 +69,7 @@ class ClaimVerify:
             _response_list = self.llm_client.multi_call(_message_list)
             for _response, _index in zip(_response_list, _indices):
                 try:
-                    _response_json = json.loads(_response)
+                    _response_json = parse_json_response(_response, expected_type=dict)
                     assert all(k in _response_json for k in ["reasoning", "relationship"])
                     factual_results[_index] = _response_json
                 except:  # noqa: E722
@@ -1,19 +1,23 @@
 from factcheck.utils.logger import CustomLogger
+from factcheck.utils.response_parser import parse_json_response
 import nltk
 
 logger = CustomLogger(__name__).getlog()
 
 
 class Decompose:
-    def __init__(self, llm_client, prompt):
+    def __init__(self, llm_client, prompt, num_hedged_seeds: int = 1):
         """Initialize the Decompose class
 
         Args:
             llm_client (BaseClient): The LLM client used for decomposing documents into claims.
             prompt (BasePrompt): The prompt used for fact checking.
+            num_hedged_seeds (int, optional): number of seed variants requested concurrently, the first valid parse wins.
+                Defaults to 1, i.e. seeds are tried one after another.
         """
         self.llm_client = llm_client
         self.prompt = prompt
+        self.num_hedged_seeds = num_hedged_seeds
         self.doc2sent = self._nltk_doc2sent
 
     def _nltk_doc2sent(self, text: str):
@@ -47,43 +51,34 @@ class Decompose:
 
         claims = None
         messages = self.llm_client.construct_message_list([user_input])
-        for i in range(num_retries):
-            response = self.llm_client.call(
-                messages=messages,
-                num_retries=1,
-                seed=42 + i,
-            )
-            try:
-                # Clean the response to handle malformed JSON from Gemini
-                cleaned_response = response.strip()
-                
-                # Try to fix common JSON formatting issues
-                if cleaned_response.startswith('{') and not cleaned_response.endswith('}'):
-                    # Missing closing brace
-                    cleaned_response += '}'
-                elif cleaned_response.startswith('{{') and not cleaned_response.endswith('}}'):
-                    # Double braces from Gemini, fix it
-                    cleaned_response = cleaned_response[1:-1] if cleaned_response.endswith('}') else cleaned_response[1:] + '}'
-                
-                # Remove any markdown code blocks
-                import re
-                cleaned_response = re.sub(r'```(?:json)?\s*([\s\S]*?)\s*```', r'\1', cleaned_response)
-                cleaned_response = cleaned_response.strip()
-                
-                # Try json.loads first, fallback to eval
+        if self.num_hedged_seeds > 1:
+
+            def accept(response):
                 try:
-                    import json
-                    parsed_response = json.loads(cleaned_response)
-                except json.JSONDecodeError:
-                    # Fallback to eval for cases where JSON parser fails
-                    parsed_response = eval(cleaned_response)
-                
-                claims = parsed_response["claims"]
-                if isinstance(claims, list) and len(claims) > 0:
-                    break
-            except Exception as e:
-                logger.error(f"Parse LLM response error {e}, response is: {response}")
-                logger.error(f"Parse LLM response error, prompt is: {messages}")
+                    claims = parse_json_response(response, expected_type=dict)["claims"]
+                    assert isinstance(claims, list) and len(claims) > 0, "No claims in the response."
+                    return claims
+                except Exception as e:
+                    logger.error(f"Parse LLM response error {e}, response is: {response}")
+                    raise
+
+            claims = self._hedged_call(messages, num_retries=num_retries, accept=accept)
+        else:
+            for i in range(num_retries):
+                response = self.llm_client.call(
+                    messages=messages,
+                    num_retries=1,
+                    seed=42 + i,
+                )
+                try:
+                    # Tolerates code fences, doubled braces and truncated output from Gemini
+                    parsed_response = parse_json_response(response, expected_type=dict)
+                    claims = parsed_response["claims"]
+                    if isinstance(claims, list) and len(claims) > 0:
+                        break
+                except Exception as e:
+                    logger.error(f"Parse LLM response error {e}, response is: {response}")
+                    logger.error(f"Parse LLM response error, prompt is: {messages}")
         if isinstance(claims, list):
             return claims
         else:
@@ -174,6 +169,29 @@ class Decompose:
         messages = self.llm_client.construct_message_list([user_input])
 
         tmp_restore = {}
+        if self.num_hedged_seeds > 1:
+
+            def accept(response):
+                nonlocal tmp_restore
+                try:
+                    claim2doc = parse_json_response(response, expected_type=dict)
+                    assert len(claim2doc) == len(claims)
+                except Exception as e:
+                    logger.error(f"Parse LLM response error {e}, response is: {response}")
+                    raise
+                claim2doc_detail, flag = restore(claim2doc)
+                if not flag:
+                    # keep the partial mapping in case no other seed does better
+                    tmp_restore = claim2doc_detail
+                    raise ValueError("Restore claims partially satisfied.")
+                return claim2doc_detail
+
+            claim2doc_detail = self._hedged_call(messages, num_retries=num_retries, accept=accept)
+            if claim2doc_detail is not None:
+                return claim2doc_detail
+            logger.info("Using partial claim restoration results due to text span mapping issues")
+            return tmp_restore
+
         for i in range(num_retries):
             response = self.llm_client.call(
                 messages=messages,
@@ -181,30 +199,8 @@ class Decompose:
                 seed=42 + i,
             )
             try:
-                # Clean the response to handle malformed JSON from Gemini
-                cleaned_response = response.strip()
-                
-                # Try to fix common JSON formatting issues
-                if cleaned_response.startswith('{') and not cleaned_response.endswith('}'):
-                    # Missing closing brace
-                    cleaned_response += '}'
-                elif cleaned_response.startswith('{{') and not cleaned_response.endswith('}}'):
-                    # Double braces from Gemini, fix it
-                    cleaned_response = cleaned_response[1:-1] if cleaned_response.endswith('}') else cleaned_response[1:] + '}'
-                
-                # Remove any markdown code blocks
-                import re
-                cleaned_response = re.sub(r'```(?:json)?\s*([\s\S]*?)\s*```', r'\1', cleaned_response)
-                cleaned_response = cleaned_response.strip()
-                
-                # Try json.loads first, fallback to eval
-                try:
-                    import json
-                    claim2doc = json.loads(cleaned_response)
-                except json.JSONDecodeError:
-                    # Fallback to eval for cases where JSON parser fails
-                    claim2doc = eval(cleaned_response)
-                
+                # Tolerates code fences, doubled braces and truncated output from Gemini
+                claim2doc = parse_json_response(response, expected_type=dict)
                 assert len(claim2doc) == len(claims)
                 claim2doc_detail, flag = restore(claim2doc)
                 if flag:
@@ -223,3 +219,17 @@ class Decompose:
                 logger.error(f"Parse LLM response error, prompt is: {messages}")
 
         return tmp_restore
+
+    def _hedged_call(self, messages: list, num_retries: int, accept):
+        """Try the seeds 42, 43, ... with up to self.num_hedged_seeds concurrent calls, the first accepted wins.
+
+        Args:
+            messages (list): the message to send, as built by construct_message_list.
+            num_retries (int): total number of seeds to try.
+            accept (callable): turns a response into the result, raising an exception to reject it.
+
+        Returns:
+            the first accepted result, or None if every seed was rejected.
+        """
+        seeds = [42 + i for i in range(num_retries)]
+        return self.llm_client.hedged_call(messages, seeds=seeds, accept=accept, max_concurrent=self.num_hedged_seeds)
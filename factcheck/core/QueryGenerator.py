@@ -1,19 +1,45 @@
+import re
+
 from factcheck.utils.logger import CustomLogger
+from factcheck.utils.circuit_breaker import CircuitOpenError
+from factcheck.utils.response_parser import ResponseParseError, parse_json_response
 
 logger = CustomLogger(__name__).getlog()
 
+# separators and connectives that usually introduce another checkable fact in a claim
+_CLAUSE_PATTERN = re.compile(
+    r"[,;:]|\b(?:and|but|while|because|after|before|since|which|who|whose|when|where|although|whereas)\b", re.IGNORECASE
+)
+_NUMBER_PATTERN = re.compile(r"\d")
+
 
 class QueryGenerator:
-    def __init__(self, llm_client, prompt, max_query_per_claim: int = 5):
+    def __init__(
+        self,
+        llm_client,
+        prompt,
+        max_query_per_claim: int = 5,
+        packed: bool = False,
+        adaptive_query_count: bool = False,
+        max_claims_per_pack: int = 10,
+    ):
         """Initialize the QueryGenerator class
 
         Args:
             llm_client (BaseClient): The LLM client used for generating questions.
             prompt (BasePrompt): The prompt used for generating questions.
+            max_query_per_claim (int, optional): maximum number of queries per claim, including the claim itself. Defaults to 5.
+            packed (bool, optional): generate questions for many claims in one prompt. Defaults to False.
+            adaptive_query_count (bool, optional): size the number of queries to the complexity of each claim,
+                simple claims are only searched by the claim itself. Defaults to False.
+            max_claims_per_pack (int, optional): maximum number of claims in one packed prompt. Defaults to 10.
         """
         self.llm_client = llm_client
         self.prompt = prompt
         self.max_query_per_claim = max_query_per_claim
+        self.packed = packed
+        self.adaptive_query_count = adaptive_query_count
+        self.max_claims_per_pack = max_claims_per_pack
 
     def generate_query(self, claims: list[str], generating_time: int = 3, prompt: str = None) -> dict[str, list[str]]:
         """Generate questions for the given claims
@@ -25,8 +51,12 @@ class QueryGenerator:
         Returns:
             dict: a dictionary of claims and their corresponding generated questions.
         """
+        if self.packed and getattr(self.prompt, "qgen_packed_prompt", None) and prompt is None:
+            return self._generate_packed_query(claims, generating_time=generating_time)
+
         generated_questions = [[]] * len(claims)
         attempts = 0
+        query_budgets = [self._query_budget(claim) for claim in claims]
 
         # construct messages
         messages_list = []
@@ -37,24 +67,119 @@ class QueryGenerator:
                 user_input = prompt.format(claim=claim)
             messages_list.append(user_input)
 
-        while (attempts < generating_time) and ([] in generated_questions):
-            _messages = [_message for _i, _message in enumerate(messages_list) if generated_questions[_i] == []]
-            _indices = [_i for _i, _message in enumerate(messages_list) if generated_questions[_i] == []]
+        # claims whose budget is the claim itself need no generated questions
+        done = [budget <= 1 for budget in query_budgets]
+        while (attempts < generating_time) and not all(done):
+            _messages = [_message for _i, _message in enumerate(messages_list) if not done[_i]]
+            _indices = [_i for _i, _message in enumerate(messages_list) if not done[_i]]
 
             _message_list = self.llm_client.construct_message_list(_messages)
             _response_list = self.llm_client.multi_call(_message_list)
 
             for _response, _index in zip(_response_list, _indices):
                 try:
-                    _questions = eval(_response)["Questions"]
+                    _parsed = parse_json_response(_response, expected_type=dict)
+                    # some few-shot examples use the singular key
+                    _questions = _parsed["Questions"] if "Questions" in _parsed else _parsed["Question"]
                     generated_questions[_index] = _questions
+                    done[_index] = len(_questions) > 0
                 except:  # noqa: E722
                     logger.info(f"Warning: LLM response parse fail, retry {attempts}.")
             attempts += 1
 
         # ensure that each claim has at least one question which is the claim itself
         claim_query_dict = {
-            _claim: [_claim] + _generated_questions[: (self.max_query_per_claim - 1)]
-            for _claim, _generated_questions in zip(claims, generated_questions)
+            _claim: [_claim] + _generated_questions[: (_budget - 1)]
+            for _claim, _generated_questions, _budget in zip(claims, generated_questions, query_budgets)
         }
         return claim_query_dict
+
+    def _generate_packed_query(self, claims: list[str], generating_time: int = 3) -> dict[str, list[str]]:
+        """Generate questions for many claims per prompt, the LLM answers {claim_index: [questions]}.
+
+        Packs are sent concurrently. Answers missing from a response, or malformed, are asked
+        again in a new pack with only those claims.
+
+        Args:
+            claims ([str]): a list of claims to generate questions for.
+            generating_time (int, optional): maximum attempts for GPT to generate questions. Defaults to 3.
+
+        Returns:
+            dict: a dictionary of claims and their corresponding generated questions.
+        """
+        query_budgets = [self._query_budget(claim) for claim in claims]
+        generated_questions = [[] for _ in claims]
+        pending = [i for i, budget in enumerate(query_budgets) if budget > 1]
+
+        attempts = 0
+        num_requests = 0
+        while (attempts < generating_time) and pending:
+            packs = [pending[i : i + self.max_claims_per_pack] for i in range(0, len(pending), self.max_claims_per_pack)]
+            user_inputs = []
+            for pack in packs:
+                numbered_claims = "\n".join(f"{i + 1}. [max {query_budgets[i] - 1}] {claims[i]}" for i in pack)
+                user_inputs.append(self.prompt.qgen_packed_prompt.format(claims=numbered_claims))
+
+            _message_list = self.llm_client.construct_message_list(user_inputs)
+            _response_list = self.llm_client.multi_call(_message_list, return_exceptions=True)
+            num_requests += len(_message_list)
+
+            for pack, _response in zip(packs, _response_list):
+                if isinstance(_response, CircuitOpenError):
+                    raise _response
+                if isinstance(_response, Exception):
+                    logger.info(f"Warning: LLM call failed, retry {attempts}: {_response}")
+                    continue
+                for _index, _questions in self._parse_packed_response(_response, pack).items():
+                    generated_questions[_index] = _questions
+
+            pending = [i for i in pending if not generated_questions[i]]
+            if pending:
+                logger.info(f"Warning: no questions for {len(pending)} claims, retry {attempts}.")
+            attempts += 1
+
+        logger.info(
+            f"Packed query generation: {len(claims)} claims, {num_requests} LLM requests, "
+            f"{sum(min(len(q), b - 1) + 1 for q, b in zip(generated_questions, query_budgets))} queries."
+        )
+        return {
+            _claim: [_claim] + _questions[: (_budget - 1)]
+            for _claim, _questions, _budget in zip(claims, generated_questions, query_budgets)
+        }
+
+    def _parse_packed_response(self, response: str, pack: list[int]) -> dict[int, list[str]]:
+        """Keep the valid entries of a (possibly partial) packed response, keyed by claim index."""
+        try:
+            parsed = parse_json_response(response, expected_type=dict)
+        except ResponseParseError:
+            logger.info("Warning: LLM response parse fail.")
+            return {}
+
+        valid = {}
+        expected = set(pack)
+        for key, questions in parsed.items():
+            try:
+                index = int(str(key).strip().rstrip(".")) - 1
+            except ValueError:
+                continue
+            if index not in expected or not isinstance(questions, list):
+                continue
+            questions = [q for q in questions if isinstance(q, str) and q.strip()]
+            if questions:
+                valid[index] = questions
+        return valid
+
+    def _query_budget(self, claim: str) -> int:
+        """Number of queries for a claim, including the claim itself.
+
+        Without adaptive_query_count every claim gets max_query_per_claim. Otherwise a simple claim
+        gets one query (the claim itself) and every extra clause, number or long claim adds one more.
+        """
+        if not self.adaptive_query_count:
+            return self.max_query_per_claim
+        budget = 1 + len(_CLAUSE_PATTERN.findall(claim))
+        if _NUMBER_PATTERN.search(claim):
+            budget += 1
+        if len(claim.split()) > 15:
+            budget += 1
+        return max(1, min(budget, self.max_query_per_claim))
@@ -1,9 +1,17 @@
 from .google_retriever import GoogleEvidenceRetriever
 from .serper_retriever import SerperEvidenceRetriever
+from .local_bm25_retriever import LocalBM25Retriever
+from .local_dense_retriever import LocalDenseRetriever
+from .evidence_store_retriever import EvidenceStoreRetriever
+from .hybrid_retriever import HybridRetriever
 
 retriever_map = {
     "google": GoogleEvidenceRetriever,
     "serper": SerperEvidenceRetriever,
+    "local_bm25": LocalBM25Retriever,
+    "local_dense": LocalDenseRetriever,
+    "evidence_store": EvidenceStoreRetriever,
+    "hybrid": HybridRetriever,
 }
 
 
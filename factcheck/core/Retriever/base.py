@@ -1,33 +1,78 @@
-from concurrent.futures import ProcessPoolExecutor
-import os
+import time
 from copy import deepcopy
-from factcheck.utils.web_util import parse_response, crawl_web
+from factcheck.utils.web_util import crawl_web, configure_crawler
+from factcheck.utils.parse_pool import parse_pages
+from factcheck.utils.html_extractor import DEFAULT_EXTRACTOR
+from factcheck.utils.evidence_store import STORE_EXTRACTOR, EvidenceStore
+from factcheck.utils.passage_ranker import PassageRanker
+from factcheck.utils.passage_prefilter import get_prefilter
+from factcheck.utils.score_cache import ScoreCache
+from factcheck.utils.sentence_segmenter import load_segmenter, segment_texts
 from factcheck.utils.logger import CustomLogger
 
 logger = CustomLogger(__name__).getlog()
 
 
+def chunk_sentences(
+    sentences: list[str],
+    sentences_per_passage: int,
+    sliding_distance: int,
+    min_sentence_len: int = 3,
+    max_sentence_len: int = 250,
+) -> list[tuple]:
+    """Cut sentences into passages of sentences_per_passage sentences, a new one every sliding_distance.
+
+    Returns:
+        list[tuple]: (text, first sentence, last sentence) of every passage.
+    """
+    sents = [
+        s.replace("\n", " ")
+        for s in sentences
+        if min_sentence_len <= len(s) <= max_sentence_len  # Long sents are usually metadata.
+    ]
+    return [
+        (" ".join(sents[idx : idx + sentences_per_passage]), idx, idx + sentences_per_passage - 1)
+        for idx in range(0, len(sents), sliding_distance)
+    ]
+
+
 class BaseRetriever:
     def __init__(self, llm_client, api_config: dict = None):
         """Initialize the EvidenceRetrieve class."""
-        import spacy
-
-        self.tokenizer = spacy.load("en_core_web_sm", disable=["ner", "tagger", "lemmatizer"])
-        from sentence_transformers import CrossEncoder
-        import torch
-
-        self.passage_ranker = CrossEncoder(
-            "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        # sentences come from the parser of en_core_web_sm, SENTENCE_SEGMENTER="rule" uses the rule-based
+        # sentencizer instead; the texts of a request are segmented in one nlp.pipe, in SEGMENT_PROCESSES processes
+        self.sentence_segmenter = (api_config or {}).get("SENTENCE_SEGMENTER") or "parser"
+        self.tokenizer = load_segmenter(self.sentence_segmenter)
+        self.segment_processes = int((api_config or {}).get("SEGMENT_PROCESSES") or 1)
+        # the (query, passage) pairs of a whole request are scored in one length-sorted pass
+        # RANKER_ONNX_PATH swaps PyTorch for the int8 ONNX export of the same model on CPU-only hosts,
+        # scores of unchanged passages are cached, on disk too with SCORE_CACHE_PATH
+        self.passage_ranker = PassageRanker(
+            model_name="cross-encoder/ms-marco-MiniLM-L-6-v2",
             max_length=512,
-            device=torch.device("cuda" if torch.cuda.is_available() else "cpu"),
+            batch_size=32,
+            onnx_path=(api_config or {}).get("RANKER_ONNX_PATH"),
+            cache=ScoreCache(path=(api_config or {}).get("SCORE_CACHE_PATH")),
         )
+        # every passage goes to the cross-encoder; with RERANK_PREFILTER ("bm25" or "bi_encoder") only the
+        # rerank_top_n passages of a query the prefilter scores best, see script/bench_rerank_prefilter.py
+        self.prefilter = get_prefilter((api_config or {}).get("RERANK_PREFILTER") or "none")
+        self.rerank_top_n = 30
         self.lang = "en"
         self.max_search_result_per_query = 3
         self.sentences_per_passage = 10
         self.sliding_distance = 8
         self.max_passages_per_search_result_to_return = 5
+        # CONTENT_EXTRACTOR="main_content" cuts pages to their main content before chunking,
+        # the default keeps the full visible text
+        self.content_extractor = (api_config or {}).get("CONTENT_EXTRACTOR") or DEFAULT_EXTRACTOR
         assert self.sentences_per_passage > self.sliding_distance
         self.llm_client = llm_client
+        self.evidence_store = None
+        if api_config:
+            configure_crawler(api_config)
+            if api_config.get("EVIDENCE_STORE_PATH"):
+                self.evidence_store = EvidenceStore(api_config["EVIDENCE_STORE_PATH"])
 
     def set_lang(self, lang: str):
         """Set the language for evidence retrieval.
@@ -45,13 +90,30 @@ class BaseRetriever:
         """
         self.max_search_result_per_query = m
 
+    def set_segment_processes(self, n: int):
+        """Set the number of processes that segment the crawled texts of a request into sentences.
+
+        Args:
+            n (int): The number of processes, 1 segments in the calling process.
+        """
+        self.segment_processes = n
+
+    def set_rerank_top_n(self, n: int):
+        """Set the number of passages per query the prefilter keeps for the cross-encoder.
+
+        Args:
+            n (int): The number of passages per query to rerank.
+        """
+        self.rerank_top_n = n
+
     def retrieve_evidence(self, claim_query_dict):
         """Retrieve evidence for a list of claims.
         1. get google search page result by generated questions
-        2. crawl all web from urls and extract text
-        3. get relevant snippets from these text
-        4. Take top-5 evidences for each question
-        5. return single claims evidences;
+        2. crawl all web from urls of all claims at once and extract text
+        3. chunk the text of every question into passages
+        4. score the passages of all claims against their question in one batched cross-encoder pass
+        5. take top-5 evidences for each question
+        6. return single claims evidences;
 
         Args:
             claim_query_dict (dict): A dictionary of claims and their corresponding queries.
@@ -59,12 +121,23 @@ class BaseRetriever:
         Returns:
             dict: A dictionary of claims and their corresponding evidences.
         """
-        claim_evidence_dict = {}
+        # the urls of all claims are crawled together, a page found for several claims is fetched and parsed once
+        query_url_dict = {}
         for claim, query_list in claim_query_dict.items():
             logger.info(f"Collecting evidences for claim : {claim}")
-            evidences = self._retrieve_evidence4singleclaim(claim, query_list=query_list)
-            claim_evidence_dict[claim] = evidences
-        return claim_evidence_dict
+            for query, urls in self._get_query_urls(query_list).items():
+                query_url_dict.setdefault(query, urls)
+        query_scraped_results_dict = self._crawl_and_parse_web(query_url_dict=query_url_dict)
+        claim_scraped_dict = {
+            claim: {query: query_scraped_results_dict[query] for query in query_scraped_results_dict if query in query_list}
+            for claim, query_list in claim_query_dict.items()
+        }
+
+        query_passages_dicts = self._chunk_all_scraped_results(list(claim_scraped_dict.values()))
+        scored_dicts = self._score_passages(query_passages_dicts)
+        return {
+            claim: self._aggregate_snippets(scored) for claim, scored in zip(claim_scraped_dict, scored_dicts)
+        }
 
     def _retrieve_evidence4singleclaim(self, claim: str, query_list: list[str]):
         """Retrieve evidence for a single claim.
@@ -91,18 +164,33 @@ class BaseRetriever:
                 response_list.append([response, url])
                 query_responses_dict[query] = response_list
 
-        query_scraped_results_dict = dict()
-        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
-            futures = list()
+        # a page returned for several queries is parsed once and its text shared
+        url_responses = dict()
+        for response_list in query_responses_dict.values():
+            for response, url in response_list:
+                url_responses.setdefault(url, response)
+
+        # the persistent worker pool gets only the body bytes and encoding of every page
+        urls = list(url_responses)
+        texts = parse_pages([url_responses[url] for url in urls], extractor=self.content_extractor)
+        url_texts = dict(zip(urls, texts))
+        if self.evidence_store is not None:
+            # every page is kept once for later claims, with the first query that found it
+            url_queries = dict()
             for query, response_list in query_responses_dict.items():
-                for response, url in response_list:
-                    future = executor.submit(parse_response, response, url, query)
-                    futures.append(future)
-        for future in futures:
-            web_text, url, query = future.result()
-            scraped_results_list = query_scraped_results_dict.get(query, [])
-            scraped_results_list.append([web_text, url])
-            query_scraped_results_dict[query] = scraped_results_list
+                for _, url in response_list:
+                    url_queries.setdefault(url, query)
+            store_texts = url_texts
+            if self.content_extractor != STORE_EXTRACTOR:
+                store_texts = dict(zip(urls, parse_pages([url_responses[url] for url in urls], extractor=STORE_EXTRACTOR)))
+            for url, query in url_queries.items():
+                self.evidence_store.add_page(url, store_texts[url], query)
+        query_scraped_results_dict = dict()
+        for query, response_list in query_responses_dict.items():
+            for _, url in response_list:
+                scraped_results_list = query_scraped_results_dict.get(query, [])
+                scraped_results_list.append([url_texts[url], url])
+                query_scraped_results_dict[query] = scraped_results_list
         # Remove URLs if we weren't able to scrape anything or if they are a PDF.
         for query in query_scraped_results_dict.keys():
             scraped_results_list = query_scraped_results_dict.get(query)
@@ -122,18 +210,101 @@ class BaseRetriever:
         Returns:
             dict: A dictionary of queries and their corresponding relevant snippets.
         """
-        # 4+ 5 chunk to split web text to several passage and score and sort
-        snippets_dict = {}
-        for query, scraped_results in query_scraped_results_dict.items():
-            snippets_dict[query] = self._sorted_passage_by_relevant_score(query, scraped_results=scraped_results)
-            snippets_dict[query] = deepcopy(
-                sorted(
-                    snippets_dict[query],
-                    key=lambda snippet: snippet["retrieval_score"],
-                    reverse=True,
-                )[:5]
-            )
+        query_passages_dict = self._chunk_scraped_results(query_scraped_results_dict)
+        return self._aggregate_snippets(self._score_passages([query_passages_dict])[0])
+
+    def _chunk_scraped_results(self, query_scraped_results_dict: dict[str:list]):
+        """Chunk the scraped web text of every query into passages.
 
+        Returns:
+            dict: A dictionary of queries and their (passages, url), url being the last scraped page of the query.
+        """
+        return self._chunk_all_scraped_results([query_scraped_results_dict])[0]
+
+    def _chunk_all_scraped_results(self, query_scraped_results_dicts: list[dict]):
+        """Chunk the scraped web text of every query of every claim, segmenting all texts in one batch.
+
+        Returns:
+            list[dict]: per claim, the queries and their (passages, url), see _chunk_scraped_results.
+        """
+        webtexts = {}
+        for i, query_scraped_results_dict in enumerate(query_scraped_results_dicts):
+            for query, scraped_results in query_scraped_results_dict.items():
+                if scraped_results:
+                    webtexts[(i, query)] = "".join(webtext for webtext, _ in scraped_results)
+        logger.info(f"========segmenting {len(webtexts)} web texts, {sum(map(len, webtexts.values()))} chars =======")
+        sentences = dict(zip(webtexts, self._segment(list(webtexts.values()))))
+
+        query_passages_dicts = []
+        for i, query_scraped_results_dict in enumerate(query_scraped_results_dicts):
+            query_passages_dict = {}
+            for query, scraped_results in query_scraped_results_dict.items():
+                url = scraped_results[-1][1] if scraped_results else None
+                passages = chunk_sentences(
+                    sentences.get((i, query), []), self.sentences_per_passage, self.sliding_distance
+                )
+                query_passages_dict[query] = (passages, url)
+            query_passages_dicts.append(query_passages_dict)
+        return query_passages_dicts
+
+    def _segment(self, texts: list[str]) -> list[list[str]]:
+        """Sentences of every text, an empty list for a text the segmenter fails on."""
+        try:
+            return segment_texts(self.tokenizer, texts, n_process=self.segment_processes)
+        except UnicodeEncodeError:
+            # the batch is lost, segment the texts one by one to skip only the failing ones
+            sentence_lists = []
+            for text in texts:
+                try:
+                    sentence_lists.append(segment_texts(self.tokenizer, [text])[0])
+                except UnicodeEncodeError as e:  # Sometimes run into Unicode error when tokenizing.
+                    logger.error(f"Unicode error when using Spacy. Skipping text. Error message {e}")
+                    sentence_lists.append([])
+            return sentence_lists
+
+    def _score_passages(self, query_passages_dicts: list[dict]):
+        """Score the passages of every query of every claim in one batched cross-encoder pass.
+
+        Args:
+            query_passages_dicts (list[dict]): per claim, the queries and their (passages, url), see _chunk_scraped_results.
+
+        Returns:
+            list[dict]: per claim, the queries and their top-5 relevant snippets, best first.
+        """
+        query_passages = [
+            (query, passages)
+            for query_passages_dict in query_passages_dicts
+            for query, (passages, _) in query_passages_dict.items()
+        ]
+        start = time.perf_counter()
+        kept = self._prefilter(query_passages)
+        prefilter_end = time.perf_counter()
+        pairs = [(query, passages[i][0]) for (query, passages), indices in zip(query_passages, kept) for i in indices]
+        scores = iter(self.passage_ranker.score(pairs))
+        logger.info(
+            f"Reranked {len(pairs)} of {sum(len(passages) for _, passages in query_passages)} passages of "
+            f"{len(query_passages)} queries: prefilter {(prefilter_end - start) * 1000:.0f} ms, "
+            f"cross-encoder {(time.perf_counter() - prefilter_end) * 1000:.0f} ms"
+        )
+
+        kept = iter(kept)
+        snippets_dicts = []
+        for query_passages_dict in query_passages_dicts:
+            snippets_dict = {}
+            for query, (passages, url) in query_passages_dict.items():
+                passage_scores = [(passages[i], next(scores)) for i in next(kept)]
+                snippets_dict[query] = deepcopy(
+                    sorted(
+                        self._select_passages(passage_scores, url),
+                        key=lambda snippet: snippet["retrieval_score"],
+                        reverse=True,
+                    )[:5]
+                )
+            snippets_dicts.append(snippets_dict)
+        return snippets_dicts
+
+    def _aggregate_snippets(self, snippets_dict: dict[str:list]):
+        """Take the top evidences of the questions in turn, up to max_passages_per_search_result_to_return."""
         evidences = {}
         evidences["aggregated"] = []
         evidences["question_wise"] = deepcopy(snippets_dict)
@@ -156,19 +327,34 @@ class BaseRetriever:
         Returns:
             list: a list of relevant snippets, where each snippet is a dictionary containing the text, url, sentences per passage, and retrieval score.
         """
-        retrieved_passages = list()
-        weball = ""
-        for webtext, url in scraped_results:
-            weball += webtext
-        passages = self._chunk_text(text=weball, tokenizer=self.tokenizer)
+        passages, url = self._chunk_scraped_results({query: scraped_results})[query]
         if not passages:
             return []
-        # Score the passages by relevance to the query using a cross-encoder.
-        scores = self.passage_ranker.predict([(query, p[0]) for p in passages]).tolist()
-        passage_scores = list(zip(passages, scores))
+        # Score the passages the prefilter keeps by relevance to the query using a cross-encoder.
+        passages = [passages[i] for i in self._prefilter([(query, passages)])[0]]
+        scores = self.passage_ranker.score([(query, p[0]) for p in passages])
+        return self._select_passages(list(zip(passages, scores)), url)
+
+    def _prefilter(self, query_passages: list[tuple]):
+        """Return, per (query, passages), the indices of the passages to rerank with the cross-encoder."""
+        if self.prefilter is None:
+            return [list(range(len(passages))) for _, passages in query_passages]
+        texts = [(query, [passage[0] for passage in passages]) for query, passages in query_passages]
+        return self.prefilter.select(texts, self.rerank_top_n)
+
+    def _select_passages(self, passage_scores: list[tuple], url: str):
+        """Take the top non-overlapping passages of a query by their cross-encoder score.
+
+        Args:
+            passage_scores (list[tuple]): (passage, score) pairs, passage being (text, first sentence, last sentence).
+            url (str): The url of the passages.
 
+        Returns:
+            list: a list of relevant snippets, where each snippet is a dictionary containing the text, url, sentences per passage, and retrieval score.
+        """
+        retrieved_passages = list()
         # Take the top passages_per_search passages for the current search result.
-        passage_scores.sort(key=lambda x: x[1], reverse=True)
+        passage_scores = sorted(passage_scores, key=lambda x: x[1], reverse=True)
 
         relevant_items = list()
         for passage_item, score in passage_scores:
@@ -217,19 +403,13 @@ class BaseRetriever:
         try:
             logger.info("========web text len: {} =======".format((len(text))))
             doc = tokenizer(text[:500000])  # Take 500k chars to not break tokenization.
-            sents = [
-                s.text.replace("\n", " ")
-                for s in doc.sents
-                if min_sentence_len <= len(s.text) <= max_sentence_len  # Long sents are usually metadata.
-            ]
-            for idx in range(0, len(sents), self.sliding_distance):
-                passages.append(
-                    (
-                        " ".join(sents[idx : idx + self.sentences_per_passage]),
-                        idx,
-                        idx + self.sentences_per_passage - 1,
-                    )
-                )
+            passages = chunk_sentences(
+                [s.text for s in doc.sents],
+                self.sentences_per_passage,
+                self.sliding_distance,
+                min_sentence_len,
+                max_sentence_len,
+            )
         except UnicodeEncodeError as e:  # Sometimes run into Unicode error when tokenizing.
             logger.error(f"Unicode error when using Spacy. Skipping text. Error message {e}")
         return passages
@@ -0,0 +1,41 @@
+from factcheck.utils.evidence_store import EvidenceStore
+from factcheck.utils.logger import CustomLogger
+from .local_bm25_retriever import LocalBM25Retriever
+
+logger = CustomLogger(__name__).getlog()
+
+
+class EvidenceStoreRetriever(LocalBM25Retriever):
+    # the same BM25 confidence as the offline index, see EvidenceStore.search
+    confidence_threshold = 0.6
+
+    def __init__(self, llm_client, api_config: dict = None, store_path: str = None):
+        """Initialize the EvidenceStoreRetriever class, evidence from the pages fetched by earlier searches.
+
+        The store is filled by the serper retriever when EVIDENCE_STORE_PATH is configured, with
+        --retriever hybrid it is searched before waiting for the web. Claims are assembled as in
+        LocalBM25Retriever.
+
+        Args:
+            llm_client (BaseClient): The LLM client, unused by this retriever.
+            api_config (dict): API keys, EVIDENCE_STORE_PATH names the sqlite file.
+            store_path (str, optional): sqlite file, overrides EVIDENCE_STORE_PATH. Defaults to None.
+        """
+        self.lang = "en"
+        self.llm_client = llm_client
+        store_path = store_path or (api_config or {}).get("EVIDENCE_STORE_PATH")
+        if not store_path:
+            raise ValueError("The evidence_store retriever needs EVIDENCE_STORE_PATH.")
+        self.store = EvidenceStore(store_path)
+        logger.info(f"Opened evidence store {store_path} with {len(self.store)} passages.")
+
+    def search_queries(self, query_list: list[str], top_k: int):
+        results = []
+        for query in query_list:
+            evidences = []
+            for pid, confidence in self.store.search(query, top_k=top_k):
+                passage = self.store.passage(pid)
+                if passage is not None:
+                    evidences.append((pid, confidence, {"text": passage["text"], "url": passage["url"]}))
+            results.append(evidences)
+        return results
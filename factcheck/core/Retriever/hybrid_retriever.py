@@ -0,0 +1,194 @@
+import threading
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from factcheck.utils.logger import CustomLogger
+from factcheck.utils.query_util import dedup_queries
+from .evidence_store_retriever import EvidenceStoreRetriever
+from .local_bm25_retriever import LocalBM25Retriever
+from .local_dense_retriever import LocalDenseRetriever
+from .serper_retriever import SerperEvidenceRetriever
+
+logger = CustomLogger(__name__).getlog()
+
+LOCAL_RETRIEVERS = {
+    "local_bm25": LocalBM25Retriever,
+    "local_dense": LocalDenseRetriever,
+    "evidence_store": EvidenceStoreRetriever,
+}
+
+
+def reciprocal_rank_fusion(rankings: list[list], k: int = 60) -> list:
+    """Merge ranked lists of keys: a key scores sum(1 / (k + rank)) over the lists it appears in.
+
+    Ties keep the order in which keys were first seen.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda key: -scores[key])
+
+
+def default_local(api_config: dict) -> str:
+    """The local kind of a hybrid retriever: an offline index when one is built, else the evidence store."""
+    if api_config.get("LOCAL_DENSE_INDEX_PATH"):
+        return "local_dense"
+    if not api_config.get("LOCAL_INDEX_PATH") and api_config.get("EVIDENCE_STORE_PATH"):
+        return "evidence_store"
+    return "local_bm25"
+
+
+class HybridRetriever:
+    def __init__(
+        self,
+        llm_client,
+        api_config: dict = None,
+        local: str = None,
+        latency_first: bool = True,
+        confidence_threshold: float = None,
+        rrf_k: int = 60,
+        local_grace: float = 0.05,
+        web_retriever=None,
+        local_retriever=None,
+    ):
+        """Initialize the HybridRetriever class, web search and a local index queried concurrently.
+
+        Both sources are asked for every query at once. Their rankings are merged per claim with
+        reciprocal rank fusion. In latency-first mode a claim whose local evidence is confident
+        is answered from the local index alone and, when every claim is, the call returns as
+        soon as the local index answers. The web search then finishes in the background, which
+        still fills the search cache when one is configured.
+
+        Args:
+            llm_client (BaseClient): The LLM client, unused by this retriever.
+            api_config (dict): API keys, SERPER_API_KEY and LOCAL_INDEX_PATH, LOCAL_DENSE_INDEX_PATH or EVIDENCE_STORE_PATH.
+            local (str, optional): "local_bm25", "local_dense" or "evidence_store", see default_local.
+            latency_first (bool, optional): answer confident claims without waiting for the web. Defaults to True.
+            confidence_threshold (float, optional): local confidence of an answer, defaults to the local retriever's.
+            rrf_k (int, optional): rank fusion constant, larger flattens the weight of the top ranks. Defaults to 60.
+            local_grace (float, optional): seconds to wait for the local index once the web has answered. Defaults to 0.05.
+            web_retriever (optional): web retriever to use instead of a new SerperEvidenceRetriever.
+            local_retriever (optional): local retriever to use instead of a new one of the local kind.
+        """
+        api_config = api_config or {}
+        self.lang = "en"
+        self.llm_client = llm_client
+        if local_retriever is None:
+            local = local or default_local(api_config)
+            if local not in LOCAL_RETRIEVERS:
+                raise NotImplementedError(f"Local retriever {local} not found!")
+            local_retriever = LOCAL_RETRIEVERS[local](llm_client=llm_client, api_config=api_config)
+        self.local = local_retriever
+        self.web = web_retriever or SerperEvidenceRetriever(llm_client=llm_client, api_config=api_config)
+        self.latency_first = latency_first
+        self.confidence_threshold = (
+            confidence_threshold if confidence_threshold is not None else self.local.confidence_threshold
+        )
+        self.rrf_k = rrf_k
+        self.local_grace = local_grace
+        # long-lived so a web search still running after an early return does not block the caller
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid-retriever")
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+
+    def set_lang(self, lang: str):
+        self.lang = lang
+        self.web.lang = lang
+        self.local.lang = lang
+
+    def retrieve_evidence(self, claim_queries_dict, top_k: int = 3, snippet_extend_flag: bool = True):
+        """Retrieve evidences for the given claims
+
+        Args:
+            claim_queries_dict (dict): a dictionary of claims and their corresponding queries.
+            top_k (int, optional): the number of evidences per query from each source. Defaults to 3.
+            snippet_extend_flag (bool, optional): whether to extend the web search snippets. Defaults to True.
+
+        Returns:
+            dict: a dictionary of claims and their corresponding evidences.
+        """
+        logger.info("Collecting evidences ...")
+        query_list, claim_query_indices = dedup_queries(claim_queries_dict)
+        if not query_list:
+            return {claim: [] for claim in claim_queries_dict}
+        local_future = self.executor.submit(self.local.search_queries, query_list, top_k)
+        web_future = self.executor.submit(self.web.search_queries, query_list, top_k, snippet_extend_flag)
+
+        done, _ = wait([local_future, web_future], return_when=FIRST_COMPLETED)
+        if local_future not in done:
+            # the web answered first, the local index only joins if it is about to finish
+            wait([local_future], timeout=self.local_grace)
+        local_lists = self._result(local_future, "local")
+        if local_lists is None:
+            local_lists = [[] for _ in query_list]
+
+        confident = {
+            claim: self.latency_first and self._is_confident(local_lists, indices, top_k)
+            for claim, indices in claim_query_indices.items()
+        }
+        if all(confident.values()):
+            self._count(local_only=len(confident), web_not_awaited=0 if web_future.done() else 1)
+            logger.info("Collect evidences done, all claims answered by the local index.")
+            return {claim: self._local_evidences(local_lists, indices) for claim, indices in claim_query_indices.items()}
+
+        wait([web_future])
+        web_lists = self._result(web_future, "web")
+        if web_lists is None:
+            web_lists = [[] for _ in query_list]
+        claim_evidence_dict = {}
+        for claim, indices in claim_query_indices.items():
+            if confident[claim]:
+                claim_evidence_dict[claim] = self._local_evidences(local_lists, indices)
+            else:
+                claim_evidence_dict[claim] = self._fuse(local_lists, web_lists, indices, top_k)
+        num_local = sum(confident.values())
+        self._count(local_only=num_local, fused=len(confident) - num_local)
+        logger.info("Collect evidences done!")
+        return claim_evidence_dict
+
+    def _result(self, future, source: str):
+        if not future.done():
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            logger.warning(f"Hybrid retriever: {source} search failed, continuing without it: {e}")
+            self._count(**{f"{source}_failures": 1})
+            return None
+
+    def _is_confident(self, local_lists: list, indices: list[int], top_k: int) -> bool:
+        # the local index alone must fill what one web search would: top_k confident passages
+        confident_passages = {
+            pid for i in indices for pid, confidence, _ in local_lists[i] if confidence >= self.confidence_threshold
+        }
+        return len(confident_passages) >= top_k
+
+    def _local_evidences(self, local_lists: list, indices: list[int]) -> list[dict]:
+        seen, evidences = set(), []
+        for i in indices:
+            for pid, _, evidence in local_lists[i]:
+                if pid not in seen:
+                    seen.add(pid)
+                    evidences.append(dict(evidence))
+        return evidences
+
+    def _fuse(self, local_lists: list, web_lists: list, indices: list[int], top_k: int) -> list[dict]:
+        evidences, rankings = {}, []
+        for i in indices:
+            local_ranking = []
+            for pid, _, evidence in local_lists[i]:
+                evidences.setdefault(("local", pid), evidence)
+                local_ranking.append(("local", pid))
+            web_ranking = []
+            for evidence in web_lists[i]:
+                key = ("web", evidence["url"], evidence["text"])
+                evidences.setdefault(key, evidence)
+                web_ranking.append(key)
+            rankings += [web_ranking, local_ranking]
+        fused = reciprocal_rank_fusion(rankings, k=self.rrf_k)
+        return [dict(evidences[key]) for key in fused[: top_k * len(indices)]]
+
+    def _count(self, **counts):
+        with self._stats_lock:
+            self.stats.update(counts)
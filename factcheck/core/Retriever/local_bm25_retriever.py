@@ -0,0 +1,79 @@
+from factcheck.utils.bm25_index import BM25Index
+from factcheck.utils.logger import CustomLogger
+from factcheck.utils.query_util import dedup_queries
+
+logger = CustomLogger(__name__).getlog()
+
+
+class LocalBM25Retriever:
+    # a passage matching 60% of the query's idf mass is taken as an answer by the hybrid retriever
+    confidence_threshold = 0.6
+
+    def __init__(self, llm_client, api_config: dict = None, index_path: str = None):
+        """Initialize the LocalBM25Retriever class, evidence from a local BM25 index without any network access.
+
+        The index is built offline with script/build_local_index.py.
+
+        Args:
+            llm_client (BaseClient): The LLM client, unused by this retriever.
+            api_config (dict): API keys, LOCAL_INDEX_PATH names the index directory.
+            index_path (str, optional): index directory, overrides LOCAL_INDEX_PATH. Defaults to None.
+        """
+        self.lang = "en"
+        self.llm_client = llm_client
+        index_path = index_path or (api_config or {}).get("LOCAL_INDEX_PATH")
+        if not index_path:
+            raise ValueError("The local_bm25 retriever needs LOCAL_INDEX_PATH, see script/build_local_index.py.")
+        self.index = BM25Index(index_path)
+        logger.info(f"Loaded local BM25 index {index_path} with {self.index.num_passages} passages.")
+
+    def set_lang(self, lang: str):
+        self.lang = lang
+
+    def retrieve_evidence(self, claim_queries_dict, top_k: int = 3):
+        """Retrieve evidences for the given claims
+
+        Args:
+            claim_queries_dict (dict): a dictionary of claims and their corresponding queries.
+            top_k (int, optional): the number of passages to retrieve per query. Defaults to 3.
+
+        Returns:
+            dict: a dictionary of claims and their corresponding evidences.
+        """
+        logger.info("Collecting evidences ...")
+        query_list, claim_query_indices = dedup_queries(claim_queries_dict)
+        evidence_list = self.search_queries(query_list, top_k)
+
+        claim_evidence_dict = {}
+        for claim, indices in claim_query_indices.items():
+            # queries of one claim often hit the same passage, it is kept once
+            seen = set()
+            evidences = []
+            for i in indices:
+                for pid, _, evidence in evidence_list[i]:
+                    if pid not in seen:
+                        seen.add(pid)
+                        evidences.append(dict(evidence))
+            claim_evidence_dict[claim] = evidences
+        logger.info("Collect evidences done!")
+        return claim_evidence_dict
+
+    def search_queries(self, query_list: list[str], top_k: int) -> list[list[tuple[int, float, dict]]]:
+        """Return [(passage id, confidence, evidence)] of every query, best first.
+
+        The confidence is the share of the query's information the passage matches, see
+        BM25Index.score_bound, capped at 1.
+        """
+        results = []
+        for query in query_list:
+            bound = self.index.score_bound(query)
+            scored = [(pid, min(1.0, score / bound)) for pid, score in self.index.search(query, top_k=top_k)]
+            results.append(self._evidences(scored))
+        return results
+
+    def _evidences(self, results: list[tuple[int, float]]) -> list[tuple[int, float, dict]]:
+        evidences = []
+        for pid, confidence in results:
+            passage = self.index.passage(pid)
+            evidences.append((pid, confidence, {"text": passage["text"], "url": passage["url"] or passage["title"]}))
+        return evidences
@@ -0,0 +1,38 @@
+from factcheck.utils.dense_index import DenseIndex, sentence_transformer_encoder
+from factcheck.utils.logger import CustomLogger
+from .local_bm25_retriever import LocalBM25Retriever
+
+logger = CustomLogger(__name__).getlog()
+
+
+class LocalDenseRetriever(LocalBM25Retriever):
+    # cosine similarity of a MiniLM passage that answers the query rather than just sharing its topic
+    confidence_threshold = 0.6
+
+    def __init__(self, llm_client, api_config: dict = None, index_path: str = None, nprobe: int = 16):
+        """Initialize the LocalDenseRetriever class, evidence from a local embedding index without any network access.
+
+        The index is built offline with script/build_local_index.py --dense, queries are embedded
+        with the sentence-transformers model recorded in it. Claims are assembled as in LocalBM25Retriever.
+
+        Args:
+            llm_client (BaseClient): The LLM client, unused by this retriever.
+            api_config (dict): API keys, LOCAL_DENSE_INDEX_PATH names the index directory.
+            index_path (str, optional): index directory, overrides LOCAL_DENSE_INDEX_PATH. Defaults to None.
+            nprobe (int, optional): IVF lists scored per query, more is slower and more accurate. Defaults to 16.
+        """
+        self.lang = "en"
+        self.llm_client = llm_client
+        index_path = index_path or (api_config or {}).get("LOCAL_DENSE_INDEX_PATH")
+        if not index_path:
+            raise ValueError("The local_dense retriever needs LOCAL_DENSE_INDEX_PATH, see script/build_local_index.py.")
+        self.index = DenseIndex(index_path, nprobe=nprobe)
+        self.encode = sentence_transformer_encoder(self.index.meta["model"])
+        logger.info(f"Loaded local dense index {index_path} with {self.index.num_passages} passages.")
+
+    def search_queries(self, query_list: list[str], top_k: int):
+        if not query_list:
+            return []
+        # all queries are embedded in one batch, the confidence is the cosine similarity
+        query_vectors = self.encode(query_list)
+        return [self._evidences(results) for results in self.index.search(query_vectors, top_k=top_k)]
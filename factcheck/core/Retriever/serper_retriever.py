@@ -3,19 +3,68 @@ import json
 import requests
 import os
 import re
-import bs4
+import time
+from requests.adapters import HTTPAdapter
 from factcheck.utils.logger import CustomLogger
-from factcheck.utils.web_util import crawl_web
+from factcheck.utils.circuit_breaker import CircuitOpenError, get_breaker
+from factcheck.utils.query_util import canonicalize_query, dedup_queries
+from factcheck.utils.search_cache import SearchCache
+from factcheck.utils.evidence_store import STORE_EXTRACTOR, EvidenceStore
+from factcheck.utils.html_extractor import DEFAULT_EXTRACTOR, extract_visible_text
+from factcheck.utils.web_util import crawl_web, configure_crawler
 
 logger = CustomLogger(__name__).getlog()
 
 
+class SerperRetryableError(Exception):
+    """A Serper request failed in a way worth retrying (throttling or a server error)."""
+
+
 class SerperEvidenceRetriever:
-    def __init__(self, llm_client, api_config: dict = None):
-        """Initialize the SerperEvidenceRetrieve class"""
+    def __init__(
+        self,
+        llm_client,
+        api_config: dict = None,
+        batch_size: int = 100,
+        max_concurrent_batches: int = 4,
+        num_batch_retries: int = 2,
+        request_timeout: float = 30,
+    ):
+        """Initialize the SerperEvidenceRetrieve class
+
+        Args:
+            llm_client (BaseClient): The LLM client, unused by this retriever.
+            api_config (dict): API keys, SERPER_API_KEY is required.
+            batch_size (int, optional): number of queries per Serper request. Defaults to 100.
+            max_concurrent_batches (int, optional): number of batches requested at the same time. Defaults to 4.
+            num_batch_retries (int, optional): retries of a batch after a network error, throttling or a server error. Defaults to 2.
+            request_timeout (float, optional): seconds to wait for a Serper response. Defaults to 30.
+        """
         self.lang = "en"
         self.serper_key = api_config["SERPER_API_KEY"]
         self.llm_client = llm_client
+        self.breaker = get_breaker("serper")
+        self.batch_size = batch_size
+        self.max_concurrent_batches = max_concurrent_batches
+        self.num_batch_retries = num_batch_retries
+        self.request_timeout = request_timeout
+
+        # keep-alive connections shared by the concurrent batches
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrent_batches)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(
+            {"X-API-KEY": self.serper_key or "", "Content-Type": "application/json", "Accept-Encoding": "gzip, deflate"}
+        )
+        # the same page text as BaseRetriever, see CONTENT_EXTRACTOR
+        self.content_extractor = api_config.get("CONTENT_EXTRACTOR") or DEFAULT_EXTRACTOR
+        # repeated questions across users and articles are answered from disk instead of a paid query
+        cache_path = api_config.get("SEARCH_CACHE_PATH")
+        self.search_cache = SearchCache(cache_path) if cache_path else None
+        # the text of every crawled page is kept for later claims, see EvidenceStoreRetriever
+        store_path = api_config.get("EVIDENCE_STORE_PATH")
+        self.evidence_store = EvidenceStore(store_path) if store_path else None
+        configure_crawler(api_config)
 
     def retrieve_evidence(self, claim_queries_dict, top_k: int = 3, snippet_extend_flag: bool = True):
         """Retrieve evidences for the given claims
@@ -29,21 +78,33 @@ class SerperEvidenceRetriever:
             dict: a dictionary of claims and their corresponding evidences.
         """
         logger.info("Collecting evidences ...")
-        query_list = [y for x in claim_queries_dict.items() for y in x[1]]
-        evidence_list = self._retrieve_evidence_4_all_claim(
-            query_list=query_list, top_k=top_k, snippet_extend_flag=snippet_extend_flag
-        )
+        # claims of one document often share queries, search every distinct query once
+        query_list, claim_query_indices = dedup_queries(claim_queries_dict)
+        num_requested = sum(len(queries) for queries in claim_queries_dict.values())
+        if num_requested > len(query_list):
+            logger.info(f"Searching {len(query_list)} distinct queries for {num_requested} requested.")
+        evidence_list = self.search_queries(query_list, top_k=top_k, snippet_extend_flag=snippet_extend_flag)
 
-        i = 0
         claim_evidence_dict = {}
-        for claim, queries in claim_queries_dict.items():
-            evidences_per_query_L = evidence_list[i : i + len(queries)]
-            claim_evidence_dict[claim] = [e for evidences in evidences_per_query_L for e in evidences]
-            i += len(queries)
-        assert i == len(evidence_list)
+        for claim, indices in claim_query_indices.items():
+            claim_evidence_dict[claim] = [dict(e) for i in indices for e in evidence_list[i]]
         logger.info("Collect evidences done!")
         return claim_evidence_dict
 
+    def search_queries(self, query_list: list[str], top_k: int = 3, snippet_extend_flag: bool = True) -> list[list[dict]]:
+        """Return the evidences of every distinct query, in search result order.
+
+        Args:
+            query_list (list[str]): distinct queries, see dedup_queries.
+            top_k (int, optional): the number of top relevant results to retrieve. Defaults to 3.
+            snippet_extend_flag (bool, optional): whether to extend the snippet. Defaults to True.
+        """
+        if snippet_extend_flag and get_breaker("crawl").is_open:
+            # degraded mode: page crawling is failing, fall back to the search snippets only
+            logger.warning("Crawler circuit is open, using search snippets without extension.")
+            snippet_extend_flag = False
+        return self._retrieve_evidence_4_all_claim(query_list=query_list, top_k=top_k, snippet_extend_flag=snippet_extend_flag)
+
     def _retrieve_evidence_4_all_claim(
         self, query_list: list[str], top_k: int = 3, snippet_extend_flag: bool = True
     ) -> list[list[str]]:
@@ -61,24 +122,40 @@ class SerperEvidenceRetriever:
         # init the evidence list with None
         evidences = [[] for _ in query_list]
 
-        # get the response from serper
-        serper_responses = []
-        for i in range(0, len(query_list), 100):
-            batch_query_list = query_list[i : i + 100]
-            batch_response = self._request_serper_api(batch_query_list)
-            if batch_response is None:
-                logger.error("Serper API request error!")
-                return evidences
-            else:
-                serper_responses += batch_response.json()
+        # get the response from the search cache, then from serper for the misses
+        serper_responses = [None] * len(query_list)
+        if self.search_cache is not None:
+            for i, query in enumerate(query_list):
+                serper_responses[i] = self.search_cache.get(query, lang=self.lang, top_k=top_k)
+        missing = [i for i, response in enumerate(serper_responses) if response is None]
+
+        # batches are requested concurrently, a failed batch only loses the evidences of its own queries
+        batches = [missing[b : b + self.batch_size] for b in range(0, len(missing), self.batch_size)]
+        if batches:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrent_batches, len(batches))) as executor:
+                batch_results = list(
+                    executor.map(lambda batch: self._request_serper_batch([query_list[i] for i in batch]), batches)
+                )
+            for batch_indices, batch_result in zip(batches, batch_results):
+                if batch_result is None:
+                    continue
+                for i, response in zip(batch_indices, batch_result):
+                    serper_responses[i] = response
+                    if self.search_cache is not None:
+                        self.search_cache.put(query_list[i], response, lang=self.lang, top_k=top_k)
 
         # get the responses for queries with an answer box
         query_url_dict = {}
         url_to_date = {}  # TODO: decide whether to use date
         _snippet_to_check = []
         for i, (query, response) in enumerate(zip(query_list, serper_responses)):
-            if query != response.get("searchParameters").get("q"):
-                logger.error("Serper change query from {} TO {}".format(query, response.get("searchParameters").get("q")))
+            if response is None:
+                # the search failed, the query keeps an empty evidence list
+                continue
+            # a cached response holds the spelling of the query that was first searched
+            searched_query = response.get("searchParameters").get("q")
+            if canonicalize_query(query) != canonicalize_query(searched_query):
+                logger.error("Serper change query from {} TO {}".format(query, searched_query))
 
             # TODO: provide the link for the answer box
             if "answerBox" in response:
@@ -123,43 +200,46 @@ class SerperEvidenceRetriever:
         url_to_check = [_item[2] for _item in responses]
         query_to_check = [_item[3] for _item in responses]
 
-        def bs4_parse_text(response, snippet, flag):
-            """Parse the text from the response and extend the snippet
+        def page_text(response):
+            """Extract the visible text of a page, once per distinct page."""
+            return extract_visible_text(response.text, extractor=self.content_extractor)
+
+        def extend_snippet(text, snippet):
+            """Extend the snippet from the search result with the text following it on the page
 
             Args:
-                response (web response): the response from the web
+                text (str): the page text, None if the page could not be fetched
                 snippet (str): the snippet to extend from the search result
-                flag (bool): flag to extend the snippet
 
             Returns:
-                _type_: _description_
+                str: the extended snippet, or the snippet itself if it is not found on the page
             """
-            if flag and ".pdf" not in str(response.url):
-                soup = bs4.BeautifulSoup(response.text, "html.parser")
-                text = soup.get_text()
-                # Search for the snippet in text
-                snippet_start = text.find(snippet[:-10])
-                if snippet_start == -1:
-                    return snippet
-                else:
-                    pre_context_range = 0  # Number of characters around the snippet to display
-                    post_context_range = 500  # Number of characters around the snippet to display
-                    start = max(0, snippet_start - pre_context_range)
-                    end = snippet_start + len(snippet) + post_context_range
-                    return text[start:end] + " ..."
-            else:
+            if text is None:
                 return snippet
-
+            # Search for the snippet in text
+            snippet_start = text.find(snippet[:-10])
+            if snippet_start == -1:
+                return snippet
+            else:
+                pre_context_range = 0  # Number of characters around the snippet to display
+                post_context_range = 500  # Number of characters around the snippet to display
+                start = max(0, snippet_start - pre_context_range)
+                end = snippet_start + len(snippet) + post_context_range
+                return text[start:end] + " ..."
+
+        # pages returned for several queries are the same object, parse each of them once
+        pages_to_parse = {
+            id(_r): _r for _r, _f in zip(response_to_check, flag_to_check) if _f and ".pdf" not in str(_r.url)
+        }
         # Question: if os.cpu_count() cause problems when running in parallel?
         with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
-            _extended_snippet = list(
-                executor.map(
-                    lambda _r, _s, _f: bs4_parse_text(_r, _s, _f),
-                    response_to_check,
-                    _snippet_to_check,
-                    flag_to_check,
-                )
-            )
+            page_texts = dict(zip(pages_to_parse, executor.map(page_text, pages_to_parse.values())))
+        if self.evidence_store is not None:
+            self._store_pages(page_texts, zip(response_to_check, url_to_check, query_to_check))
+        _extended_snippet = [
+            extend_snippet(page_texts.get(id(_r)) if _f else None, _s)
+            for _r, _s, _f in zip(response_to_check, _snippet_to_check, flag_to_check)
+        ]
 
         # merge the snippets by query
         query_snippet_url_dict = {}
@@ -168,9 +248,10 @@ class SerperEvidenceRetriever:
             _snippet_url_list.append((_snippet, _url))
             query_snippet_url_dict[_query] = _snippet_url_list
 
-        # extend the evidence list for each query
+        # extend the evidence list for each query, queries are distinct so the index is unambiguous
+        query_index = {_query: _i for _i, _query in enumerate(query_list)}
         for _query in query_snippet_url_dict.keys():
-            _query_index = query_list.index(_query)
+            _query_index = query_index[_query]
             _snippet_url_list = query_snippet_url_dict[_query]
             evidences[_query_index] += [
                 {"text": re.sub(r"\n+", "\n", snippet), "url": _url} for snippet, _url in _snippet_url_list
@@ -178,6 +259,40 @@ class SerperEvidenceRetriever:
 
         return evidences
 
+    def _store_pages(self, page_texts: dict, pages):
+        """Add the main content of every parsed page to the evidence store, with the first query that found it."""
+        stored = set()
+        for response, url, query in pages:
+            if id(response) in page_texts and id(response) not in stored:
+                stored.add(id(response))
+                text = page_texts[id(response)]
+                if self.content_extractor != STORE_EXTRACTOR:
+                    text = extract_visible_text(response.text, extractor=STORE_EXTRACTOR)
+                self.evidence_store.add_page(url, text, query)
+
+    def _request_serper_batch(self, questions):
+        """Request one batch of questions, retrying network errors, throttling and server errors
+        with exponential backoff.
+
+        Returns:
+            list[dict]: the serper result of every question, or None if the batch failed.
+        """
+        for attempt in range(self.num_batch_retries + 1):
+            try:
+                return self._request_serper_api(questions).json()
+            except CircuitOpenError as e:
+                logger.error(f"Serper API unavailable: {e}")
+                return None
+            except (requests.exceptions.RequestException, SerperRetryableError) as e:
+                if attempt == self.num_batch_retries:
+                    logger.error(f"Serper API request error after {attempt + 1} attempts: {e}")
+                    return None
+                logger.warning(f"Serper API request error, retry {attempt + 1}: {e}")
+                time.sleep(min(2**attempt, 8))
+            except Exception as e:
+                logger.error(f"Serper API request error: {e}")
+                return None
+
     def _request_serper_api(self, questions):
         """Request the serper api
 
@@ -189,20 +304,29 @@ class SerperEvidenceRetriever:
         """
         url = "https://google.serper.dev/search"
 
-        headers = {
-            "X-API-KEY": self.serper_key,
-            "Content-Type": "application/json",
-        }
-
         questions_data = [{"q": question, "autocorrect": False} for question in questions]
         payload = json.dumps(questions_data)
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Circuit 'serper' is open, skipping call.")
         response = None
-        response = requests.request("POST", url, headers=headers, data=payload)
+        try:
+            response = self.session.post(url, data=payload, timeout=self.request_timeout)
+        except requests.exceptions.RequestException:
+            self.breaker.record_failure()
+            raise
+
+        # only server-side errors and throttling count against the upstream
+        if response.status_code >= 500 or response.status_code == 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
 
         if response.status_code == 200:
             return response
         elif response.status_code == 403:
             raise Exception("Failed to authenticate. Check your API key.")
+        elif response.status_code >= 500 or response.status_code == 429:
+            raise SerperRetryableError(f"Error occurred ({response.status_code}): {response.text}")
         else:
             raise Exception(f"Error occurred: {response.text}")
 
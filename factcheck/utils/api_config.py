@@ -7,6 +7,18 @@ keys = [
     "GCS_BUCKET_NAME",
     "GCS_BASE_URL",
     "GOOGLE_APPLICATION_CREDENTIALS",
+    "SEARCH_CACHE_PATH",
+    "PAGE_CACHE_PATH",
+    "DOMAIN_STATS_PATH",
+    "CONTENT_EXTRACTOR",
+    "LOCAL_INDEX_PATH",
+    "LOCAL_DENSE_INDEX_PATH",
+    "EVIDENCE_STORE_PATH",
+    "RANKER_ONNX_PATH",
+    "SCORE_CACHE_PATH",
+    "RERANK_PREFILTER",
+    "SENTENCE_SEGMENTER",
+    "SEGMENT_PROCESSES",
 ]
 
 
@@ -0,0 +1,278 @@
+import json
+import math
+import os
+import re
+from array import array
+from collections import Counter
+
+import numpy as np
+
+from factcheck.utils.logger import CustomLogger
+
+logger = CustomLogger(__name__).getlog()
+
+INDEX_VERSION = 1
+# CJK characters are indexed one by one, those scripts do not separate words by spaces
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_TOKEN = re.compile(f"[{_CJK}]|[^\\W_{_CJK}]+")
+# the most frequent English words: their posting lists would be most of the index and add nothing to a ranking
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from had has have he her his i in is it its of on or she that the their "
+    "them they this to was were which who will with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Casefolded words of a text without stopwords, CJK characters as single tokens."""
+    return [token for token in _TOKEN.findall(text.casefold()) if token not in STOPWORDS]
+
+
+def chunk_document(text: str, passage_words: int = 120, stride: int = 100) -> list[str]:
+    """Cut a document into passages of passage_words words, a new one every stride words."""
+    words = text.split()
+    if len(words) <= passage_words:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i : i + passage_words]) for i in range(0, len(words) - passage_words + stride, stride)]
+
+
+def write_strings(path: str, strings) -> int:
+    """Write strings as one utf-8 blob (path.bin) and their boundaries (path.offsets.npy)."""
+    offsets = array("q", [0])
+    with open(f"{path}.bin", "wb") as f:
+        for string in strings:
+            data = string.encode("utf-8")
+            f.write(data)
+            offsets.append(offsets[-1] + len(data))
+    np.save(f"{path}.offsets.npy", np.frombuffer(offsets, dtype=np.int64))
+    return len(offsets) - 1
+
+
+class StringStore:
+    """Read-only, memory-mapped list of strings written by write_strings."""
+
+    def __init__(self, path: str):
+        self.offsets = np.load(f"{path}.offsets.npy", mmap_mode="r")
+        # an empty file cannot be mapped
+        size = os.path.getsize(f"{path}.bin")
+        self.data = np.memmap(f"{path}.bin", dtype=np.uint8, mode="r") if size else np.zeros(0, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def raw(self, i: int) -> bytes:
+        return self.data[self.offsets[i] : self.offsets[i + 1]].tobytes()
+
+    def __getitem__(self, i: int) -> str:
+        return self.raw(i).decode("utf-8")
+
+
+def write_passages(documents, path: str, passage_words: int = 120, stride: int = 100, on_passage=None) -> tuple[int, int]:
+    """Cut documents into passages and write them as the passage store of an index directory.
+
+    Args:
+        documents (iterable[dict]): dicts with "text" and optionally "title" and "url", read once.
+        path (str): directory of the index, created if missing.
+        passage_words (int, optional): words per passage. Defaults to 120.
+        stride (int, optional): words between the starts of consecutive passages. Defaults to 100.
+        on_passage (callable, optional): called with (passage id, text) of every passage as it is written.
+
+    Returns:
+        tuple[int, int]: the number of documents and of passages.
+    """
+    os.makedirs(path, exist_ok=True)
+    passage_docs = array("I")
+    titles, urls = [], []
+
+    def passages():
+        for doc_id, document in enumerate(documents):
+            titles.append(document.get("title") or "")
+            urls.append(document.get("url") or "")
+            for passage in chunk_document(document.get("text") or "", passage_words, stride):
+                if on_passage is not None:
+                    on_passage(len(passage_docs), passage)
+                passage_docs.append(doc_id)
+                yield passage
+
+    num_passages = write_strings(os.path.join(path, "passages"), passages())
+    write_strings(os.path.join(path, "titles"), titles)
+    write_strings(os.path.join(path, "urls"), urls)
+    np.save(os.path.join(path, "passages.doc.npy"), np.frombuffer(passage_docs, dtype=np.uint32))
+    return len(titles), num_passages
+
+
+def load_array(path: str):
+    """Memory-map a .npy file, numpy refuses to map an empty array so that one is read."""
+    array_ = np.load(path, mmap_mode="r")
+    return array_ if array_.size else np.load(path)
+
+
+class PassageStore:
+    """Passages of an index directory with the title and url of their document, memory-mapped."""
+
+    def __init__(self, path: str):
+        self.texts = StringStore(os.path.join(path, "passages"))
+        self.docs = load_array(os.path.join(path, "passages.doc.npy"))
+        self.titles = StringStore(os.path.join(path, "titles"))
+        self.urls = StringStore(os.path.join(path, "urls"))
+
+    def __len__(self):
+        return len(self.texts)
+
+    def passage(self, pid: int) -> dict:
+        """Text, title and url of a passage."""
+        doc_id = int(self.docs[pid])
+        return {"text": self.texts[pid], "title": self.titles[doc_id], "url": self.urls[doc_id]}
+
+
+class BM25Index:
+    """Okapi BM25 over passages of a local document collection, stored in flat files and memory-mapped.
+
+    Layout of an index directory:
+        meta.json                       counts and BM25 parameters
+        terms.bin / .offsets.npy        the vocabulary, sorted by utf-8 bytes, looked up by binary search
+        postings.offsets.npy            start of the posting list of every term (int64)
+        postings.pid.npy / .tf.npy      passage ids (uint32) and term frequencies (uint16), by term
+        norms.npy                       k1 * (1 - b + b * length / average length) of every passage (float32)
+        passages.* / titles.* / urls.*  the passage store, see write_passages
+
+    Nothing is loaded into memory at open, the operating system pages in the parts a query touches.
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"BM25 index at {path} has version {self.meta.get('version')}, expected {INDEX_VERSION}.")
+        self.path = path
+        self.k1 = self.meta["k1"]
+        self.num_passages = self.meta["num_passages"]
+        self.terms = StringStore(os.path.join(path, "terms"))
+        self.posting_offsets = np.load(os.path.join(path, "postings.offsets.npy"), mmap_mode="r")
+        self.posting_pids = load_array(os.path.join(path, "postings.pid.npy"))
+        self.posting_tfs = load_array(os.path.join(path, "postings.tf.npy"))
+        self.norms = load_array(os.path.join(path, "norms.npy"))
+        self.passages = PassageStore(path)
+
+    @classmethod
+    def build(
+        cls,
+        documents,
+        path: str,
+        k1: float = 1.2,
+        b: float = 0.75,
+        passage_words: int = 120,
+        stride: int = 100,
+    ) -> "BM25Index":
+        """Index an iterable of documents, dicts with "text" and optionally "title" and "url".
+
+        The postings are collected in memory as compact arrays, about 6 bytes per distinct
+        term of every passage, and written once at the end.
+
+        Args:
+            documents (iterable[dict]): the collection, read once.
+            path (str): directory of the index, created if missing.
+            k1 (float, optional): BM25 term frequency saturation. Defaults to 1.2.
+            b (float, optional): BM25 length normalization. Defaults to 0.75.
+            passage_words (int, optional): words per passage. Defaults to 120.
+            stride (int, optional): words between the starts of consecutive passages. Defaults to 100.
+        """
+        postings = {}
+        lengths = array("I")
+
+        def add_postings(pid, passage):
+            tokens = tokenize(passage)
+            for term, tf in Counter(tokens).items():
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = (array("I"), array("H"))
+                entry[0].append(pid)
+                entry[1].append(min(tf, 0xFFFF))
+            lengths.append(len(tokens))
+
+        num_documents, num_passages = write_passages(documents, path, passage_words, stride, on_passage=add_postings)
+
+        terms = sorted(postings, key=lambda term: term.encode("utf-8"))
+        write_strings(os.path.join(path, "terms"), terms)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[term][0]) for term in terms])
+        np.save(os.path.join(path, "postings.offsets.npy"), offsets)
+        pids = np.concatenate([np.frombuffer(postings[t][0], dtype=np.uint32) for t in terms] or [np.zeros(0, np.uint32)])
+        tfs = np.concatenate([np.frombuffer(postings[t][1], dtype=np.uint16) for t in terms] or [np.zeros(0, np.uint16)])
+        np.save(os.path.join(path, "postings.pid.npy"), pids)
+        np.save(os.path.join(path, "postings.tf.npy"), tfs)
+
+        lengths = np.frombuffer(lengths, dtype=np.uint32).astype(np.float32)
+        avg_length = float(lengths.mean()) if num_passages else 0.0
+        norms = k1 * (1 - b + b * lengths / max(avg_length, 1e-9))
+        np.save(os.path.join(path, "norms.npy"), norms.astype(np.float32))
+
+        meta = {
+            "version": INDEX_VERSION,
+            "num_documents": num_documents,
+            "num_passages": num_passages,
+            "num_terms": len(terms),
+            "avg_length": avg_length,
+            "k1": k1,
+            "b": b,
+            "passage_words": passage_words,
+            "stride": stride,
+        }
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        logger.info(f"Built BM25 index at {path}: {num_documents} documents, {num_passages} passages, {len(terms)} terms.")
+        return cls(path)
+
+    def term_id(self, term: str):
+        """Position of a term in the sorted vocabulary, None if it is not indexed."""
+        key = term.encode("utf-8")
+        lo, hi = 0, len(self.terms)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.terms.raw(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self.terms) and self.terms.raw(lo) == key else None
+
+    def score_bound(self, query: str) -> float:
+        """Score of a passage of average length containing every query term once.
+
+        A score divided by it is the share of the query's information (idf) a passage matches,
+        comparable across queries. Terms missing from the index count as the rarest.
+        """
+        bound = 0.0
+        for term in set(tokenize(query)):
+            term_id = self.term_id(term)
+            df = 0 if term_id is None else int(self.posting_offsets[term_id + 1] - self.posting_offsets[term_id])
+            bound += math.log(1 + (self.num_passages - df + 0.5) / (df + 0.5))
+        return bound
+
+    def search(self, query: str, top_k: int = 10) -> list[tuple[int, float]]:
+        """Return the top_k (passage id, score) pairs for a query, best first."""
+        pid_parts, score_parts = [], []
+        for term in set(tokenize(query)):
+            term_id = self.term_id(term)
+            if term_id is None:
+                continue
+            start, end = int(self.posting_offsets[term_id]), int(self.posting_offsets[term_id + 1])
+            pids = self.posting_pids[start:end]
+            tfs = self.posting_tfs[start:end].astype(np.float32)
+            df = end - start
+            idf = math.log(1 + (self.num_passages - df + 0.5) / (df + 0.5))
+            pid_parts.append(pids)
+            score_parts.append(idf * tfs * (self.k1 + 1) / (tfs + self.norms[pids]))
+        if not pid_parts:
+            return []
+
+        # sum the contributions of the query terms per passage
+        pids, inverse = np.unique(np.concatenate(pid_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts))
+        if len(pids) > top_k:
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+            pids, scores = pids[top], scores[top]
+        order = np.lexsort((pids, -scores))
+        return [(int(pids[i]), float(scores[i])) for i in order]
+
+    def passage(self, pid: int) -> dict:
+        """Text, title and url of a passage."""
+        return self.passages.passage(pid)
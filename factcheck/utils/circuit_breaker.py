@@ -0,0 +1,195 @@
+import threading
+import time
+from collections import deque
+
+from factcheck.utils.logger import CustomLogger
+
+logger = CustomLogger(__name__).getlog()
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit of its upstream is open."""
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: float = 0.5,
+        min_calls: int = 5,
+        window: float = 60,
+        recovery_timeout: float = 30,
+        half_open_max_calls: int = 1,
+        clock=time.monotonic,
+    ):
+        """Initialize the CircuitBreaker class
+
+        Args:
+            name (str): the name of the guarded upstream (e.g., "gemini", "serper").
+            failure_threshold (float, optional): error rate in the window that opens the circuit. Defaults to 0.5.
+            min_calls (int, optional): minimum number of calls in the window before the error rate is considered. Defaults to 5.
+            window (float, optional): length of the rolling window in seconds. Defaults to 60.
+            recovery_timeout (float, optional): seconds the circuit stays open before probing again. Defaults to 30.
+            half_open_max_calls (int, optional): number of concurrent probes allowed when half open. Defaults to 1.
+            clock (callable, optional): monotonic time source, injectable for tests.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.window = window
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._outcomes = deque()  # (timestamp, success)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self.num_rejected = 0
+        self.num_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being rejected; a half-open circuit still counts as degraded."""
+        return self.state != self.CLOSED
+
+    def allow_request(self) -> bool:
+        """Check whether a call may go through, reserving a probe slot when half open."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+                self._probes_in_flight += 1
+                return True
+            self.num_rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                logger.info(f"Circuit '{self.name}' probe succeeded, closing circuit.")
+                self._state = self.CLOSED
+                self._probes_in_flight = 0
+                self._outcomes.clear()
+                return
+            self._record(True)
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                logger.warning(f"Circuit '{self.name}' probe failed, re-opening circuit.")
+                self._open()
+                return
+            self._record(False)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if (
+                self._state == self.CLOSED
+                and len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.failure_threshold
+            ):
+                logger.warning(f"Circuit '{self.name}' opened: {failures}/{len(self._outcomes)} calls failed in the last {self.window}s.")
+                self._open()
+
+    def release(self):
+        """Give back the probe slot of a call that ended without an outcome, e.g. a cancelled one."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes_in_flight > 0:
+                self._probes_in_flight -= 1
+
+    def call(self, func, *args, **kwargs):
+        """Run func through the breaker, raising CircuitOpenError instead of calling a degraded upstream."""
+        if not self.allow_request():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open, skipping call.")
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            # cancelled or interrupted: neither a success nor a failure of the upstream
+            self.release()
+            raise
+        self.record_success()
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._outcomes.clear()
+            self._probes_in_flight = 0
+
+    def snapshot(self) -> dict:
+        """Return the current state and counters, used by the health endpoints."""
+        with self._lock:
+            self._maybe_half_open()
+            self._expire()
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            return {
+                "state": self._state,
+                "calls_in_window": len(self._outcomes),
+                "failures_in_window": failures,
+                "rejected": self.num_rejected,
+                "times_opened": self.num_opened,
+            }
+
+    def _record(self, success: bool):
+        self._outcomes.append((self.clock(), success))
+        self._expire()
+
+    def _expire(self):
+        horizon = self.clock() - self.window
+        while self._outcomes and self._outcomes[0][0] < horizon:
+            self._outcomes.popleft()
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = self.clock()
+        self._probes_in_flight = 0
+        self._outcomes.clear()
+        self.num_opened += 1
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and self.clock() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._probes_in_flight = 0
+
+
+# Page crawling talks to many hosts, and individual pages fail all the time,
+# so the crawler circuit only trips on a sustained burst of transport errors.
+BREAKER_DEFAULTS = {
+    "gemini": dict(failure_threshold=0.5, min_calls=5, recovery_timeout=30),
+    "serper": dict(failure_threshold=0.5, min_calls=3, recovery_timeout=30),
+    "gcs": dict(failure_threshold=0.5, min_calls=3, recovery_timeout=60),
+    "crawl": dict(failure_threshold=0.9, min_calls=30, window=30, recovery_timeout=15),
+}
+
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """Get the process-wide circuit breaker of an upstream, creating it on first use."""
+    with _registry_lock:
+        if name not in _breakers:
+            options = {**BREAKER_DEFAULTS.get(name, {}), **kwargs}
+            _breakers[name] = CircuitBreaker(name, **options)
+        return _breakers[name]
+
+
+def breaker_states() -> dict[str, dict]:
+    """Snapshot of every registered circuit breaker, keyed by upstream name."""
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
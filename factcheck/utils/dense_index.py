@@ -0,0 +1,238 @@
+import json
+import math
+import os
+
+import numpy as np
+
+from factcheck.utils.bm25_index import PassageStore, load_array, write_passages
+from factcheck.utils.logger import CustomLogger
+
+logger = CustomLogger(__name__).getlog()
+
+INDEX_VERSION = 1
+# the small bi-encoder of the sentence-transformers package BaseRetriever already depends on
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# rows scored per matrix product, float16 rows are widened to float32 a block at a time
+_BLOCK_ROWS = 1 << 15
+
+
+def sentence_transformer_encoder(model_name: str = DEFAULT_MODEL, device: str = None, batch_size: int = 64):
+    """Return encode(texts) -> float32 array of unit vectors, backed by a sentence-transformers model."""
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device=device)
+
+    def encode(texts: list[str]) -> np.ndarray:
+        return model.encode(
+            texts, batch_size=batch_size, normalize_embeddings=True, convert_to_numpy=True, show_progress_bar=False
+        ).astype(np.float32)
+
+    return encode
+
+
+def auto_nlist(num_passages: int) -> int:
+    """Number of IVF lists for a corpus: none below 100k passages, about sqrt(n) above."""
+    return 0 if num_passages < 100_000 else int(math.sqrt(num_passages))
+
+
+def _argmax_rows(vectors, centroids: np.ndarray) -> np.ndarray:
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), _BLOCK_ROWS):
+        block = np.asarray(vectors[start : start + _BLOCK_ROWS], dtype=np.float32)
+        labels[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def train_centroids(sample: np.ndarray, nlist: int, num_iters: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means: nlist unit centroids maximizing the inner product with the sample rows."""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(num_iters):
+        labels = _argmax_rows(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=nlist)
+        # an empty list restarts from a random sample row
+        empty = counts == 0
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+    return centroids.astype(np.float32)
+
+
+class DenseIndex:
+    """Passage embeddings in a memory-mapped float16 matrix, searched by inner product.
+
+    Vectors are unit length, so the inner product is the cosine similarity. A flat index scores
+    every row, a block at a time. With nlist > 0 the rows are partitioned by a k-means coarse
+    quantizer (IVF): they are stored grouped by list, and a query only scores the nprobe lists
+    whose centroids are closest to it, each a contiguous slice of the matrix.
+
+    Layout of an index directory:
+        meta.json                       model, dimension, counts
+        embeddings.npy                  float16 (num_passages, dim), in list order with IVF
+        ivf.centroids.npy               float32 (nlist, dim), IVF only
+        ivf.offsets.npy                 start row of every list (int64), IVF only
+        ivf.ids.npy                     passage id of every row (uint32), IVF only
+        passages.* / titles.* / urls.*  the passage store, see bm25_index.write_passages
+    """
+
+    def __init__(self, path: str, nprobe: int = 16):
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"Dense index at {path} has version {self.meta.get('version')}, expected {INDEX_VERSION}.")
+        self.path = path
+        self.nprobe = nprobe
+        self.num_passages = self.meta["num_passages"]
+        self.embeddings = load_array(os.path.join(path, "embeddings.npy"))
+        self.passages = PassageStore(path)
+        self.nlist = self.meta["nlist"]
+        if self.nlist:
+            self.centroids = np.load(os.path.join(path, "ivf.centroids.npy"))
+            self.list_offsets = np.load(os.path.join(path, "ivf.offsets.npy"))
+            self.row_ids = load_array(os.path.join(path, "ivf.ids.npy"))
+
+    @classmethod
+    def build(
+        cls,
+        documents,
+        path: str,
+        encode=None,
+        model_name: str = DEFAULT_MODEL,
+        nlist: int = None,
+        batch_size: int = 256,
+        passage_words: int = 120,
+        stride: int = 100,
+    ) -> "DenseIndex":
+        """Embed the passages of an iterable of documents and write the index.
+
+        Args:
+            documents (iterable[dict]): dicts with "text" and optionally "title" and "url", read once.
+            path (str): directory of the index, created if missing.
+            encode (callable, optional): texts -> unit vectors, defaults to the model_name sentence-transformers model.
+            model_name (str, optional): model recorded in the index, queries must be embedded with it.
+            nlist (int, optional): number of IVF lists, 0 for a flat index. Defaults to auto_nlist.
+            batch_size (int, optional): passages embedded per call of encode. Defaults to 256.
+            passage_words (int, optional): words per passage. Defaults to 120.
+            stride (int, optional): words between the starts of consecutive passages. Defaults to 100.
+        """
+        encode = encode or sentence_transformer_encoder(model_name)
+        num_documents, num_passages = write_passages(documents, path, passage_words, stride)
+        texts = PassageStore(path).texts
+        batches = (
+            encode([texts[i] for i in range(start, min(start + batch_size, num_passages))])
+            for start in range(0, num_passages, batch_size)
+        )
+        cls.write_embeddings(path, batches, num_passages, model_name, nlist=nlist, num_documents=num_documents)
+        return cls(path)
+
+    @staticmethod
+    def write_embeddings(
+        path: str, batches, num_passages: int, model_name: str, nlist: int = None, num_documents: int = None
+    ):
+        """Write the embedding matrix of the passage store at path, and its IVF partition.
+
+        Args:
+            path (str): index directory holding the passage store.
+            batches (iterable[np.ndarray]): unit vectors of the passages, in passage order.
+            num_passages (int): number of passages, the matrix is allocated up front.
+            model_name (str): model the vectors come from.
+            nlist (int, optional): number of IVF lists, 0 for a flat index. Defaults to auto_nlist.
+            num_documents (int, optional): recorded in meta.json.
+        """
+        nlist = auto_nlist(num_passages) if nlist is None else min(nlist, num_passages)
+        matrix_path = os.path.join(path, "embeddings.npy")
+        matrix, row = None, 0
+        for batch in batches:
+            if matrix is None:
+                matrix = np.lib.format.open_memmap(matrix_path, mode="w+", dtype=np.float16, shape=(num_passages, batch.shape[1]))
+            matrix[row : row + len(batch)] = batch
+            row += len(batch)
+        if matrix is None:
+            np.save(matrix_path, np.zeros((0, 0), dtype=np.float16))
+            nlist = 0
+        dim = int(matrix.shape[1]) if matrix is not None else 0
+
+        if nlist:
+            # train on a sample, assign every row, then rewrite the matrix grouped by list
+            rng = np.random.default_rng(0)
+            sample_rows = np.sort(rng.choice(num_passages, min(num_passages, 64 * nlist), replace=False))
+            centroids = train_centroids(np.asarray(matrix[sample_rows], dtype=np.float32), nlist)
+            labels = _argmax_rows(matrix, centroids)
+            order = np.argsort(labels, kind="stable")
+            offsets = np.zeros(nlist + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum(np.bincount(labels, minlength=nlist))
+            grouped_path = os.path.join(path, "embeddings.ivf.tmp.npy")
+            grouped = np.lib.format.open_memmap(grouped_path, mode="w+", dtype=np.float16, shape=matrix.shape)
+            for start in range(0, num_passages, _BLOCK_ROWS):
+                grouped[start : start + _BLOCK_ROWS] = matrix[order[start : start + _BLOCK_ROWS]]
+            grouped.flush()
+            del grouped, matrix
+            os.replace(grouped_path, matrix_path)
+            np.save(os.path.join(path, "ivf.centroids.npy"), centroids)
+            np.save(os.path.join(path, "ivf.offsets.npy"), offsets)
+            np.save(os.path.join(path, "ivf.ids.npy"), order.astype(np.uint32))
+        elif matrix is not None:
+            matrix.flush()
+            del matrix
+
+        meta = {
+            "version": INDEX_VERSION,
+            "model": model_name,
+            "dim": dim,
+            "num_documents": num_documents,
+            "num_passages": num_passages,
+            "nlist": nlist,
+        }
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        logger.info(f"Built dense index at {path}: {num_passages} passages of {dim} dimensions, {nlist} IVF lists.")
+
+    def search(self, query_vectors: np.ndarray, top_k: int = 10, nprobe: int = None) -> list[list[tuple[int, float]]]:
+        """Return the top_k (passage id, score) pairs of every query vector, best first."""
+        query_vectors = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        if not self.num_passages:
+            return [[] for _ in query_vectors]
+        if self.nlist:
+            return [self._search_ivf(query, top_k, nprobe or self.nprobe) for query in query_vectors]
+        return self._search_flat(query_vectors, top_k)
+
+    def _search_flat(self, query_vectors: np.ndarray, top_k: int) -> list[list[tuple[int, float]]]:
+        # a running top_k per query, merged with the best rows of every block
+        best_ids = np.zeros((len(query_vectors), 0), dtype=np.int64)
+        best_scores = np.zeros((len(query_vectors), 0), dtype=np.float32)
+        for start in range(0, self.num_passages, _BLOCK_ROWS):
+            block = np.asarray(self.embeddings[start : start + _BLOCK_ROWS], dtype=np.float32)
+            scores = query_vectors @ block.T
+            ids = np.broadcast_to(np.arange(start, start + len(block)), scores.shape)
+            best_ids, best_scores = _top_k(np.hstack([best_ids, ids]), np.hstack([best_scores, scores]), top_k)
+        return [_ranked(ids, scores) for ids, scores in zip(best_ids, best_scores)]
+
+    def _search_ivf(self, query: np.ndarray, top_k: int, nprobe: int) -> list[tuple[int, float]]:
+        nprobe = min(nprobe, self.nlist)
+        lists = np.sort(np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe])
+        # every list is a contiguous slice of the matrix, read without any index array
+        spans = [(int(self.list_offsets[i]), int(self.list_offsets[i + 1])) for i in lists]
+        spans = [(start, end) for start, end in spans if end > start]
+        if not spans:
+            return []
+        vectors = np.concatenate([self.embeddings[start:end] for start, end in spans]).astype(np.float32)
+        ids = np.concatenate([self.row_ids[start:end] for start, end in spans]).astype(np.int64)
+        ids, scores = _top_k(ids[None, :], (vectors @ query)[None, :], top_k)
+        return _ranked(ids[0], scores[0])
+
+    def passage(self, pid: int) -> dict:
+        """Text, title and url of a passage."""
+        return self.passages.passage(pid)
+
+
+def _top_k(ids: np.ndarray, scores: np.ndarray, k: int):
+    if scores.shape[1] <= k:
+        return ids, scores
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(ids, top, axis=1), np.take_along_axis(scores, top, axis=1)
+
+
+def _ranked(ids: np.ndarray, scores: np.ndarray) -> list[tuple[int, float]]:
+    order = np.lexsort((ids, -scores))
+    return [(int(ids[i]), float(scores[i])) for i in order]
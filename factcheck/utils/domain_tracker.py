@@ -0,0 +1,201 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # not on Windows, saves are then only atomic, not merged under a lock
+    fcntl = None
+
+from factcheck.utils.logger import CustomLogger
+
+logger = CustomLogger(__name__).getlog()
+
+# entry layout, a list per domain keeps the table compact
+_LATENCY, _DEVIATION, _FAILURES, _SKIP_UNTIL = range(4)
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Hold an exclusive lock on path + ".lock", shared by the processes saving to path."""
+    with open(f"{path}.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+class DomainTracker:
+    """Latency and failure history per domain, used to size crawl timeouts and skip dead domains.
+
+    Latency is tracked as an exponentially weighted mean and mean deviation (as TCP does for
+    its retransmission timeout), so the timeout of a domain is mean + 4 * deviation, clamped
+    to [min_timeout, max_timeout]. A domain failing failure_threshold times in a row is skipped
+    for a cooldown that doubles with every further failure. Only the max_domains most recently
+    used domains are kept.
+
+    Several processes (the gunicorn workers) may save to the same file: a save merges the
+    table into the file, the domains updated since the last save replacing the stored ones.
+    """
+
+    def __init__(
+        self,
+        default_timeout: float = 3,
+        min_timeout: float = 1,
+        max_timeout: float = 6,
+        failure_threshold: int = 3,
+        cooldown: float = 300,
+        max_cooldown: float = 3600,
+        alpha: float = 0.2,
+        max_domains: int = 2048,
+        path: str = None,
+        save_every: int = 100,
+        clock=time.time,
+    ):
+        """Initialize the DomainTracker class
+
+        Args:
+            default_timeout (float, optional): timeout of a domain without history. Defaults to 3.
+            min_timeout (float, optional): lower bound of the timeout. Defaults to 1.
+            max_timeout (float, optional): upper bound of the timeout. Defaults to 6.
+            failure_threshold (int, optional): consecutive failures before a domain is skipped. Defaults to 3.
+            cooldown (float, optional): seconds a failing domain is skipped. Defaults to 300.
+            max_cooldown (float, optional): upper bound of the doubled cooldown. Defaults to 3600.
+            alpha (float, optional): weight of a new latency sample. Defaults to 0.2.
+            max_domains (int, optional): number of domains kept, least recently used are dropped. Defaults to 2048.
+            path (str, optional): json file the table is loaded from and saved to. Defaults to None.
+            save_every (int, optional): save the table after this many updates. Defaults to 100.
+            clock (callable, optional): wall clock, used by tests. Defaults to time.time.
+        """
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.alpha = alpha
+        self.max_domains = max_domains
+        self.path = path
+        self.save_every = save_every
+        self.clock = clock
+        self.num_skipped = 0
+        self._domains = OrderedDict()
+        self._lock = threading.Lock()
+        self._num_updates = 0
+        self._dirty = set()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def timeout(self, domain: str) -> float:
+        with self._lock:
+            entry = self._domains.get(domain)
+            if entry is None or entry[_LATENCY] is None:
+                return self.default_timeout
+            timeout = entry[_LATENCY] + 4 * entry[_DEVIATION]
+        return min(self.max_timeout, max(self.min_timeout, timeout))
+
+    def should_skip(self, domain: str) -> bool:
+        with self._lock:
+            entry = self._domains.get(domain)
+            skip = entry is not None and entry[_SKIP_UNTIL] > self.clock()
+            if skip:
+                self.num_skipped += 1
+        return skip
+
+    def record_success(self, domain: str, latency: float):
+        with self._lock:
+            entry = self._entry(domain)
+            if entry[_LATENCY] is None:
+                entry[_LATENCY], entry[_DEVIATION] = latency, latency / 2
+            else:
+                entry[_DEVIATION] += self.alpha * (abs(latency - entry[_LATENCY]) - entry[_DEVIATION])
+                entry[_LATENCY] += self.alpha * (latency - entry[_LATENCY])
+            entry[_FAILURES] = 0
+            entry[_SKIP_UNTIL] = 0.0
+        self._updated()
+
+    def record_failure(self, domain: str):
+        with self._lock:
+            entry = self._entry(domain)
+            entry[_FAILURES] += 1
+            if entry[_FAILURES] >= self.failure_threshold:
+                cooldown = self.cooldown * 2 ** (entry[_FAILURES] - self.failure_threshold)
+                entry[_SKIP_UNTIL] = self.clock() + min(cooldown, self.max_cooldown)
+                logger.info(f"Skipping domain {domain} for {min(cooldown, self.max_cooldown):.0f}s after {entry[_FAILURES]} failures.")
+        self._updated()
+
+    def _entry(self, domain: str) -> list:
+        self._dirty.add(domain)
+        entry = self._domains.get(domain)
+        if entry is None:
+            entry = self._domains[domain] = [None, 0.0, 0, 0.0]
+            if len(self._domains) > self.max_domains:
+                self._domains.popitem(last=False)
+        else:
+            self._domains.move_to_end(domain)
+        return entry
+
+    def _updated(self):
+        self._num_updates += 1
+        if self.path and self._num_updates % self.save_every == 0:
+            self.save()
+
+    def save(self, path: str = None):
+        """Merge the table into a json file, written atomically.
+
+        The domains updated since the last save replace those in the file, the others are
+        taken from the file, so the updates of other processes are kept and picked up.
+        """
+        path = path or self.path
+        dirty = set()
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with _file_lock(path):
+                stored = self._read(path) if os.path.exists(path) else {}
+                with self._lock:
+                    dirty, self._dirty = self._dirty, set()
+                    merged = OrderedDict((domain, list(entry)) for domain, entry in (stored or {}).items())
+                    for domain, entry in self._domains.items():
+                        if domain in dirty or domain not in merged:
+                            merged[domain] = entry
+                            merged.move_to_end(domain)
+                    while len(merged) > self.max_domains:
+                        merged.popitem(last=False)
+                    self._domains = merged
+                    data = json.dumps(merged)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w") as file:
+                    file.write(data)
+                os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to save domain stats to {path}: {e}")
+            # saved again next time
+            with self._lock:
+                self._dirty |= dirty
+
+    def load(self, path: str):
+        data = self._read(path)
+        if data is None:
+            return
+        with self._lock:
+            for domain, entry in list(data.items())[-self.max_domains :]:
+                self._domains[domain] = list(entry)
+
+    def _read(self, path: str):
+        try:
+            with open(path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load domain stats from {path}: {e}")
+            return None
+
+    def __len__(self):
+        return len(self._domains)
+
+    def snapshot(self) -> dict:
+        now = self.clock()
+        with self._lock:
+            cooling_down = sum(1 for entry in self._domains.values() if entry[_SKIP_UNTIL] > now)
+        return {"domains": len(self._domains), "cooling_down": cooling_down, "skipped": self.num_skipped}
@@ -0,0 +1,201 @@
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from factcheck.utils.bm25_index import chunk_document, tokenize
+from factcheck.utils.logger import CustomLogger
+
+logger = CustomLogger(__name__).getlog()
+
+# pages are stored as their main content: full text search hits on navigation and footers are no evidence
+STORE_EXTRACTOR = "main_content"
+
+
+class EvidenceStore:
+    """Persistent store of the passages of every fetched page, searchable with BM25.
+
+    Pages are cut into passages (see chunk_document) and kept in a sqlite file with their url,
+    fetch time and the query that found them, under an FTS5 full text index. A passage seen
+    again on a later fetch is stored once and its fetch time refreshed.
+
+    Passages older than max_age are no longer returned and are removed on eviction, stale
+    evidence is worse than none. Above max_entries the least recently used passages (fetched
+    or returned by a search) are evicted first.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_age: float = 30 * 24 * 3600,
+        max_entries: int = 200000,
+        passage_words: int = 120,
+        stride: int = 100,
+        clock=time.time,
+    ):
+        """Initialize the EvidenceStore class
+
+        Args:
+            path (str): path of the sqlite file, created if missing.
+            max_age (float, optional): seconds a passage is kept after its last fetch. Defaults to 30 days.
+            max_entries (int, optional): the least recently used passages are evicted above this size. Defaults to 200000.
+            passage_words (int, optional): words per passage. Defaults to 120.
+            stride (int, optional): words between the starts of two passages of a page. Defaults to 100.
+            clock (callable, optional): wall clock, used by tests. Defaults to time.time.
+        """
+        self.path = path
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.passage_words = passage_words
+        self.stride = stride
+        self.clock = clock
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._num_puts = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS passages ("
+                "id INTEGER PRIMARY KEY, digest BLOB NOT NULL UNIQUE, text TEXT NOT NULL, url TEXT NOT NULL, "
+                "query TEXT, fetched REAL NOT NULL, used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS passages_fetched ON passages (fetched)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS passages_used ON passages (used)")
+            # the full text index reads the text from the passages table instead of keeping a copy,
+            # diacritics are kept so its terms are the ones tokenize() produces for score_bound
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5("
+                "text, content='passages', content_rowid='id', tokenize='unicode61 remove_diacritics 0')"
+            )
+            self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS passages_vocab USING fts5vocab(passages_fts, 'row')")
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS passages_insert AFTER INSERT ON passages BEGIN "
+                "INSERT INTO passages_fts (rowid, text) VALUES (new.id, new.text); END"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS passages_delete AFTER DELETE ON passages BEGIN "
+                "INSERT INTO passages_fts (passages_fts, rowid, text) VALUES ('delete', old.id, old.text); END"
+            )
+            self._conn.commit()
+
+    def add_page(self, url: str, text: str, query: str = None) -> int:
+        """Store the passages of a page's cleaned text, return the number of new passages.
+
+        Args:
+            url (str): the url the page was fetched from.
+            text (str): the cleaned text of the page.
+            query (str, optional): the search query that found the page. Defaults to None.
+        """
+        passages = chunk_document(text or "", self.passage_words, self.stride)
+        if not passages:
+            return 0
+        now = self.clock()
+        rows = [(hashlib.blake2b(p.encode("utf-8"), digest_size=16).digest(), p, url, query, now, now) for p in passages]
+        try:
+            with self._lock:
+                placeholders = ", ".join("?" * len(rows))
+                known = {
+                    digest
+                    for (digest,) in self._conn.execute(
+                        f"SELECT digest FROM passages WHERE digest IN ({placeholders})", [row[0] for row in rows]
+                    )
+                }
+                # a passage fetched again keeps its row and its first query, only its times move
+                self._conn.executemany(
+                    "UPDATE passages SET fetched = ?, used = ? WHERE digest = ?", [(now, now, d) for d in known]
+                )
+                new_rows = list({row[0]: row for row in rows if row[0] not in known}.values())
+                self._conn.executemany(
+                    "INSERT INTO passages (digest, text, url, query, fetched, used) VALUES (?, ?, ?, ?, ?, ?)", new_rows
+                )
+                self._conn.commit()
+                self._num_puts += 1
+                if self._num_puts % 100 == 0:
+                    self._evict(now)
+        except sqlite3.Error as e:
+            logger.warning(f"Evidence store write failed: {e}")
+            self.stats["errors"] += 1
+            return 0
+        self.stats["pages"] += 1
+        self.stats["passages"] += len(new_rows)
+        self.stats["refreshed"] += len(known)
+        return len(new_rows)
+
+    def search(self, query: str, top_k: int = 3) -> list[tuple[int, float]]:
+        """Return the top_k (passage id, confidence) of a query, best first.
+
+        The confidence is the BM25 score of the passage over the most a passage could score, one
+        occurrence of every query term (see BM25Index.score_bound), capped at 1.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        match = " OR ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        now = self.clock()
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT passages.id, -bm25(passages_fts) AS score FROM passages_fts "
+                    "JOIN passages ON passages.id = passages_fts.rowid "
+                    "WHERE passages_fts MATCH ? AND passages.fetched > ? ORDER BY score DESC LIMIT ?",
+                    (match, now - self.max_age, top_k),
+                ).fetchall()
+                bound = self._score_bound(terms)
+                if rows:
+                    self._conn.executemany("UPDATE passages SET used = ? WHERE id = ?", [(now, pid) for pid, _ in rows])
+                    self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Evidence store search failed: {e}")
+            self.stats["errors"] += 1
+            return []
+        self.stats["hits" if rows else "misses"] += 1
+        return [(pid, min(1.0, score / bound)) for pid, score in rows]
+
+    def _score_bound(self, terms: list[str]) -> float:
+        # the idf of FTS5's bm25(): a term scores its idf in a passage of average length holding it once
+        num_passages = self._conn.execute("SELECT COUNT(*) FROM passages").fetchone()[0]
+        placeholders = ", ".join("?" * len(terms))
+        df = dict(self._conn.execute(f"SELECT term, doc FROM passages_vocab WHERE term IN ({placeholders})", terms))
+        bound = 0.0
+        for term in terms:
+            n = df.get(term, 0)
+            bound += max(1e-6, math.log((num_passages - n + 0.5) / (n + 0.5)))
+        return bound
+
+    def passage(self, pid: int) -> dict:
+        """Return the text, url, fetch time and query of a passage, None if it was evicted."""
+        with self._lock:
+            row = self._conn.execute("SELECT text, url, fetched, query FROM passages WHERE id = ?", (pid,)).fetchone()
+        if row is None:
+            return None
+        return {"text": row[0], "url": row[1], "fetched": row[2], "query": row[3]}
+
+    def purge(self):
+        """Remove passages older than max_age and evict the least recently used ones above max_entries."""
+        with self._lock:
+            self._evict(self.clock())
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM passages WHERE fetched <= ?", (now - self.max_age,))
+        self._conn.execute(
+            "DELETE FROM passages WHERE id IN (SELECT id FROM passages ORDER BY used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM passages").fetchone()[0]
+
+    def snapshot(self) -> dict:
+        return {"entries": len(self), **self.stats}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,328 @@
+import re
+import threading
+from html.parser import HTMLParser
+
+import bs4
+
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:  # lxml is optional, the streaming extractor needs nothing but the stdlib
+    lxml = None
+
+# text directly inside these tags is not shown on the page
+INVISIBLE_PARENTS = frozenset(["style", "script", "head", "title", "meta", "[document]"])
+# tags starting a new block of text, for main-content extraction
+BLOCK_TAGS = frozenset(
+    ["address", "article", "blockquote", "body", "br", "caption", "dd", "div", "dl", "dt", "figcaption", "figure",
+     "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p", "pre",
+     "section", "table", "td", "th", "tr", "ul"]
+)
+HEADING_TAGS = frozenset(["h1", "h2", "h3", "h4", "h5", "h6"])
+# containers and class/id names that hold navigation, ads and other page furniture
+BOILERPLATE_TAGS = frozenset(["nav", "header", "footer", "aside", "form", "button", "select", "template", "svg", "noscript"])
+BOILERPLATE_NAMES = re.compile(
+    r"nav|menu|footer|cookie|consent|banner|sidebar|related|share|social|comment|advert|\bads?\b|ad-slot|promo|"
+    r"breadcrumb|subscribe|newsletter|popup|modal|most-read|skip|jump-link|editsection|toc",
+    re.IGNORECASE,
+)
+# a word is a run of non-space characters, or a single CJK character since those scripts do not use spaces
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_WORDS = re.compile(f"[{_CJK}]|[^\\s{_CJK}]+")
+# end tags browsers imply when another element starts, enough to recover the usual sloppy markup
+_IMPLIED_END = {
+    "li": ("li", ("ul", "ol")),
+    "dt": ("dt dd", ("dl",)),
+    "dd": ("dt dd", ("dl",)),
+    "tr": ("tr td th", ("table", "tbody", "thead", "tfoot")),
+    "td": ("td th", ("tr", "table")),
+    "th": ("td th", ("tr", "table")),
+    "p": ("p", ()),
+}
+# tags without content or end tag, as handled by html.parser based tree builders
+VOID_TAGS = frozenset(
+    ["area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"]
+)
+
+
+def normalize_text(strings) -> str:
+    """Join text pieces with single spaces, as the crawler always did."""
+    return " ".join(" ".join(t.strip() for t in strings).split())
+
+
+class BaseExtractor:
+    """Turns an HTML document into its visible text."""
+
+    name = "base"
+    # False for extractors that keep only part of the visible text
+    full_text = True
+
+    def extract(self, html: str) -> str:
+        """Return the visible text of the page: every text node not directly inside
+        style, script, head, title or meta and not a comment, joined by single spaces."""
+        raise NotImplementedError
+
+
+class Bs4Extractor(BaseExtractor):
+    """Reference implementation, builds a full BeautifulSoup tree with html.parser."""
+
+    name = "bs4"
+
+    def extract(self, html: str) -> str:
+        soup = bs4.BeautifulSoup(html, "html.parser")
+        texts = soup.findAll(text=True)
+        return normalize_text(t for t in texts if _is_visible_string(t))
+
+
+class StreamExtractor(BaseExtractor):
+    """Single pass over the html.parser token stream with a stack of open tags, no tree is built.
+
+    Follows the nesting rules of the bs4 html.parser tree builder: void tags are not opened
+    and an end tag closes the innermost open tag of that name, ignoring stray end tags.
+    """
+
+    name = "stream"
+
+    def extract(self, html: str) -> str:
+        parser = _VisibleTextParser()
+        parser.feed(html)
+        parser.close()
+        return normalize_text(parser.texts)
+
+
+class LxmlExtractor(BaseExtractor):
+    """libxml2 parser, the fastest backend. Its error recovery differs from html.parser on
+    broken markup: text after </html> is dropped and stray text outside any tag is wrapped in
+    the body and becomes visible, so it is opt-in."""
+
+    name = "lxml"
+
+    def __init__(self):
+        if lxml is None:
+            raise ImportError("lxml is not installed, use the 'stream' or 'bs4' extractor.")
+        # a parser must not be shared between threads
+        self._local = threading.local()
+
+    def extract(self, html: str) -> str:
+        parser = getattr(self._local, "parser", None)
+        if parser is None:
+            # parse bytes: lxml refuses str input that carries an encoding declaration
+            parser = self._local.parser = lxml.html.HTMLParser(encoding="utf-8")
+        try:
+            root = lxml.html.document_fromstring(html.encode("utf-8", errors="replace"), parser=parser)
+        except (lxml.etree.ParserError, ValueError):
+            return ""
+
+        texts = []
+        # iterative walk in document order: an element's text, its children, then its tail
+        stack = [(root, False)]
+        while stack:
+            element, closing = stack.pop()
+            if closing:
+                parent = element.getparent()
+                if element.tail and parent is not None and _lxml_visible(parent):
+                    texts.append(element.tail)
+                continue
+            stack.append((element, True))
+            if not isinstance(element.tag, str):
+                # comments and processing instructions, only their tail is text
+                continue
+            if element.text and _lxml_visible(element):
+                texts.append(element.text)
+            stack.extend((child, False) for child in reversed(element))
+        return normalize_text(texts)
+
+
+class MainContentExtractor(BaseExtractor):
+    """Keeps the article body only, dropping navigation, footers, banners and link lists.
+
+    The page is cut into blocks at block-level tags. Text inside boilerplate containers (nav,
+    header, footer, aside, form, or a class/id such as "menu", "cookie", "related") is dropped.
+    Blocks with at least min_words words and a link density (words inside <a> / all words)
+    up to max_link_density are content. The main content runs from the first to the last
+    content block, widened to the h1 title before it and a few short lines after it, and
+    keeps the short blocks in between (table cells, list items, headings) unless they are
+    mostly links. Pages without any content block fall back to the full visible text.
+    """
+
+    name = "main_content"
+    full_text = False
+
+    def __init__(self, min_words: int = 10, max_link_density: float = 0.33, max_title_distance: int = 15):
+        self.min_words = min_words
+        self.max_link_density = max_link_density
+        self.max_title_distance = max_title_distance
+
+    def extract(self, html: str) -> str:
+        parser = _BlockParser()
+        parser.feed(html)
+        parser.close()
+        blocks = parser.blocks
+
+        content = [
+            i
+            for i, block in enumerate(blocks)
+            if block.words >= self.min_words and block.link_words <= self.max_link_density * block.words
+        ]
+        if not content:
+            return get_extractor("stream").extract(html)
+
+        start, end = content[0], content[-1]
+        # the title is often separated from the body by a byline, an infobox or a lead image
+        for i in range(start - 1, max(-1, start - 1 - self.max_title_distance), -1):
+            if blocks[i].tag == "h1":
+                start = i
+                break
+        # closing short lines (last list items, a source line) follow the last long block
+        while end + 1 < len(blocks) and end - content[-1] < 3 and blocks[end + 1].words < self.min_words:
+            if blocks[end + 1].link_words:
+                break
+            end += 1
+        kept = [
+            block.text
+            for block in blocks[start : end + 1]
+            if block.link_words <= self.max_link_density * block.words or block.tag in HEADING_TAGS
+        ]
+        return normalize_text(kept)
+
+
+class _Block:
+    __slots__ = ("tag", "texts", "words", "link_words")
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.texts = []
+        self.words = 0
+        self.link_words = 0
+
+    @property
+    def text(self):
+        return " ".join(self.texts)
+
+
+class _BlockParser(HTMLParser):
+    """Splits the visible text into blocks, skipping boilerplate containers."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        # (tag, inside boilerplate) of every open tag
+        self.stack = []
+        self.blocks = []
+        self.block = _Block("[document]")
+
+    def _flush(self, tag):
+        if self.block.words:
+            self.blocks.append(self.block)
+        self.block = _Block(tag)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._flush(tag)
+        if tag in VOID_TAGS:
+            return
+        self._close_implied(tag)
+        boilerplate = bool(self.stack and self.stack[-1][1]) or tag in BOILERPLATE_TAGS
+        if not boilerplate:
+            names = " ".join(value for key, value in attrs if key in ("class", "id") and value)
+            boilerplate = bool(names) and BOILERPLATE_NAMES.search(names) is not None
+        self.stack.append((tag, boilerplate))
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._flush(tag)
+
+    def _close_implied(self, tag):
+        # a new row closes the open cell and row, a new list item the open item, a block the open paragraph
+        closes, scope = _IMPLIED_END.get(tag, ("p", ()) if tag in BLOCK_TAGS else ("", ()))
+        closes = closes.split()
+        for i in range(len(self.stack) - 1, -1, -1):
+            name = self.stack[i][0]
+            if name in closes:
+                del self.stack[i:]
+                return
+            if name in scope or (not scope and name in BLOCK_TAGS):
+                return
+
+    def handle_endtag(self, tag):
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i][0] == tag:
+                del self.stack[i:]
+                break
+        if tag in BLOCK_TAGS:
+            self._flush(self.stack[-1][0] if self.stack else "[document]")
+
+    def handle_data(self, data):
+        parent, boilerplate = self.stack[-1] if self.stack else ("[document]", False)
+        if boilerplate or parent in INVISIBLE_PARENTS:
+            return
+        words = len(_WORDS.findall(data))
+        if not words:
+            return
+        self.block.texts.append(data)
+        self.block.words += words
+        if any(tag == "a" for tag, _ in self.stack):
+            self.block.link_words += words
+
+    def close(self):
+        super().close()
+        self._flush("[document]")
+
+
+class _VisibleTextParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []
+        self.texts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in VOID_TAGS:
+            self.stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        pass
+
+    def handle_endtag(self, tag):
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i] == tag:
+                del self.stack[i:]
+                return
+
+    def handle_data(self, data):
+        parent = self.stack[-1] if self.stack else "[document]"
+        if parent not in INVISIBLE_PARENTS:
+            self.texts.append(data)
+
+
+def _is_visible_string(element) -> bool:
+    if isinstance(element, bs4.element.Comment):
+        return False
+    return element.parent.name not in INVISIBLE_PARENTS
+
+
+def _lxml_visible(element) -> bool:
+    return isinstance(element.tag, str) and element.tag.lower() not in INVISIBLE_PARENTS
+
+
+EXTRACTORS = {
+    "bs4": Bs4Extractor,
+    "stream": StreamExtractor,
+    "lxml": LxmlExtractor,
+    "main_content": MainContentExtractor,
+}
+# the streaming extractor reproduces the bs4 output exactly, lxml trades that for speed
+DEFAULT_EXTRACTOR = "stream"
+_instances = {}
+
+
+def get_extractor(name: str = None) -> BaseExtractor:
+    """Return the extractor registered under name, DEFAULT_EXTRACTOR by default."""
+    name = name or DEFAULT_EXTRACTOR
+    if name not in _instances:
+        if name not in EXTRACTORS:
+            raise NotImplementedError(f"HTML extractor {name} not implemented.")
+        _instances[name] = EXTRACTORS[name]()
+    return _instances[name]
+
+
+def extract_visible_text(html: str, extractor: str = None) -> str:
+    return get_extractor(extractor).extract(html)
@@ -1,13 +1,37 @@
 import time
 import asyncio
+import threading
 from abc import abstractmethod
 from functools import partial
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 from ..data_class import TokenUsage
+from ..circuit_breaker import CircuitOpenError, get_breaker
+from ..logger import CustomLogger
+
+logger = CustomLogger(__name__).getlog()
+
+# API calls run on threads of one pool per upstream, shared by all clients of the process: a
+# cancelled call keeps its thread until the request ends
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _call_executor(upstream: str) -> ThreadPoolExecutor:
+    name = upstream or "llm"
+    with _executors_lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(thread_name_prefix=f"{name}-call")
+        return _executors[name]
 
 
 class BaseClient:
+    # name of the circuit breaker guarding the upstream API of this client, set by every client with its
+    # own entry in BREAKER_DEFAULTS; a client without one is not guarded (one provider's outage must not
+    # open the circuit of another)
+    upstream = None
+
     def __init__(
         self,
         model: str,
@@ -21,7 +45,11 @@ class BaseClient:
         self.request_window = request_window
         self.traffic_queue = deque()
         self.total_traffic = 0
+        self.in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        self._executor = _call_executor(self.upstream)
         self.usage = TokenUsage(model=model)
+        self.breaker = get_breaker(self.upstream) if self.upstream else None
 
     @abstractmethod
     def _call(self, messages: str):
@@ -60,6 +88,9 @@ class BaseClient:
             try:
                 r = self._call(messages[0], seed=seed)
                 break
+            except CircuitOpenError:
+                # the upstream is known to be down, do not wait through the retry ladder
+                raise
             except Exception as e:
                 print(f"Error LLM Client call: {e} Retrying...")
                 time.sleep(waiting_time)
@@ -77,20 +108,98 @@ class BaseClient:
             await asyncio.sleep(1)
             self._expire_old_traffic()
 
-        loop = asyncio.get_running_loop()
-        response = await loop.run_in_executor(None, partial(self._call, messages, **kwargs))
-
+        # the request counts against the rate limit from its launch: a call cancelled by hedging is
+        # still sent, and billed, by its executor thread
         self.total_traffic += self.get_request_length(messages)
         self.traffic_queue.append((time.time(), self.get_request_length(messages)))
+        with self._in_flight_lock:
+            self.in_flight += 1
+        future = self._executor.submit(partial(self._call, messages, **kwargs))
+        # released when the thread is done, not when the awaiting task is cancelled
+        future.add_done_callback(self._release_in_flight)
+        return await asyncio.wrap_future(future)
+
+    def _release_in_flight(self, future):
+        with self._in_flight_lock:
+            self.in_flight -= 1
+
+    def multi_call(self, messages_list, return_exceptions: bool = False, **kwargs):
+        """Call the API concurrently for each messages in messages_list.
+
+        Args:
+            messages_list (list): a list of messages, as built by construct_message_list.
+            return_exceptions (bool, optional): return the exception of a failed call in place of its
+                response instead of failing all calls. Defaults to False.
+        """
+        tasks = [self._async_call(messages=messages, **kwargs) for messages in messages_list]
+        loop = asyncio.SelectorEventLoop()
+        asyncio.set_event_loop(loop)
+        try:
+            return loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=return_exceptions))
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    def hedged_call(self, messages: list[str], seeds: list[int], accept, max_concurrent: int = 2, **kwargs):
+        """Call the API with several seeds concurrently and return the first accepted response.
+
+        Up to max_concurrent calls run at once; a rejected call is replaced by the next seed. Extra
+        (hedged) calls are only launched while the rate limit has spare capacity, so hedging never
+        pushes the client over max_requests_per_minute. As soon as one response is accepted, the
+        calls still waiting are cancelled and the responses of calls already in flight are discarded.
+
+        Args:
+            messages (list[str]): a single message, as for self.call.
+            seeds (list[int]): the seeds to try, in order.
+            accept (callable): turns a response into the result, raising an exception to reject it.
+            max_concurrent (int, optional): maximum number of concurrent calls. Defaults to 2.
+
+        Returns:
+            the result of accept for the first accepted response, or None if every response was rejected.
+        """
+        assert len(messages) == 1, "Only one message is allowed for this function."
 
-        return response
+        async def _first_accepted():
+            pending_seeds = list(seeds)
+            tasks = set()
 
-    def multi_call(self, messages_list, **kwargs):
-        tasks = [self._async_call(messages=messages, **kwargs) for messages in messages_list]
-        asyncio.set_event_loop(asyncio.SelectorEventLoop())
-        loop = asyncio.get_event_loop()
-        responses = loop.run_until_complete(asyncio.gather(*tasks))
-        return responses
+            def launch():
+                seed = pending_seeds.pop(0)
+                tasks.add(asyncio.ensure_future(self._async_call(messages[0], seed=seed, **kwargs)))
+
+            try:
+                while pending_seeds or tasks:
+                    if pending_seeds and not tasks:
+                        launch()
+                    while pending_seeds and len(tasks) < max_concurrent and self._has_spare_capacity(len(tasks)):
+                        launch()
+                    done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        try:
+                            return accept(task.result())
+                        except CircuitOpenError:
+                            raise
+                        except Exception as e:
+                            logger.debug(f"Hedged LLM Client call rejected: {e}")
+                return None
+            finally:
+                for task in tasks:
+                    task.cancel()
+                # the tasks end at once, their requests go on in the executor until they are answered
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        loop = asyncio.SelectorEventLoop()
+        asyncio.set_event_loop(loop)
+        try:
+            return loop.run_until_complete(_first_accepted())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    def _has_spare_capacity(self, num_launching: int = 0) -> bool:
+        """Whether one more request fits in the rate limit, counting requests in flight or about to start."""
+        self._expire_old_traffic()
+        return len(self.traffic_queue) + self.in_flight + num_launching < self.max_requests_per_minute
 
     def _expire_old_traffic(self):
         """Expires traffic older than the request window."""
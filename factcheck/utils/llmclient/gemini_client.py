@@ -1,9 +1,12 @@
 import time
 import google.generativeai as genai
 from .base import BaseClient
+from ..response_parser import strip_code_fences
 
 
 class GeminiClient(BaseClient):
+    upstream = "gemini"
+
     def __init__(
         self,
         model: str = "gemini-1.5-pro",
@@ -37,7 +40,8 @@ class GeminiClient(BaseClient):
         )
 
         try:
-            response = self.client.generate_content(
+            response = self.breaker.call(
+                self.client.generate_content,
                 user_content,
                 generation_config=generation_config
             )
@@ -65,16 +69,7 @@ class GeminiClient(BaseClient):
 
     def _clean_json_response(self, response_text):
         """Clean up Gemini response by removing markdown code blocks"""
-        import re
-        
-        # Remove markdown code blocks
-        # Pattern matches ```json ... ``` or ``` ... ```
-        cleaned = re.sub(r'```(?:json)?\s*([\s\S]*?)\s*```', r'\1', response_text.strip())
-        
-        # Remove any leading/trailing whitespace
-        cleaned = cleaned.strip()
-        
-        return cleaned
+        return strip_code_fences(response_text)
 
     def _log_usage(self, usage_metadata):
         try:
@@ -4,6 +4,7 @@ import uuid
 from google.cloud import storage
 import google.generativeai as genai
 from .logger import CustomLogger
+from .circuit_breaker import CircuitBreaker, get_breaker
 
 logger = CustomLogger(__name__).getlog()
 
@@ -23,6 +24,11 @@ def upload_to_gcs(file_path: str, api_config: dict = None) -> str:
     Returns:
         str: Public URL of uploaded file
     """
+    breaker = get_breaker("gcs")
+    if breaker.state == CircuitBreaker.OPEN:
+        logger.warning("GCS circuit is open, using local file path as fallback")
+        return file_path
+
     try:
         # Get GCS configuration from API config
         if api_config:
@@ -84,7 +90,7 @@ def upload_to_gcs(file_path: str, api_config: dict = None) -> str:
         
         # Upload file
         logger.info(f"Uploading {file_path} to GCS bucket '{bucket_name}' as {unique_filename}")
-        blob.upload_from_filename(file_path)
+        breaker.call(blob.upload_from_filename, file_path)
         
         # Since bucket has public access configured, files should be accessible
         # Try to make individual blob public as additional measure
@@ -184,7 +190,7 @@ def image2text(input_path: str, gemini_api_key: str, api_config: dict = None) ->
                 }
             ]
         
-        response = model.generate_content(prompt)
+        response = get_breaker("gemini").call(model.generate_content, prompt)
         return response.text
         
     except Exception as e:
@@ -278,7 +284,7 @@ def video2text(input_path: str, gemini_api_key: str, api_config: dict = None) ->
                     "data": frame_data
                 })
         
-        response = model.generate_content(prompt)
+        response = get_breaker("gemini").call(model.generate_content, prompt)
         return response.text
         
     except Exception as e:
@@ -424,7 +430,7 @@ Provide ONLY the factual claims, one per line. If no verifiable claims exist, re
 Extracted factual claims:
 """
         
-        response = model.generate_content(prompt)
+        response = get_breaker("gemini").call(model.generate_content, prompt)
         extracted_claims = response.text.strip()
         
         # If no claims were found, return a message indicating this
@@ -0,0 +1,168 @@
+import inspect
+import json
+import os
+
+import numpy as np
+
+from factcheck.utils.logger import CustomLogger
+
+logger = CustomLogger(__name__).getlog()
+
+MODEL_FILE = "model.int8.onnx"
+META_FILE = "ranker_meta.json"
+
+
+def ranker_threads(num_workers: int = None) -> int:
+    """Inference threads of one process: its CPUs shared among the worker processes of the server.
+
+    Each gunicorn worker (WEB_CONCURRENCY, see Procfile) runs its own ranker, more threads than
+    its share only makes them preempt each other.
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    num_workers = num_workers or int(os.environ.get("WEB_CONCURRENCY", 1))
+    return max(1, cpus // max(1, num_workers))
+
+
+def export_onnx_ranker(model_name: str, output_dir: str, max_length: int = 512, opset: int = 17) -> str:
+    """Export a sentence-transformers cross-encoder to ONNX and quantize its weights to int8.
+
+    Needs torch, sentence-transformers and onnxruntime. The directory gets the int8 model, the
+    tokenizer files and ranker_meta.json; it is what OnnxCrossEncoder loads.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import CrossEncoder
+
+    os.makedirs(output_dir, exist_ok=True)
+    cross_encoder = CrossEncoder(model_name, max_length=max_length, device="cpu")
+    model, tokenizer = cross_encoder.model.eval(), cross_encoder.tokenizer
+    # the activation predict() applies on the logits: Identity for the ms-marco rankers
+    activation = getattr(cross_encoder, "activation_fn", None) or getattr(cross_encoder, "default_activation_function", None)
+
+    features = tokenizer(["query"], ["passage"], padding=True, truncation=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in features]
+
+    class Logits(torch.nn.Module):
+        """The model with positional inputs and the logits as its only output, as ONNX export wants."""
+
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).logits
+
+    float_path = os.path.join(output_dir, "model.onnx")
+    # the TorchScript exporter, which takes dynamic_axes; newer torch defaults to the dynamo one
+    legacy = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.no_grad():
+        torch.onnx.export(
+            Logits(),
+            tuple(features[name] for name in input_names),
+            float_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes={**{name: {0: "batch", 1: "sequence"} for name in input_names}, "logits": {0: "batch"}},
+            opset_version=opset,
+            **legacy,
+        )
+    # dynamic quantization: int8 weights, activations quantized per batch at run time
+    quantize_dynamic(float_path, os.path.join(output_dir, MODEL_FILE), weight_type=QuantType.QInt8)
+    os.remove(float_path)
+    tokenizer.save_pretrained(output_dir)
+    meta = {
+        "model": model_name,
+        "max_length": max_length,
+        "sigmoid": type(activation).__name__ == "Sigmoid",
+        "input_names": input_names,
+    }
+    with open(os.path.join(output_dir, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+    return output_dir
+
+
+class OnnxCrossEncoder:
+    """Int8 ONNX Runtime cross-encoder on the CPU, exported by export_onnx_ranker.
+
+    predict() takes the arguments of sentence-transformers' CrossEncoder.predict that
+    PassageRanker uses and returns the same scores, so it drops in as a PassageRanker model.
+    """
+
+    def __init__(self, model_dir: str, num_threads: int = None):
+        """Initialize the OnnxCrossEncoder class
+
+        Args:
+            model_dir (str): directory written by export_onnx_ranker.
+            num_threads (int, optional): intra-op threads, defaults to ranker_threads().
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.num_threads = num_threads or ranker_threads()
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.num_threads
+        # one graph runs at a time per process, parallelism is within its operators
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, MODEL_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.meta["max_length"], strategy="longest_first")
+        self.tokenizer.enable_padding()
+        logger.info(f"Loaded ONNX ranker {model_dir} ({self.meta['model']}) with {self.num_threads} threads.")
+
+    def predict(self, sentences: list, batch_size: int = 32, show_progress_bar: bool = None, **kwargs) -> np.ndarray:
+        """Return the score of every (query, passage) pair, one forward pass per batch_size pairs."""
+        scores = []
+        for start in range(0, len(sentences), batch_size):
+            encodings = self.tokenizer.encode_batch([tuple(pair) for pair in sentences[start : start + batch_size]])
+            features = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            logits = self.session.run(None, {name: features[name] for name in self.meta["input_names"]})[0]
+            scores.append(logits[:, 0])
+        if not scores:
+            return np.zeros(0, dtype=np.float32)
+        scores = np.concatenate(scores)
+        return 1 / (1 + np.exp(-scores)) if self.meta["sigmoid"] else scores
+
+
+def ranking_agreement(reference: list, candidate: list, k: int = 3) -> dict:
+    """Compare the scores two rankers gave the passages of the same queries.
+
+    Args:
+        reference (list): per query, the scores of its passages from the reference ranker.
+        candidate (list): per query, the scores of the same passages from the ranker checked.
+        k (int, optional): depth of the top-k overlap. Defaults to 3.
+
+    Returns:
+        dict: top1 (share of queries with the same best passage), topk_overlap (mean share of the
+            reference top k found in the candidate top k), spearman (mean rank correlation) and
+            max_abs_diff (largest score difference).
+    """
+    top1, overlap, spearman, max_abs_diff = [], [], [], 0.0
+    for ref, cand in zip(reference, candidate):
+        ref, cand = np.asarray(ref, dtype=np.float64), np.asarray(cand, dtype=np.float64)
+        if len(ref) == 0:
+            continue
+        max_abs_diff = max(max_abs_diff, float(np.abs(ref - cand).max()))
+        ref_order, cand_order = np.argsort(-ref, kind="stable"), np.argsort(-cand, kind="stable")
+        top1.append(ref_order[0] == cand_order[0])
+        depth = min(k, len(ref))
+        overlap.append(len(set(ref_order[:depth]) & set(cand_order[:depth])) / depth)
+        if len(ref) > 1:
+            ref_ranks, cand_ranks = np.argsort(ref_order), np.argsort(cand_order)
+            spearman.append(float(np.corrcoef(ref_ranks, cand_ranks)[0, 1]))
+    return {
+        "queries": len(top1),
+        "top1": float(np.mean(top1)) if top1 else 1.0,
+        "topk_overlap": float(np.mean(overlap)) if overlap else 1.0,
+        "spearman": float(np.mean(spearman)) if spearman else 1.0,
+        "max_abs_diff": max_abs_diff,
+    }
@@ -0,0 +1,169 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+
+from factcheck.utils.logger import CustomLogger
+
+logger = CustomLogger(__name__).getlog()
+
+
+class PageCache:
+    """Persistent cache of crawled pages in a sqlite file, bodies are zlib compressed.
+
+    A page is served without any request while it is fresh (ttl). After that it is kept up
+    to max_age for revalidation: the crawler sends its ETag / Last-Modified and a 304 answer
+    refreshes the entry without downloading the body again. When the revalidation fails, the
+    crawler serves the stale page. Pages marked Cache-Control no-store or private are not stored.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 6 * 3600,
+        max_age: float = 7 * 24 * 3600,
+        max_entries: int = 20000,
+        clock=time.time,
+    ):
+        """Initialize the PageCache class
+
+        Args:
+            path (str): path of the sqlite file, created if missing.
+            ttl (float, optional): seconds a page is served without revalidation. Defaults to 6 hours.
+            max_age (float, optional): seconds a stale page is kept for revalidation. Defaults to 7 days.
+            max_entries (int, optional): the least recently fetched pages are evicted above this size. Defaults to 20000.
+            clock (callable, optional): wall clock, used by tests. Defaults to time.time.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.clock = clock
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._num_puts = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS page_cache ("
+                "url TEXT PRIMARY KEY, final_url TEXT NOT NULL, body BLOB NOT NULL, encoding TEXT NOT NULL, "
+                "headers TEXT NOT NULL, truncated INTEGER NOT NULL, etag TEXT, last_modified TEXT, "
+                "fetched REAL NOT NULL, expires REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS page_cache_fetched ON page_cache (fetched)")
+            self._conn.commit()
+
+    def get(self, url: str):
+        """Return (entry, fresh) for a url, or (None, False) on a miss.
+
+        entry is a dict with final_url, content, encoding, headers, truncated, etag and last_modified.
+        """
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT final_url, body, encoding, headers, truncated, etag, last_modified, fetched, expires "
+                    "FROM page_cache WHERE url = ?",
+                    (url,),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Page cache read failed: {e}")
+            self.stats["errors"] += 1
+            return None, False
+
+        now = self.clock()
+        if row is None or row[7] + self.max_age <= now:
+            self.stats["misses"] += 1
+            return None, False
+        entry = {
+            "final_url": row[0],
+            "content": zlib.decompress(row[1]),
+            "encoding": row[2],
+            "headers": json.loads(row[3]),
+            "truncated": bool(row[4]),
+            "etag": row[5],
+            "last_modified": row[6],
+        }
+        fresh = row[8] > now
+        self.stats["hits" if fresh else "stale"] += 1
+        return entry, fresh
+
+    def put(self, url: str, page):
+        """Store a CrawledPage for a url, unless its Cache-Control forbids it."""
+        directives = {d.split("=")[0].strip() for d in page.headers.get("cache-control", "").lower().split(",")}
+        if directives & {"no-store", "private"}:
+            self.stats["uncacheable"] += 1
+            return
+        now = self.clock()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO page_cache "
+                    "(url, final_url, body, encoding, headers, truncated, etag, last_modified, fetched, expires) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        url,
+                        page.url,
+                        zlib.compress(page.content, 6),
+                        page.encoding,
+                        json.dumps(page.headers),
+                        int(page.truncated),
+                        page.headers.get("etag"),
+                        page.headers.get("last-modified"),
+                        now,
+                        now + self.ttl,
+                    ),
+                )
+                self._conn.commit()
+                self._num_puts += 1
+                if self._num_puts % 500 == 0:
+                    self._evict(now)
+        except sqlite3.Error as e:
+            logger.warning(f"Page cache write failed: {e}")
+            self.stats["errors"] += 1
+            return
+        self.stats["stores"] += 1
+
+    def refresh(self, url: str):
+        """Mark a stale page fresh again after the server answered 304 Not Modified."""
+        now = self.clock()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE page_cache SET fetched = ?, expires = ? WHERE url = ?", (now, now + self.ttl, url)
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Page cache write failed: {e}")
+            self.stats["errors"] += 1
+            return
+        self.stats["revalidated"] += 1
+
+    def purge(self):
+        """Remove pages older than max_age and evict the least recently fetched ones above max_entries."""
+        with self._lock:
+            self._evict(self.clock())
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM page_cache WHERE fetched <= ?", (now - self.max_age,))
+        self._conn.execute(
+            "DELETE FROM page_cache WHERE url IN (SELECT url FROM page_cache ORDER BY fetched DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM page_cache").fetchone()[0]
+
+    def snapshot(self) -> dict:
+        return {"entries": len(self), **self.stats}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,148 @@
+import atexit
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker, shared_memory
+
+from factcheck.utils.html_extractor import extract_visible_text
+from factcheck.utils.logger import CustomLogger
+
+logger = CustomLogger(__name__).getlog()
+
+
+def _extract(body, encoding: str, extractor: str):
+    try:
+        return extract_visible_text(str(body, encoding, "replace"), extractor=extractor)
+    except Exception:
+        return None
+
+
+def _parse_bodies(bodies: list, extractor: str) -> list:
+    """Worker: [(body bytes, encoding)] -> [text or None]."""
+    return [_extract(body, encoding, extractor) for body, encoding in bodies]
+
+
+def _parse_shared(name: str, spans: list, extractor: str) -> list:
+    """Worker: [(offset, length, encoding)] of a shared memory segment -> [text or None]."""
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+        # decoded straight from the shared buffer, the body is never copied into the worker
+        return [_extract(segment.buf[offset : offset + length], encoding, extractor) for offset, length, encoding in spans]
+    finally:
+        segment.close()
+
+
+class ParsePool:
+    """Long-lived worker processes that turn page bodies into text.
+
+    Only the body bytes and their encoding cross the process boundary, never the crawled page
+    or response object. Pages are sent in a few chunks per worker, so one task carries several
+    pages. Batches of at least shm_min_bytes are written once into a shared memory segment and
+    the workers decode them in place, smaller ones are pickled as bytes, which is cheaper for
+    them. The pool is started lazily and again after a fork.
+    """
+
+    def __init__(self, max_workers: int = None, shm_min_bytes: int = 1 << 20, chunks_per_worker: int = 4):
+        """Initialize the ParsePool class
+
+        Args:
+            max_workers (int, optional): number of worker processes. Defaults to os.cpu_count().
+            shm_min_bytes (int, optional): batches of at least this many bytes go through shared memory,
+                None disables it. Defaults to 1 MiB.
+            chunks_per_worker (int, optional): tasks per worker and batch, more balance the load, fewer
+                cost less IPC. Defaults to 4.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.shm_min_bytes = shm_min_bytes
+        self.chunks_per_worker = chunks_per_worker
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._executor = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                return self._executor
+            self._pid = os.getpid()
+            # workers must share the tracker of this process: one of their own would unlink
+            # the segments it saw attached when the worker exits
+            resource_tracker.ensure_running()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def parse(self, bodies: list, extractor: str = None) -> list:
+        """Extract the text of every (body bytes, encoding) pair, in order.
+
+        Returns None for a page that could not be parsed.
+        """
+        if not bodies:
+            return []
+        num_bytes = sum(len(body) for body, _ in bodies)
+        self.stats["batches"] += 1
+        self.stats["pages"] += len(bodies)
+        self.stats["bytes"] += num_bytes
+        try:
+            if self.shm_min_bytes is not None and num_bytes >= self.shm_min_bytes:
+                return self._parse_shared(bodies, num_bytes, extractor)
+            return self._parse_pickled(bodies, extractor)
+        except BrokenProcessPool as e:
+            # a worker died (out of memory, segfault in a parser): start over next time, parse here now
+            logger.warning(f"Parse worker pool broke, parsing {len(bodies)} pages in process: {e}")
+            self.stats["broken"] += 1
+            with self._lock:
+                self._executor = None
+            return _parse_bodies(bodies, extractor)
+
+    def _chunks(self, items: list) -> list:
+        num_chunks = min(len(items), self.max_workers * self.chunks_per_worker)
+        size = -(-len(items) // num_chunks)
+        return [items[i : i + size] for i in range(0, len(items), size)]
+
+    def _parse_pickled(self, bodies: list, extractor: str) -> list:
+        executor = self._ensure_started()
+        futures = [executor.submit(_parse_bodies, chunk, extractor) for chunk in self._chunks(bodies)]
+        return [text for future in futures for text in future.result()]
+
+    def _parse_shared(self, bodies: list, num_bytes: int, extractor: str) -> list:
+        executor = self._ensure_started()
+        segment = shared_memory.SharedMemory(create=True, size=max(num_bytes, 1))
+        try:
+            spans, offset = [], 0
+            for body, encoding in bodies:
+                segment.buf[offset : offset + len(body)] = body
+                spans.append((offset, len(body), encoding))
+                offset += len(body)
+            futures = [
+                executor.submit(_parse_shared, segment.name, chunk, extractor) for chunk in self._chunks(spans)
+            ]
+            texts = [text for future in futures for text in future.result()]
+        finally:
+            segment.close()
+            segment.unlink()
+        self.stats["shared_memory_batches"] += 1
+        return texts
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def snapshot(self) -> dict:
+        return {"workers": self.max_workers, "running": self._executor is not None, **self.stats}
+
+
+_parse_pool = ParsePool()
+atexit.register(_parse_pool.shutdown)
+
+
+def get_parse_pool() -> ParsePool:
+    return _parse_pool
+
+
+def parse_pages(pages: list, extractor: str = None) -> list:
+    """Visible text of every CrawledPage, parsed by the shared worker pool, in order."""
+    return _parse_pool.parse([(page.content, page.encoding) for page in pages], extractor=extractor)
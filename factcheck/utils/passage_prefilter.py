@@ -0,0 +1,110 @@
+from collections import Counter
+
+import numpy as np
+
+from factcheck.utils.bm25_index import tokenize
+from factcheck.utils.logger import CustomLogger
+
+logger = CustomLogger(__name__).getlog()
+
+
+def bm25_scores(query: str, passages: list[str], k1: float = 1.2, b: float = 0.75) -> np.ndarray:
+    """BM25 score of every passage for a query, the passages being the whole collection."""
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms or not passages:
+        return np.zeros(len(passages), dtype=np.float32)
+    column = {term: j for j, term in enumerate(terms)}
+    tfs = np.zeros((len(passages), len(terms)), dtype=np.float32)
+    lengths = np.empty(len(passages), dtype=np.float32)
+    for i, passage in enumerate(passages):
+        tokens = tokenize(passage)
+        lengths[i] = len(tokens)
+        for term, count in Counter(token for token in tokens if token in column).items():
+            tfs[i, column[term]] = count
+    df = np.count_nonzero(tfs, axis=0)
+    idf = np.log(1 + (len(passages) - df + 0.5) / (df + 0.5)).astype(np.float32)
+    norms = k1 * (1 - b + b * lengths / max(float(lengths.mean()), 1.0))
+    return (idf * tfs * (k1 + 1) / (tfs + norms[:, None])).sum(axis=1)
+
+
+def top_n(scores, n: int) -> list[int]:
+    """Indices of the n best scores, in their original order. Ties keep the earlier passage."""
+    if len(scores) <= n:
+        return list(range(len(scores)))
+    order = np.argsort(-np.asarray(scores), kind="stable")[:n]
+    return sorted(order.tolist())
+
+
+def prefilter_recall(full_scores, kept: list[int], k: int = 5) -> float:
+    """Share of the k best passages of the full rerank that the prefilter kept for it."""
+    if len(full_scores) == 0:
+        return 1.0
+    best = np.argsort(-np.asarray(full_scores), kind="stable")[:k]
+    return len(set(best.tolist()) & set(kept)) / len(best)
+
+
+class BM25Prefilter:
+    """Keeps the passages of a query that share the most informative words with it."""
+
+    name = "bm25"
+
+    def select(self, query_passages: list[tuple[str, list[str]]], n: int) -> list[list[int]]:
+        """Return, per (query, passages), the indices of the n passages to rerank, in passage order."""
+        return [
+            top_n(bm25_scores(query, passages), n) if len(passages) > n else list(range(len(passages)))
+            for query, passages in query_passages
+        ]
+
+
+class BiEncoderPrefilter:
+    """Keeps the passages of a query closest to it in a small bi-encoder's embedding space.
+
+    The queries and the passages of a whole request are embedded in one batch each, the
+    similarities are one matrix product per query.
+    """
+
+    name = "bi_encoder"
+
+    def __init__(self, encode=None, model_name: str = None):
+        """Initialize the BiEncoderPrefilter class
+
+        Args:
+            encode (callable, optional): encode(texts) -> unit vectors, defaults to a sentence-transformers model.
+            model_name (str, optional): the sentence-transformers model, see dense_index.DEFAULT_MODEL.
+        """
+        if encode is None:
+            from factcheck.utils.dense_index import DEFAULT_MODEL, sentence_transformer_encoder
+
+            encode = sentence_transformer_encoder(model_name or DEFAULT_MODEL)
+        self.encode = encode
+
+    def select(self, query_passages: list[tuple[str, list[str]]], n: int) -> list[list[int]]:
+        """Return, per (query, passages), the indices of the n passages to rerank, in passage order."""
+        todo = [i for i, (_, passages) in enumerate(query_passages) if len(passages) > n]
+        selected = [list(range(len(passages))) for _, passages in query_passages]
+        if not todo:
+            return selected
+        query_vectors = self.encode([query_passages[i][0] for i in todo])
+        passage_vectors = self.encode([passage for i in todo for passage in query_passages[i][1]])
+        start = 0
+        for row, i in enumerate(todo):
+            num_passages = len(query_passages[i][1])
+            scores = passage_vectors[start : start + num_passages] @ query_vectors[row]
+            selected[i] = top_n(scores, n)
+            start += num_passages
+        return selected
+
+
+PREFILTERS = {
+    "bm25": BM25Prefilter,
+    "bi_encoder": BiEncoderPrefilter,
+}
+
+
+def get_prefilter(name: str):
+    """Return a prefilter by name, None for "none"."""
+    if name in (None, "none"):
+        return None
+    if name not in PREFILTERS:
+        raise NotImplementedError(f"Passage prefilter {name} not found!")
+    return PREFILTERS[name]()
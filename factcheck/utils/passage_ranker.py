@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from factcheck.utils.logger import CustomLogger
+from factcheck.utils.score_cache import score_key, text_hash
+
+logger = CustomLogger(__name__).getlog()
+
+DEFAULT_RANKER = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+def cross_encoder(model_name: str = DEFAULT_RANKER, max_length: int = 512, device: str = None):
+    """Load a sentence-transformers CrossEncoder, on the GPU when there is one."""
+    import torch
+    from sentence_transformers import CrossEncoder
+
+    device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+    return CrossEncoder(model_name, max_length=max_length, device=torch.device(device))
+
+
+def pair_length(pair: tuple[str, str]) -> int:
+    """Length of a (query, passage) pair in characters, a proxy of its token count."""
+    return len(pair[0]) + len(pair[1])
+
+
+class PassageRanker:
+    """Scores (query, passage) pairs with a cross-encoder in one batched pass.
+
+    A batch is padded to its longest pair, so pairs are scored in order of length: each batch
+    holds pairs of about the same size and little of the model's work goes to padding. The
+    scores are returned in the order of the pairs given.
+
+    With a ScoreCache only the pairs it does not know are sent to the model: a popular page
+    reranked against the same query again costs nothing.
+    """
+
+    def __init__(
+        self,
+        model=None,
+        batch_size: int = 32,
+        sort_by_length: bool = True,
+        onnx_path: str = None,
+        cache=None,
+        model_id: str = None,
+        **model_kwargs,
+    ):
+        """Initialize the PassageRanker class
+
+        Args:
+            model (optional): an object with predict(pairs, batch_size=...), defaults to cross_encoder(**model_kwargs).
+            batch_size (int, optional): pairs per forward pass. Defaults to 32.
+            sort_by_length (bool, optional): batch pairs of similar length together. Defaults to True.
+            onnx_path (str, optional): directory of an int8 ONNX export of the model, used instead of
+                PyTorch, see script/export_onnx_ranker.py. Defaults to None.
+            cache (ScoreCache, optional): cache of the scores. Defaults to None.
+            model_id (str, optional): the model part of the cache keys, defaults to the model name,
+                maximum length and backend, whose scores differ slightly.
+        """
+        if model is None and onnx_path:
+            from factcheck.utils.onnx_ranker import OnnxCrossEncoder
+
+            model = OnnxCrossEncoder(onnx_path)
+            meta = model.meta
+            model_id = model_id or f"{meta['model']}@{meta['max_length']}:onnx-int8"
+        elif model is None:
+            name, max_length = model_kwargs.get("model_name", DEFAULT_RANKER), model_kwargs.get("max_length", 512)
+            model_id = model_id or f"{name}@{max_length}"
+            model = cross_encoder(**model_kwargs)
+        self.model = model
+        self.backend = type(self.model).__name__
+        self.model_id = model_id or self.backend
+        self.cache = cache
+        self.batch_size = batch_size
+        self.sort_by_length = sort_by_length
+        self.stats = Counter()
+        self.last_rerank_ms = None
+        self._stats_lock = threading.Lock()
+
+    def score(self, pairs: list[tuple[str, str]]) -> list[float]:
+        """Return the relevance score of every (query, passage) pair, in input order."""
+        if not pairs:
+            return []
+        start = time.perf_counter()
+        scores = self._predict(pairs) if self.cache is None else self._score_cached(pairs)
+        rerank_ms = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self.stats.update(reranks=1, rerank_ms=rerank_ms)
+            self.last_rerank_ms = rerank_ms
+        return scores
+
+    def _score_cached(self, pairs: list[tuple[str, str]]) -> list[float]:
+        query_hashes = {}
+        keys = []
+        for query, passage in pairs:
+            if query not in query_hashes:
+                query_hashes[query] = text_hash(query)
+            keys.append(score_key(self.model_id, query_hashes[query], text_hash(passage)))
+        scores = self.cache.get_many(keys)
+        # a pair repeated within the request is scored once
+        missing = {}
+        for i, (key, score) in enumerate(zip(keys, scores)):
+            if score is None:
+                missing.setdefault(key, i)
+        if missing:
+            predicted = self._predict([pairs[i] for i in missing.values()])
+            self.cache.put_many(list(missing), predicted)
+            new_scores = dict(zip(missing, predicted))
+            scores = [new_scores[key] if score is None else score for key, score in zip(keys, scores)]
+        with self._stats_lock:
+            self.stats.update(cached=len(pairs) - len(missing))
+        return scores
+
+    def _predict(self, pairs: list[tuple[str, str]]) -> list[float]:
+        if self.sort_by_length:
+            order = sorted(range(len(pairs)), key=lambda i: pair_length(pairs[i]))
+        else:
+            order = list(range(len(pairs)))
+        start = time.perf_counter()
+        sorted_scores = self.model.predict([pairs[i] for i in order], batch_size=self.batch_size, show_progress_bar=False)
+        model_ms = (time.perf_counter() - start) * 1000
+        scores = np.empty(len(pairs), dtype=np.float64)
+        scores[order] = np.asarray(sorted_scores, dtype=np.float64).reshape(len(pairs))
+        with self._stats_lock:
+            self.stats.update(calls=1, pairs=len(pairs), batches=-(-len(pairs) // self.batch_size), model_ms=model_ms)
+        return scores.tolist()
+
+    def snapshot(self) -> dict:
+        snapshot = {"backend": self.backend, "batch_size": self.batch_size, "sort_by_length": self.sort_by_length}
+        snapshot.update(self.stats)
+        # a score() call reranks the passages of one request
+        if self.stats["reranks"]:
+            snapshot["rerank_ms_per_request"] = round(self.stats["rerank_ms"] / self.stats["reranks"], 1)
+            snapshot["last_rerank_ms"] = round(self.last_rerank_ms, 1)
+        if self.cache is not None:
+            snapshot["cache"] = self.cache.snapshot()
+        return snapshot
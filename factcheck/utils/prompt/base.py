@@ -6,4 +6,5 @@ class BasePrompt:
     decompose_prompt: str = None
     checkworthy_prompt: str = None
     qgen_prompt: str = None
+    qgen_packed_prompt: str = None
     verify_prompt: str = None
@@ -64,6 +64,20 @@ qgen_prompt_zh = """给定一个命题，你的任务是创建最少数量的问
 输出:
 """
 
+qgen_packed_prompt_zh = """给定一个编号的命题列表，你的任务是为每个命题创建最少数量的问题，以验证命题的正确性。命题编号后方括号中的数字是该命题最多可以生成的问题数量。输出为JSON格式，其key是命题的编号，value是该命题的问题列表。每个命题至少要有一个问题。例如:
+
+命题:
+1. [max 1] 斯坦福监狱实验是在斯坦福大学心理学大楼恩西纳大厅的地下室进行的。
+2. [max 2] Havel-Hakimi算法是一种将图的邻接矩阵转换为其邻接表的算法。它以瓦茨拉夫·哈维尔和萨米·哈基米的名字命名。
+3. [max 4] 你的鼻子呼吸在两个鼻孔之间来回切换。当你睡觉时，大约每45分钟换一次。这是为了防止粘液积聚。这个现象叫做鼻腔循环。
+输出:
+{{"1": ["斯坦福监狱实验是在哪里进行的?"], "2": ["Havel-Hakimi算法是做什么的?","Havel-Hakimi算法是以谁命名的?"], "3": ["你的鼻子呼吸会在鼻孔之间交换吗?","你的鼻子呼吸多久交换一次?","你的鼻孔呼吸为什么会交换?","什么是鼻循环?"]}}
+
+命题:
+{claims}
+输出:
+"""
+
 verify_prompt_zh = """你的任务是使用陈述附带的证据(evidence)来评估其陈述的准确性。仔细审查这些证据，注意它可能在细节上有所不同，有时会呈现相互矛盾的信息。你的判断应该根据这些证据，并考虑其相关性和可靠性。
 
 请记住，证据中缺乏细节并不一定表明陈述是不准确的。在评估陈述的真实性时，要区分错误和证据支持陈述的地方。
@@ -111,4 +125,5 @@ class ChatGPTPromptZH:
     decompose_prompt = decompose_prompt_zh
     checkworthy_prompt = checkworthy_prompt_zh
     qgen_prompt = qgen_prompt_zh
+    qgen_packed_prompt = qgen_packed_prompt_zh
     verify_prompt = verify_prompt_zh
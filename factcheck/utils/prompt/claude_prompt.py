@@ -81,6 +81,20 @@ Claim: {claim}
 JSON Output:
 """
 
+qgen_packed_prompt = """Given a numbered list of claims, your task is to create minimum number of questions need to be check to verify the correctness of each claim. The number in brackets after the claim number is the maximum number of questions for that claim. Output in JSON format, where each key is the number of a claim and the value is the list of questions for that claim. Every claim must have at least one question. For example:
+
+Claims:
+1. [max 1] The Stanford Prison Experiment was conducted in the basement of Encina Hall, Stanford’s psychology building.
+2. [max 2] The Havel-Hakimi algorithm is an algorithm for converting the adjacency matrix of a graph into its adjacency list. It is named after Vaclav Havel and Samih Hakimi.
+3. [max 4] Your nose switches back and forth between nostrils. When you sleep, you switch about every 45 minutes. This is to prevent a buildup of mucus. It’s called the nasal cycle.
+JSON Output:
+{{"1": ["Where was Stanford Prison Experiment conducted?"], "2": ["What does Havel-Hakimi algorithm do?", "Who are Havel-Hakimi algorithm named after?"], "3": ["Does your nose switch between nostrils?", "How often does your nostrils switch?", "Why does your nostril switch?", "What is nasal cycle?"]}}
+
+Claims:
+{claims}
+JSON Output:
+"""
+
 verify_prompt = """
 Your task is to evaluate the accuracy of a provided statement using the accompanying evidence. Carefully review the evidence, noting that it may vary in detail and sometimes present conflicting information. Your judgment should be informed by this evidence, taking into account its relevance and reliability.
 
@@ -131,4 +145,5 @@ class ClaudePrompt:
     decompose_prompt = decompose_prompt
     checkworthy_prompt = checkworthy_prompt
     qgen_prompt = qgen_prompt
+    qgen_packed_prompt = qgen_packed_prompt
     verify_prompt = verify_prompt
@@ -22,6 +22,10 @@ class CustomizedPrompt(BasePrompt):
             assert key in self.prompts, f"Key {key} not found in the prompt yaml file."
             setattr(self, key, self.prompts[key])
 
+        # optional, query generation falls back to one prompt per claim without it
+        if "qgen_packed_prompt" in self.prompts:
+            self.qgen_packed_prompt = self.prompts["qgen_packed_prompt"]
+
     def load_prompt_yaml(self, prompt_name):
         # Load the prompt from a yaml file
         with open(prompt_name, "r") as file:
@@ -0,0 +1,58 @@
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = "\"'`?!.,;:()[]{}“”‘’«» "
+
+# Search query counters: "requested" queries from all claims, "searched" distinct queries
+# actually sent to the search API and "saved" duplicates answered from another claim's search.
+query_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def canonicalize_query(query: str) -> str:
+    """Return the canonical form of a search query, used to detect duplicate searches.
+
+    Unicode is NFKC normalized, case and whitespace are folded and quotes or punctuation
+    around the query are removed, e.g. ' Who is  Mary? ' -> 'who is mary'. Word order
+    and stopwords are kept since they change what the search engine returns.
+    """
+    query = unicodedata.normalize("NFKC", query)
+    query = _WHITESPACE.sub(" ", query).strip(_EDGE_PUNCTUATION)
+    return query.casefold()
+
+
+def dedup_queries(claim_queries_dict: dict[str, list[str]]) -> tuple[list[str], dict[str, list[int]]]:
+    """Collapse the queries of all claims into distinct searches.
+
+    Args:
+        claim_queries_dict (dict): a dictionary of claims and their corresponding queries.
+
+    Returns:
+        tuple[list[str], dict[str, list[int]]]: the distinct queries to search (first spelling
+            seen wins) and, for every claim, the indices of its queries in that list. A claim
+            asking the same query twice only gets the index once.
+    """
+    unique_queries = []
+    canonical_index = {}
+    claim_query_indices = {}
+    num_requested = 0
+    for claim, queries in claim_queries_dict.items():
+        indices = []
+        for query in queries:
+            num_requested += 1
+            key = canonicalize_query(query)
+            if key not in canonical_index:
+                canonical_index[key] = len(unique_queries)
+                unique_queries.append(query)
+            if canonical_index[key] not in indices:
+                indices.append(canonical_index[key])
+        claim_query_indices[claim] = indices
+
+    with _stats_lock:
+        query_stats["requested"] += num_requested
+        query_stats["searched"] += len(unique_queries)
+        query_stats["saved"] += num_requested - len(unique_queries)
+    return unique_queries, claim_query_indices
@@ -0,0 +1,186 @@
+import ast
+import json
+import re
+import threading
+from collections import Counter
+
+_CODE_FENCE = re.compile(r"```(?:json|JSON|python)?\s*([\s\S]*?)\s*```")
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_CLOSER_AHEAD = re.compile(r"\s*[}\]]")
+_CLOSERS = {"{": "}", "[": "]"}
+_PYTHON_LITERAL_HINT = re.compile(r"'|\b(?:True|False|None)\b")
+
+# How responses were parsed: "clean" (plain json), "repaired" (cleanup needed), "salvaged"
+# (truncated response, incomplete items dropped) or "failed".
+parse_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+class ResponseParseError(ValueError):
+    """Raised when an LLM response cannot be turned into a structured value."""
+
+
+def strip_code_fences(text: str) -> str:
+    """Remove markdown code fences (```json ... ```) around a response."""
+    text = text.strip()
+    if "```" not in text:
+        return text
+    match = _CODE_FENCE.search(text)
+    if match:
+        return match.group(1).strip()
+    # an opening fence without its closing one, e.g. a truncated response
+    return re.sub(r"^```(?:json|JSON|python)?", "", text).strip()
+
+
+def parse_json_response(text: str, expected_type: type = None):
+    """Parse a structured (JSON or python literal) value out of an LLM response.
+
+    The plain `json.loads` path is tried first, so well-formed responses pay nothing extra.
+    Otherwise the response is repaired step by step: code fences and surrounding prose are
+    removed, prompt-style doubled braces are collapsed, trailing commas are dropped and python
+    literals are accepted. A truncated response is salvaged by keeping every complete item and
+    closing the open brackets, so a partial answer does not cost another LLM round-trip.
+
+    Args:
+        text (str): the raw LLM response.
+        expected_type (type, optional): the required type of the result, e.g. dict or list.
+
+    Raises:
+        ResponseParseError: if nothing of the expected type could be recovered.
+
+    Returns:
+        the parsed value.
+    """
+    if not isinstance(text, str):
+        raise ResponseParseError(f"Response is not a string: {type(text)}")
+
+    try:
+        result = json.loads(text)
+        if _type_ok(result, expected_type):
+            _count("clean")
+            return result
+    except ValueError:
+        pass
+
+    candidate = _extract_span(strip_code_fences(text))
+    if candidate is None:
+        _count("failed")
+        raise ResponseParseError(f"No JSON object or array found in response: {text[:200]!r}")
+    if candidate.startswith("{{"):
+        candidate = candidate.replace("{{", "{").replace("}}", "}")
+    if _TRAILING_COMMA.search(candidate):
+        candidate = _strip_trailing_commas(candidate)
+
+    result = _loads(candidate)
+    if result is not None and _type_ok(result, expected_type):
+        _count("repaired")
+        return result
+
+    for fixed in _truncation_repairs(candidate):
+        result = _loads(fixed)
+        if result is not None and _type_ok(result, expected_type):
+            _count("salvaged")
+            return result
+
+    _count("failed")
+    raise ResponseParseError(f"Unable to parse response: {text[:200]!r}")
+
+
+def _count(outcome: str):
+    with _stats_lock:
+        parse_stats[outcome] += 1
+
+
+def _type_ok(value, expected_type) -> bool:
+    return expected_type is None or isinstance(value, expected_type)
+
+
+def _extract_span(text: str):
+    """Return the text from the first opening bracket on, dropping any leading prose."""
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return None
+    return text[min(starts) :].strip()
+
+
+def _loads(text: str):
+    """Decode the leading JSON value (ignoring trailing prose), falling back to python literals."""
+    try:
+        value, _ = json.JSONDecoder().raw_decode(text)
+        return value
+    except ValueError:
+        pass
+    if not _PYTHON_LITERAL_HINT.search(text):
+        # without quotes or python constants the python parser cannot do better than json
+        return None
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+def _strip_trailing_commas(text: str) -> str:
+    """Drop the commas directly before a closing bracket, leaving the text of strings untouched."""
+    out = []
+    in_string = None
+    escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == in_string:
+                in_string = None
+        elif ch in "\"'":
+            in_string = ch
+        elif ch == "," and _CLOSER_AHEAD.match(text, i + 1):
+            continue
+        out.append(ch)
+    return "".join(out)
+
+
+def _truncation_repairs(text: str):
+    """Yield repaired versions of a truncated response, most complete first.
+
+    The text is scanned once, remembering the bracket stack at every comma and after every
+    closed container. The first candidate closes the text as is; the following ones cut the
+    text back to a remembered position, dropping the incomplete trailing item.
+    """
+    stack = []
+    cut_points = []
+    in_string = None
+    escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == in_string:
+                in_string = None
+            continue
+        if ch in "\"'":
+            in_string = ch
+        elif ch in _CLOSERS:
+            stack.append(ch)
+        elif ch in "}]":
+            if not stack:
+                # the value is complete, anything after it is noise
+                return
+            stack.pop()
+            if stack:
+                cut_points.append((i + 1, tuple(stack)))
+        elif ch == "," and stack:
+            cut_points.append((i, tuple(stack)))
+
+    if not stack:
+        return
+    if not in_string:
+        yield text.rstrip().rstrip(",:") + _close(stack)
+    for position, open_brackets in reversed(cut_points):
+        yield text[:position].rstrip().rstrip(",") + _close(open_brackets)
+
+
+def _close(open_brackets) -> str:
+    return "".join(_CLOSERS[b] for b in reversed(open_brackets))
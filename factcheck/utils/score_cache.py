@@ -0,0 +1,160 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from factcheck.utils.logger import CustomLogger
+
+logger = CustomLogger(__name__).getlog()
+
+
+def text_hash(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def score_key(model: str, query_hash: bytes, passage_hash: bytes) -> bytes:
+    """Key of a (model, query, passage) score: one 16 byte digest of the model and both text hashes."""
+    return hashlib.blake2b(model.encode("utf-8") + b"\x1f" + query_hash + passage_hash, digest_size=16).digest()
+
+
+class ScoreCache:
+    """Bounded cache of cross-encoder scores keyed by (model, query hash, passage hash).
+
+    The scores live in memory, the least recently used are dropped above max_entries. With a
+    path they are also written to a sqlite file, so a restarted process or another worker
+    finds them; a memory miss is then looked up on disk.
+    """
+
+    def __init__(self, max_entries: int = 200000, path: str = None, max_disk_entries: int = 2000000, clock=time.time):
+        """Initialize the ScoreCache class
+
+        Args:
+            max_entries (int, optional): scores kept in memory. Defaults to 200000.
+            path (str, optional): sqlite file the scores are persisted to, in memory only if None. Defaults to None.
+            max_disk_entries (int, optional): least recently used scores are evicted from disk above this. Defaults to 2000000.
+            clock (callable, optional): wall clock, used by tests. Defaults to time.time.
+        """
+        self.max_entries = max_entries
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self.clock = clock
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._scores = OrderedDict()
+        self._num_puts = 0
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            with self._lock:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS score_cache (key BLOB PRIMARY KEY, score REAL NOT NULL, used REAL NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS score_cache_used ON score_cache (used)")
+                self._conn.commit()
+
+    def get_many(self, keys: list[bytes]) -> list:
+        """Return the cached score of every key, None for a miss."""
+        scores = [None] * len(keys)
+        on_disk = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                score = self._scores.get(key)
+                if score is not None:
+                    self._scores.move_to_end(key)
+                    scores[i] = score
+                elif self._conn is not None:
+                    on_disk.append(i)
+        if on_disk:
+            found = self._read([keys[i] for i in on_disk])
+            for i in on_disk:
+                scores[i] = found.get(keys[i])
+            self._remember(found)
+            self.stats["disk_hits"] += len(found)
+        num_hits = sum(score is not None for score in scores)
+        self.stats["hits"] += num_hits
+        self.stats["misses"] += len(keys) - num_hits
+        return scores
+
+    def put_many(self, keys: list[bytes], scores: list[float]):
+        """Store the scores of keys, in memory and on disk when persisted."""
+        entries = dict(zip(keys, (float(score) for score in scores)))
+        self._remember(entries)
+        self.stats["stores"] += len(entries)
+        if self._conn is None or not entries:
+            return
+        now = self.clock()
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO score_cache (key, score, used) VALUES (?, ?, ?)",
+                    [(key, score, now) for key, score in entries.items()],
+                )
+                self._conn.commit()
+                self._num_puts += 1
+                if self._num_puts % 100 == 0:
+                    self._evict()
+        except sqlite3.Error as e:
+            logger.warning(f"Score cache write failed: {e}")
+            self.stats["errors"] += 1
+
+    def _remember(self, entries: dict):
+        with self._lock:
+            for key, score in entries.items():
+                self._scores[key] = score
+                self._scores.move_to_end(key)
+            num_evicted = len(self._scores) - self.max_entries
+            for _ in range(max(0, num_evicted)):
+                self._scores.popitem(last=False)
+        if num_evicted > 0:
+            self.stats["evictions"] += num_evicted
+
+    def _read(self, keys: list[bytes]) -> dict:
+        found = {}
+        now = self.clock()
+        try:
+            with self._lock:
+                # sqlite binds at most 32766 parameters per statement
+                for start in range(0, len(keys), 30000):
+                    chunk = keys[start : start + 30000]
+                    placeholders = ", ".join("?" * len(chunk))
+                    found.update(
+                        self._conn.execute(f"SELECT key, score FROM score_cache WHERE key IN ({placeholders})", chunk)
+                    )
+                if found:
+                    self._conn.executemany("UPDATE score_cache SET used = ? WHERE key = ?", [(now, key) for key in found])
+                    self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Score cache read failed: {e}")
+            self.stats["errors"] += 1
+        return found
+
+    def _evict(self):
+        self._conn.execute(
+            "DELETE FROM score_cache WHERE key IN (SELECT key FROM score_cache ORDER BY used DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+        self._conn.commit()
+
+    def purge(self):
+        """Evict the least recently used scores above max_disk_entries from disk."""
+        if self._conn is not None:
+            with self._lock:
+                self._evict()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._scores)
+
+    def snapshot(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / lookups if lookups else 0.0
+        return {"entries": len(self), "persistent": self._conn is not None, "hit_rate": round(hit_rate, 4), **self.stats}
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
@@ -0,0 +1,154 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from factcheck.utils.logger import CustomLogger
+from factcheck.utils.query_util import canonicalize_query
+
+logger = CustomLogger(__name__).getlog()
+
+# queries about ongoing events go stale quickly, everything else is stable for a day
+_TIME_SENSITIVE = re.compile(
+    r"\b(?:today|yesterday|tonight|now|current(?:ly)?|latest|recent(?:ly)?|breaking|live|this (?:week|month|year)|"
+    r"stock|price|weather|score|election results?)\b",
+    re.IGNORECASE,
+)
+
+DEFAULT_TTL_BY_CLASS = {
+    "time_sensitive": 3600,
+    "default": 24 * 3600,
+}
+
+
+def classify_query(query: str) -> str:
+    """Return the freshness class of a query: "time_sensitive" or "default"."""
+    return "time_sensitive" if _TIME_SENSITIVE.search(query) else "default"
+
+
+class SearchCache:
+    """Persistent cache of search API responses in a sqlite file.
+
+    Entries are keyed by the canonical query, the language and top_k, and expire after the
+    TTL of their query class. Responses without any result are cached too (negative caching)
+    but for a shorter time, so a query that found nothing is not paid for again right away.
+    The file can be shared by several worker processes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_by_class: dict = None,
+        negative_ttl: float = 900,
+        max_entries: int = 100000,
+        clock=time.time,
+    ):
+        """Initialize the SearchCache class
+
+        Args:
+            path (str): path of the sqlite file, created if missing.
+            ttl_by_class (dict, optional): seconds an entry stays fresh per query class. Defaults to DEFAULT_TTL_BY_CLASS.
+            negative_ttl (float, optional): seconds an empty result stays fresh. Defaults to 900.
+            max_entries (int, optional): the oldest entries are evicted above this size. Defaults to 100000.
+            clock (callable, optional): wall clock, used by tests. Defaults to time.time.
+        """
+        self.path = path
+        self.ttl_by_class = {**DEFAULT_TTL_BY_CLASS, **(ttl_by_class or {})}
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._num_puts = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL, expires REAL NOT NULL, "
+                "negative INTEGER NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS search_cache_expires ON search_cache (expires)")
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(query: str, lang: str, top_k: int) -> str:
+        return f"{lang}\x1f{top_k}\x1f{canonicalize_query(query)}"
+
+    def get(self, query: str, lang: str = "en", top_k: int = 3):
+        """Return the cached response of a query, or None on a miss or an expired entry."""
+        key = self.make_key(query, lang, top_k)
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT response, expires, negative FROM search_cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Search cache read failed: {e}")
+            self.stats["errors"] += 1
+            return None
+
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+        response, expires, negative = row
+        if expires <= self.clock():
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return None
+        self.stats["negative_hits" if negative else "hits"] += 1
+        return json.loads(response)
+
+    def put(self, query: str, response: dict, lang: str = "en", top_k: int = 3):
+        """Store the response of a query with the TTL of its query class, or the negative TTL if it found nothing."""
+        negative = not response.get("organic") and "answerBox" not in response
+        ttl = self.negative_ttl if negative else self.ttl_by_class.get(classify_query(query), self.ttl_by_class["default"])
+        now = self.clock()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, response, created, expires, negative) VALUES (?, ?, ?, ?, ?)",
+                    (self.make_key(query, lang, top_k), json.dumps(response), now, now + ttl, int(negative)),
+                )
+                self._conn.commit()
+                self._num_puts += 1
+                if self._num_puts % 1000 == 0:
+                    self._evict(now)
+        except sqlite3.Error as e:
+            logger.warning(f"Search cache write failed: {e}")
+            self.stats["errors"] += 1
+            return
+        self.stats["negative_stores" if negative else "stores"] += 1
+
+    def purge(self):
+        """Remove expired entries and evict the oldest ones above max_entries."""
+        with self._lock:
+            self._evict(self.clock())
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM search_cache WHERE expires <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM search_cache WHERE key IN "
+            "(SELECT key FROM search_cache ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+
+    def snapshot(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["negative_hits"] + self.stats["misses"]
+        hit_rate = (self.stats["hits"] + self.stats["negative_hits"]) / lookups if lookups else 0.0
+        return {"entries": len(self), "hit_rate": round(hit_rate, 3), **self.stats}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
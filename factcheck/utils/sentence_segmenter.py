@@ -0,0 +1,41 @@
+from factcheck.utils.logger import CustomLogger
+
+logger = CustomLogger(__name__).getlog()
+
+# characters of a text that are segmented, longer web texts are cut
+MAX_CHARS = 500000
+SEGMENTERS = ("rule", "parser")
+
+
+def load_segmenter(kind: str = "parser", model: str = "en_core_web_sm"):
+    """Return a spaCy pipeline whose docs have sentences.
+
+    "parser" runs the dependency parser of model to find the sentences. "rule" is a blank
+    English tokenizer with the rule-based sentencizer, which splits on sentence punctuation
+    only and needs no model: faster, but unpunctuated headings and list items of a page
+    run into the next sentence.
+    """
+    if kind not in SEGMENTERS:
+        raise NotImplementedError(f"Sentence segmenter {kind} not found!")
+    import spacy
+
+    if kind == "rule":
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+    else:
+        nlp = spacy.load(model, disable=["ner", "tagger", "lemmatizer"])
+    nlp.max_length = max(nlp.max_length, MAX_CHARS + 1)
+    return nlp
+
+
+def segment_texts(nlp, texts: list[str], n_process: int = 1, batch_size: int = 16) -> list[list[str]]:
+    """Return the sentences of every text, the texts going through nlp.pipe in batches.
+
+    With n_process > 1 spaCy segments in worker processes, started for every call: worth it
+    only for many long texts.
+    """
+    texts = [text[:MAX_CHARS] for text in texts]
+    if not texts:
+        return []
+    n_process = min(n_process, len(texts))
+    return [[sent.text for sent in doc.sents] for doc in nlp.pipe(texts, batch_size=batch_size, n_process=n_process)]
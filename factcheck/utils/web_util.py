@@ -3,8 +3,21 @@ import backoff
 import time
 import bs4
 import asyncio
+import atexit
+import codecs
+import importlib.util
+import os
+import re
+import threading
+import httpx
+from dataclasses import dataclass, field
+from urllib.parse import urldefrag, urlsplit
 from httpx import AsyncHTTPTransport
 from httpx._client import AsyncClient
+from factcheck.utils.circuit_breaker import get_breaker
+from factcheck.utils.domain_tracker import DomainTracker
+from factcheck.utils.html_extractor import extract_visible_text
+from factcheck.utils.page_cache import PageCache
 
 
 USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.14; rv:65.0) Gecko/20100101 Firefox/65.0"
@@ -12,6 +25,62 @@ USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.14; rv:65.0) Gecko/20100
 MOBILE_USER_AGENT = "Mozilla/5.0 (Linux; Android 7.0; SM-G930V Build/NRD90M) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/59.0.3071.125 Mobile Safari/537.36"
 headers = {"User-Agent": USER_AGENT}
 
+# content types worth parsing, anything else (pdf, images, archives, video) is dropped after the headers
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([A-Za-z0-9_\-:.]+)""", re.IGNORECASE)
+_BINARY_MAGIC = (b"%PDF", b"\x89PNG", b"GIF8", b"\xff\xd8\xff", b"PK\x03\x04", b"\x1f\x8b")
+
+
+@dataclass
+class CrawledPage:
+    """A fetched page: the (possibly truncated) body and what is needed to decode it.
+
+    Plain data, so it is cheap to keep and can be sent to parser worker processes.
+    """
+
+    url: str
+    status_code: int
+    content: bytes
+    encoding: str = "utf-8"
+    headers: dict = field(default_factory=dict)
+    truncated: bool = False
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+
+def detect_charset(content_type: str, head: bytes) -> str:
+    """Charset from the Content-Type header or a <meta> tag in the first bytes, utf-8 otherwise."""
+    for candidate in (_header_charset(content_type), _meta_charset(head)):
+        if candidate:
+            try:
+                return codecs.lookup(candidate).name
+            except LookupError:
+                continue
+    return "utf-8"
+
+
+def _header_charset(content_type: str):
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "charset":
+            return value.strip().strip("\"'")
+    return None
+
+
+def _meta_charset(head: bytes):
+    match = _META_CHARSET.search(head[:4096])
+    return match.group(1).decode("ascii", errors="ignore") if match else None
+
+
+def is_html_content(content_type: str, head: bytes = b"") -> bool:
+    """Whether a response looks like a parsable page, from its Content-Type or, without one, its first bytes."""
+    mime = content_type.split(";")[0].strip().lower()
+    if mime:
+        return mime in HTML_CONTENT_TYPES
+    return not head.startswith(_BINARY_MAGIC) and b"\x00" not in head[:512]
+
 
 def is_tag_visible(element: bs4.element) -> bool:
     """Determines if an HTML element is visible.
@@ -33,20 +102,275 @@ def is_tag_visible(element: bs4.element) -> bool:
     return True
 
 
-transport = AsyncHTTPTransport(retries=3)
+class CrawlerPool:
+    """One long-lived crawling client shared by all requests of the process.
+
+    The AsyncClient lives on a background event loop thread, so connections, DNS lookups and
+    TLS sessions are reused across crawl_web calls. At most max_connections fetches run at once
+    and at most max_per_host of them go to the same host. HTTP/2 is used when the h2 package
+    is installed. Timeouts follow the latency history of each domain and domains that keep
+    failing are skipped for a while (see DomainTracker).
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 32,
+        max_per_host: int = 4,
+        timeout: float = 3,
+        http2: bool = None,
+        max_bytes: int = 1 << 20,
+        page_cache=None,
+        domain_tracker=None,
+    ):
+        """Initialize the CrawlerPool class
+
+        Args:
+            max_connections (int, optional): maximum number of concurrent fetches. Defaults to 32.
+            max_per_host (int, optional): maximum number of concurrent fetches to one host. Defaults to 4.
+            timeout (float, optional): seconds to wait for a page of a domain without history. Defaults to 3.
+            http2 (bool, optional): enable HTTP/2, defaults to whether h2 is installed.
+            max_bytes (int, optional): bodies are cut off after this many bytes. Defaults to 1 MiB.
+            page_cache (PageCache, optional): serve and revalidate pages from disk. Defaults to None.
+            domain_tracker (DomainTracker, optional): per-domain timeouts and skip list. Defaults to an in-memory one.
+        """
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.http2 = importlib.util.find_spec("h2") is not None if http2 is None else http2
+        self.max_bytes = max_bytes
+        self.page_cache = page_cache
+        self.domains = domain_tracker if domain_tracker is not None else DomainTracker(default_timeout=timeout)
+        self.stats = {
+            "requests": 0,
+            "failures": 0,
+            "in_flight": 0,
+            "peak_in_flight": 0,
+            "host_waits": 0,
+            "skipped_content_type": 0,
+            "truncated": 0,
+            "bytes_read": 0,
+            "urls_requested": 0,
+            "duplicate_urls_skipped": 0,
+            "skipped_slow_domain": 0,
+            "stale_served": 0,
+        }
+        # stats are updated by the crawler loop and by the threads calling crawl_web
+        self._stats_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loop = None
+
+    def _ensure_started(self):
+        # started lazily, and again in a forked worker which does not inherit the loop thread
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._loop = asyncio.new_event_loop()
+            self._hosts = {}
+            threading.Thread(target=self._loop.run_forever, name="crawler-loop", daemon=True).start()
+            asyncio.run_coroutine_threadsafe(self._open(), self._loop).result()
+
+    async def _open(self):
+        limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        # one connect retry: with per-domain timeouts, more retries only multiply the cost of a dead host
+        self._transport = AsyncHTTPTransport(retries=1, http2=self.http2, limits=limits)
+        self._client = AsyncClient(transport=self._transport)
+        self._semaphore = asyncio.Semaphore(self.max_connections)
+
+    def _count(self, **deltas):
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                self.stats[name] += delta
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+
+    def run(self, coroutine):
+        """Run a coroutine on the crawler loop and wait for its result."""
+        self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    async def fetch(self, url: str, headers: dict):
+        """Fetch a page on the crawler loop, returns (flag, CrawledPage).
+
+        The body is streamed: non-HTML responses are dropped after the headers and the body
+        is cut off at max_bytes. A stale cached page is served when its revalidation times out
+        or the server answers with an error.
+        """
+        if urlsplit(url).path.lower().endswith(".pdf"):
+            self._count(skipped_content_type=1)
+            return False, None
+
+        # the page cache does sqlite and zlib work, kept off the loop so it does not stall the other fetches
+        loop = asyncio.get_running_loop()
+        cached = None
+        if self.page_cache is not None:
+            cached, fresh = await loop.run_in_executor(None, self.page_cache.get, url)
+            if fresh:
+                return True, _cached_page(cached)
+            if cached is not None:
+                # stale copy: ask the server whether it changed
+                headers = dict(headers)
+                if cached["etag"]:
+                    headers["If-None-Match"] = cached["etag"]
+                if cached["last_modified"]:
+                    headers["If-Modified-Since"] = cached["last_modified"]
+
+        host = urlsplit(url).hostname or ""
+        if self.domains.should_skip(host):
+            self._count(skipped_slow_domain=1)
+            return False, None
+        breaker = get_breaker("crawl")
+        if not breaker.allow_request():
+            return False, None
+
+        entry = self._hosts.get(host)
+        if entry is None:
+            entry = self._hosts[host] = [asyncio.Semaphore(self.max_per_host), 0]
+        entry[1] += 1
+        try:
+            if entry[0].locked():
+                self._count(host_waits=1)
+            async with entry[0], self._semaphore:
+                self._count(requests=1, in_flight=1)
+                start = time.monotonic()
+                try:
+                    timeout = self.domains.timeout(host)
+                    async with self._client.stream("GET", url, headers=headers, timeout=timeout) as response:
+                        latency = time.monotonic() - start
+                        status = response.status_code
+                        not_modified = response.status_code == 304 and cached is not None
+                        page = None if not_modified else await self._read_page(response, url)
+                finally:
+                    self._count(in_flight=-1)
+        except httpx.TransportError:
+            # only network-level failures count against the crawler circuit and the domain, bad pages do not
+            self._count(failures=1)
+            breaker.record_failure()
+            self.domains.record_failure(host)
+            if cached is not None:
+                self._count(stale_served=1)
+                return True, _cached_page(cached)
+            return False, None
+        except Exception as e:  # noqa: F841
+            self._count(failures=1)
+            breaker.record_success()
+            return False, None
+        except BaseException:
+            # a cancelled fetch says nothing about the upstream, but must give back a half-open probe slot
+            breaker.release()
+            raise
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._hosts[host]
+        breaker.record_success()
+        # time to the response headers, the body size is capped and does not say much about the server
+        self.domains.record_success(host, latency)
+        if not_modified:
+            await loop.run_in_executor(None, self.page_cache.refresh, url)
+            return True, _cached_page(cached)
+        if page is None:
+            if cached is not None and status >= 500:
+                self._count(stale_served=1)
+                return True, _cached_page(cached)
+            return False, None
+        if self.page_cache is not None:
+            await loop.run_in_executor(None, self.page_cache.put, url, page)
+        return True, page
+
+    async def _read_page(self, response: httpx.Response, url: str):
+        if response.status_code != 200:
+            return None
+        content_type = response.headers.get("content-type", "")
+        if content_type and not is_html_content(content_type):
+            self._count(skipped_content_type=1)
+            return None
+
+        chunks, size, truncated = [], 0, False
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                truncated = True
+                break
+        content = b"".join(chunks)[: self.max_bytes]
+        self._count(bytes_read=len(content))
+        if not content_type and not is_html_content("", content):
+            self._count(skipped_content_type=1)
+            return None
+        if truncated:
+            self._count(truncated=1)
+        return CrawledPage(
+            url=str(response.url),
+            status_code=response.status_code,
+            content=content,
+            encoding=detect_charset(content_type, content),
+            headers=dict(response.headers),
+            truncated=truncated,
+        )
+
+    def snapshot(self) -> dict:
+        cache = self.page_cache.snapshot() if self.page_cache is not None else None
+        connections = []
+        if self._loop is not None:
+            connections = getattr(getattr(self._transport, "_pool", None), "connections", [])
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {
+            **stats,
+            "active_hosts": len(self._hosts) if self._loop is not None else 0,
+            "open_connections": len(connections),
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_per_host": self.max_per_host,
+            "page_cache": cache,
+            "domains": self.domains.snapshot(),
+        }
+
+
+def _cached_page(entry: dict) -> CrawledPage:
+    return CrawledPage(
+        url=entry["final_url"],
+        status_code=200,
+        content=entry["content"],
+        encoding=entry["encoding"],
+        headers=entry["headers"],
+        truncated=entry["truncated"],
+    )
+
+
+_crawler = CrawlerPool()
+
+
+def configure_crawler(api_config: dict):
+    """Enable the optional on-disk state of the shared crawler from the api config.
+
+    PAGE_CACHE_PATH enables the page cache, DOMAIN_STATS_PATH persists the per-domain
+    timeouts and skip list across restarts.
+    """
+    page_cache_path = api_config.get("PAGE_CACHE_PATH")
+    if page_cache_path and (_crawler.page_cache is None or _crawler.page_cache.path != page_cache_path):
+        _crawler.page_cache = PageCache(page_cache_path)
+
+    domain_stats_path = api_config.get("DOMAIN_STATS_PATH")
+    if domain_stats_path and _crawler.domains.path != domain_stats_path:
+        _crawler.domains.path = domain_stats_path
+        if os.path.exists(domain_stats_path):
+            _crawler.domains.load(domain_stats_path)
+        atexit.register(_crawler.domains.save)
+
+
+def get_crawler() -> CrawlerPool:
+    return _crawler
+
+
+def crawler_stats() -> dict:
+    return _crawler.snapshot()
 
 
 async def httpx_get(url: str, headers: dict):
-    try:
-        async with AsyncClient(transport=transport) as client:
-            response = await client.get(url, headers=headers, timeout=3)
-            response = response if response.status_code == 200 else None
-            if not response:
-                return False, None
-            else:
-                return True, response
-    except Exception as e:  # noqa: F841
-        return False, None
+    # must run on the crawler loop, the shared client is bound to it
+    return await _crawler.fetch(url, headers)
 
 
 async def httpx_bind_key(url: str, headers: dict, key: str = ""):
@@ -55,15 +379,21 @@ async def httpx_bind_key(url: str, headers: dict, key: str = ""):
 
 
 def crawl_web(query_url_dict: dict):
-    tasks = list()
-    for query, urls in query_url_dict.items():
-        for url in urls:
-            task = httpx_bind_key(url=url, headers=headers, key=query)
-            tasks.append(task)
-    asyncio.set_event_loop(asyncio.SelectorEventLoop())
-    loop = asyncio.get_event_loop()
-    responses = loop.run_until_complete(asyncio.gather(*tasks))
-    return responses
+    """Fetch the urls of every query, each distinct url (fragment ignored) only once.
+
+    Returns:
+        list[tuple]: (flag, page, url, query) for every (query, url) pair, in input order. Pairs
+            with the same url share one CrawledPage.
+    """
+    pairs = [(query, url) for query, urls in query_url_dict.items() for url in urls]
+    unique_urls = list(dict.fromkeys(urldefrag(url).url for _, url in pairs))
+    _crawler._count(urls_requested=len(pairs), duplicate_urls_skipped=len(pairs) - len(unique_urls))
+
+    async def _gather():
+        return await asyncio.gather(*[httpx_get(url, headers) for url in unique_urls])
+
+    results = dict(zip(unique_urls, _crawler.run(_gather())))
+    return [(*results[urldefrag(url).url], url, query) for query, url in pairs]
 
 
 # @backoff.on_exception(backoff.expo, (requests.exceptions.RequestException, requests.exceptions.Timeout), max_tries=1,max_time=3)
@@ -75,30 +405,24 @@ def common_web_request(url: str, query: str = None, timeout: int = 3):
         return resp
 
 
-def parse_response(response: requests.Response, url: str, query: str = None):
+def parse_response(response: requests.Response, url: str, query: str = None, extractor: str = None):
     html_content = response.text
     url = url
     try:
-        soup = bs4.BeautifulSoup(html_content, "html.parser")
-        texts = soup.findAll(text=True)
-        # Filter out invisible text from the page.
-        visible_text = filter(is_tag_visible, texts)
+        # visible text with single spaces, see factcheck.utils.html_extractor for the backends
+        web_text = extract_visible_text(html_content, extractor=extractor)
     except Exception as _:  # noqa: F841
         return None, url, query
-
-    # Returns all the text concatenated as a string.
-    web_text = " ".join(t.strip() for t in visible_text).strip()
-    # Clean up spacing.
-    web_text = " ".join(web_text.split())
     return web_text, url, query
 
 
-def scrape_url(url: str, timeout: float = 3):
+def scrape_url(url: str, timeout: float = 3, extractor: str = None):
     """Scrapes a URL for all text information.
 
     Args:
         url: URL of webpage to scrape.
         timeout: Timeout of the requests call.
+        extractor: name of the text extractor, see factcheck.utils.html_extractor.
     Returns:
         web_text: The visible text of the scraped URL.
         url: URL input.
@@ -110,19 +434,11 @@ def scrape_url(url: str, timeout: float = 3):
     except requests.exceptions.RequestException as _:  # noqa: F841
         return None, url
 
-    # Extract out all text from the tags
+    # Extract out all visible text from the tags
     try:
-        soup = bs4.BeautifulSoup(response.text, "html.parser")
-        texts = soup.findAll(text=True)
-        # Filter out invisible text from the page.
-        visible_text = filter(is_tag_visible, texts)
+        web_text = extract_visible_text(response.text, extractor=extractor)
     except Exception as _:  # noqa: F841
         return None, url
-
-    # Returns all the text concatenated as a string.
-    web_text = " ".join(t.strip() for t in visible_text).strip()
-    # Clean up spacing.
-    web_text = " ".join(web_text.split())
     return web_text, url
 
 
@@ -0,0 +1,105 @@
+"""Benchmark of the memory-mapped dense index at corpus scale.
+
+Writes a synthetic index of --passages unit vectors (clustered, like real sentence
+embeddings, so the IVF partition is meaningful) as a flat index and as an IVF index, then
+reports build time, file size, memory, query latency for single queries and batches, and
+the recall@10 of IVF against the exact flat search.
+
+Memory is read from /proc/self/status: RssAnon is heap the process owns, RssFile the pages
+of the memory-mapped matrix currently cached, which the kernel reclaims under pressure.
+
+Usage: python bench_dense_index.py [--passages 1000000] [--dim 384] [--queries 100] [--dir /tmp/dense_bench]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factcheck.utils.bm25_index import write_passages  # noqa: E402
+from factcheck.utils.dense_index import DenseIndex, auto_nlist  # noqa: E402
+
+
+def memory_mb():
+    values = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("RssAnon", "RssFile"):
+                values[key] = int(value.split()[0]) / 1024
+    return values
+
+
+def synthetic_batches(num_passages, dim, clusters, batch_size=50_000, seed=0):
+    # the same topics (centers) for passages and queries, the seed only changes the samples
+    centers = np.random.default_rng(0).normal(size=(clusters, dim)).astype(np.float32)
+    rng = np.random.default_rng(seed + 1)
+    for start in range(0, num_passages, batch_size):
+        n = min(batch_size, num_passages - start)
+        vectors = centers[rng.integers(0, clusters, n)] + 0.5 * rng.normal(size=(n, dim)).astype(np.float32)
+        yield vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build(path, args, nlist):
+    shutil.rmtree(path, ignore_errors=True)
+    documents = ({"title": "", "url": f"doc://{i}", "text": f"passage {i}"} for i in range(args.passages))
+    start = time.perf_counter()
+    write_passages(documents, path)
+    batches = synthetic_batches(args.passages, args.dim, args.clusters)
+    DenseIndex.write_embeddings(path, batches, args.passages, "synthetic", nlist=nlist)
+    elapsed = time.perf_counter() - start
+    size_mb = os.path.getsize(os.path.join(path, "embeddings.npy")) / 1e6
+    print(f"built {os.path.basename(path)} index in {elapsed:.1f}s, embeddings.npy {size_mb:.0f} MB")
+
+
+def time_queries(index, queries, batch, **kwargs):
+    start = time.perf_counter()
+    results = []
+    for i in range(0, len(queries), batch):
+        results += index.search(queries[i : i + batch], top_k=10, **kwargs)
+    return (time.perf_counter() - start) / len(queries) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--passages", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--dir", default="/tmp/dense_bench")
+    args = parser.parse_args()
+    nlist = auto_nlist(args.passages) if args.nlist is None else args.nlist
+    flat_path, ivf_path = os.path.join(args.dir, "flat"), os.path.join(args.dir, "ivf")
+
+    print(f"{args.passages} passages, {args.dim} dimensions, {nlist} IVF lists\n")
+    build(flat_path, args, nlist=0)
+    build(ivf_path, args, nlist=max(nlist, 1))
+    queries = next(synthetic_batches(args.queries, args.dim, args.clusters, seed=1))
+
+    before = memory_mb()
+    flat, ivf = DenseIndex(flat_path), DenseIndex(ivf_path)
+    opened = memory_mb()
+    print(f"\nopening both indexes: RssAnon +{opened['RssAnon'] - before['RssAnon']:.0f} MB")
+
+    print(f"\n{'search':<24}{'ms/query':>10}{'recall@10':>11}{'RssAnon MB':>12}{'RssFile MB':>12}")
+    flat_ms, exact = time_queries(flat, queries[:10], batch=1)
+    mem = memory_mb()
+    print(f"{'flat, 1 query':<24}{flat_ms:>10.1f}{1.0:>11.3f}{mem['RssAnon']:>12.0f}{mem['RssFile']:>12.0f}")
+    flat_ms, exact = time_queries(flat, queries, batch=32)
+    mem = memory_mb()
+    print(f"{'flat, batches of 32':<24}{flat_ms:>10.1f}{1.0:>11.3f}{mem['RssAnon']:>12.0f}{mem['RssFile']:>12.0f}")
+    for nprobe in (4, 16, 64):
+        ivf_ms, approximate = time_queries(ivf, queries, batch=1, nprobe=nprobe)
+        recall = np.mean([len({p for p, _ in a} & {p for p, _ in e}) / 10 for a, e in zip(approximate, exact)])
+        mem = memory_mb()
+        label = f"ivf, nprobe={nprobe}"
+        print(f"{label:<24}{ivf_ms:>10.2f}{recall:>11.3f}{mem['RssAnon']:>12.0f}{mem['RssFile']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
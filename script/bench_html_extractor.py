@@ -0,0 +1,74 @@
+"""Benchmark of the HTML-to-text extractors.
+
+Runs every page of a corpus of saved pages (html_corpus/ by default) through each backend
+of factcheck.utils.html_extractor and reports throughput and whether the output matches the
+bs4 reference, i.e. the visible-text semantics the crawler has always used.
+
+Usage: python bench_html_extractor.py [--corpus DIR] [--repeat 50]
+"""
+
+import argparse
+import difflib
+import glob
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factcheck.utils.html_extractor import EXTRACTORS, get_extractor  # noqa: E402
+
+
+def load_corpus(directory):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.htm*"))):
+        with open(path, "rb") as f:
+            pages.append((os.path.basename(path), f.read().decode("utf-8", errors="replace")))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "html_corpus"))
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    total_mb = sum(len(html.encode("utf-8")) for _, html in pages) / 1e6
+    reference = {name: get_extractor("bs4").extract(html) for name, html in pages}
+
+    backends = []
+    for backend, cls in EXTRACTORS.items():
+        if not cls.full_text:
+            # main-content extraction is compared in bench_main_content.py
+            continue
+        try:
+            backends.append(get_extractor(backend))
+        except ImportError as e:
+            print(f"skipping {backend}: {e}")
+
+    print(f"{len(pages)} pages, {total_mb:.2f} MB, {args.repeat} repeats\n")
+    print(f"{'backend':<10}{'pages/s':>10}{'MB/s':>8}{'speedup':>9}{'identical':>11}{'similarity':>12}")
+    bs4_rate = None
+    for extractor in backends:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for _, html in pages:
+                extractor.extract(html)
+        elapsed = time.perf_counter() - start
+        rate = len(pages) * args.repeat / elapsed
+        bs4_rate = bs4_rate or (rate if extractor.name == "bs4" else None)
+
+        identical, similarity = 0, 0.0
+        for name, html in pages:
+            output = extractor.extract(html)
+            identical += output == reference[name]
+            similarity += difflib.SequenceMatcher(None, output.split(), reference[name].split()).ratio()
+        speedup = f"{rate / bs4_rate:.1f}x" if bs4_rate else "-"
+        print(
+            f"{extractor.name:<10}{rate:>10.0f}{total_mb * args.repeat / elapsed:>8.1f}{speedup:>9}"
+            f"{identical:>6}/{len(pages):<4}{similarity / len(pages):>12.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Benchmark of main-content extraction before passage reranking.
+
+Runs every page of a corpus of saved pages (html_corpus/ by default) through the full
+visible-text extractor ("stream") and the main-content extractor ("main_content"), chunks
+both with BaseRetriever._chunk_text and reports words and passages per page. With spaCy and
+sentence-transformers installed it also times the cross-encoder rerank of every passage
+against a query, as BaseRetriever does; without them sentences are split on punctuation
+(marked "approx") and the rerank timing is skipped.
+
+Usage: python bench_main_content.py [--corpus DIR] [--query "..."] [--repeat 3]
+"""
+
+import argparse
+import glob
+import logging
+import os
+import re
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factcheck.core.Retriever.base import BaseRetriever  # noqa: E402
+from factcheck.utils.html_extractor import get_extractor  # noqa: E402
+
+
+class _Sentence:
+    def __init__(self, text):
+        self.text = text
+
+
+class _RegexSentencizer:
+    """Stand-in for the spaCy tokenizer: splits after . ! ? and their CJK forms."""
+
+    def __call__(self, text):
+        parts = re.split(r"(?<=[.!?。！？])\s+|(?<=[。！？])", text)
+        return SimpleNamespace(sents=[_Sentence(p) for p in parts if p.strip()])
+
+
+def load_corpus(directory):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.htm*"))):
+        with open(path, "rb") as f:
+            pages.append((os.path.basename(path), f.read().decode("utf-8", errors="replace")))
+    return pages
+
+
+def load_tokenizer():
+    try:
+        import spacy
+
+        return spacy.load("en_core_web_sm", disable=["ner", "tagger", "lemmatizer"]), "spacy"
+    except (ImportError, OSError) as e:
+        print(f"spaCy not available ({e}), splitting sentences on punctuation")
+        return _RegexSentencizer(), "approx"
+
+
+def load_ranker():
+    try:
+        from sentence_transformers import CrossEncoder
+
+        return CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2", max_length=512)
+    except Exception as e:
+        print(f"cross-encoder not available ({e}), skipping rerank timing")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "html_corpus"))
+    parser.add_argument("--query", default="When was it built and how tall is it?")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # _chunk_text logs every text length
+    logging.disable(logging.INFO)
+    pages = load_corpus(args.corpus)
+    tokenizer, split_mode = load_tokenizer()
+    ranker = load_ranker()
+    # _chunk_text only needs the window settings of a retriever
+    retriever = SimpleNamespace(sentences_per_passage=10, sliding_distance=8)
+
+    totals = {}
+    print(f"{len(pages)} pages, sentence split: {split_mode}\n")
+    print(f"{'page':<22}{'extractor':<14}{'words':>7}{'passages':>10}{'extract ms':>12}{'rerank ms':>11}")
+    for name, html in pages:
+        for extractor_name in ("stream", "main_content"):
+            extractor = get_extractor(extractor_name)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                text = extractor.extract(html)
+            extract_ms = (time.perf_counter() - start) / args.repeat * 1000
+            passages = BaseRetriever._chunk_text(retriever, text, tokenizer)
+
+            rerank_ms = None
+            if ranker is not None and passages:
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    ranker.predict([(args.query, p[0]) for p in passages])
+                rerank_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+            total = totals.setdefault(extractor_name, [0, 0, 0.0, 0.0])
+            total[0] += len(text.split())
+            total[1] += len(passages)
+            total[2] += extract_ms
+            total[3] += rerank_ms or 0.0
+            rerank = f"{rerank_ms:.1f}" if rerank_ms is not None else "-"
+            print(f"{name:<22}{extractor_name:<14}{len(text.split()):>7}{len(passages):>10}{extract_ms:>12.2f}{rerank:>11}")
+
+    print()
+    for extractor_name, (words, passages, extract_ms, rerank_ms) in totals.items():
+        rerank = f"{rerank_ms / len(pages):.1f}" if ranker is not None else "-"
+        print(
+            f"{'per page':<22}{extractor_name:<14}{words / len(pages):>7.0f}{passages / len(pages):>10.1f}"
+            f"{extract_ms / len(pages):>12.2f}{rerank:>11}"
+        )
+    before, after = totals["stream"], totals["main_content"]
+    if after[1]:
+        print(f"\npassages to rerank: {before[1]} -> {after[1]} ({before[1] / after[1]:.2f}x fewer)")
+    if ranker is not None and after[3]:
+        print(f"rerank time: {before[3]:.1f} ms -> {after[3]:.1f} ms ({before[3] / after[3]:.2f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Throughput of the passage ranker backends on the CPU.
+
+Scores the (query, passage) pairs of a request built from html_corpus/ (see
+bench_ranker_batching.py) with PassageRanker, once with the PyTorch float32 cross-encoder and
+once with the int8 ONNX export (export_onnx_ranker.py), at each of --threads intra-op thread
+counts, and reports pairs per second. The "auto" row uses ranker_threads(), the CPUs of this
+process divided by --workers server processes.
+
+Needs torch, sentence-transformers, onnxruntime and tokenizers.
+
+Usage: python bench_onnx_ranker.py --onnx-path ./cache/ranker_onnx [--threads 1,2,4] [--workers 2] [--claims 8]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_main_content import load_corpus, load_tokenizer  # noqa: E402
+from bench_ranker_batching import build_requests  # noqa: E402
+from factcheck.utils.onnx_ranker import OnnxCrossEncoder, ranker_threads  # noqa: E402
+from factcheck.utils.passage_ranker import PassageRanker, cross_encoder  # noqa: E402
+
+
+def pairs_per_second(ranker, pairs, repeat):
+    ranker.score(pairs[: ranker.batch_size])  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        ranker.score(pairs)
+    return len(pairs) * repeat / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--onnx-path", required=True)
+    parser.add_argument("--corpus", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "html_corpus"))
+    parser.add_argument("--claims", type=int, default=8)
+    parser.add_argument("--threads", default="1,2,4")
+    parser.add_argument("--workers", type=int, default=2, help="server processes sharing the CPUs, see Procfile")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    import torch
+
+    logging.disable(logging.INFO)
+    tokenizer, _ = load_tokenizer()
+    pairs = [pair for pairs in build_requests(load_corpus(args.corpus), tokenizer, args.claims) for pair in pairs]
+    auto = ranker_threads(args.workers)
+    thread_counts = [(f"{n}", n) for n in map(int, args.threads.split(","))] + [(f"auto ({auto})", auto)]
+    print(f"{len(pairs)} pairs, batch size {args.batch_size}, {os.cpu_count()} CPUs\n")
+
+    torch_model = cross_encoder(device="cpu")
+    print(f"{'threads':<12}{'torch fp32':>12}{'onnx int8':>12}{'speedup':>9}")
+    for label, num_threads in thread_counts:
+        torch.set_num_threads(num_threads)
+        torch_rate = pairs_per_second(PassageRanker(model=torch_model, batch_size=args.batch_size), pairs, args.repeat)
+        onnx_model = OnnxCrossEncoder(args.onnx_path, num_threads=num_threads)
+        onnx_rate = pairs_per_second(PassageRanker(model=onnx_model, batch_size=args.batch_size), pairs, args.repeat)
+        print(f"{label:<12}{torch_rate:>12.1f}{onnx_rate:>12.1f}{onnx_rate / torch_rate:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Microbenchmark of the IPC overhead of handing crawled pages to parse worker processes.
+
+The workers do no parsing here, they only touch what they receive, so the time per page is
+the cost of getting a page into a worker and an answer back:
+
+  response, new pool     one httpx.Response per task, a new pool per batch (the old retriever path)
+  response, persistent   one httpx.Response per task, workers kept between batches
+  bytes, chunked         (body, encoding) pairs, a few tasks per worker (ParsePool below shm_min_bytes)
+  shared memory          bodies written once to a shared segment, workers read spans (ParsePool above it)
+
+Pages are taken from html_corpus/ and padded to --page-kb to model real page sizes. The last
+line times a real batch through ParsePool for comparison with the extraction work itself.
+
+Usage: python bench_parse_ipc.py [--pages 30] [--page-kb 100] [--batches 20] [--workers N]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factcheck.utils.parse_pool import ParsePool  # noqa: E402
+
+
+def _touch_response(response):
+    return len(response.content)
+
+
+def _touch_bodies(bodies):
+    return [len(body) for body, _ in bodies]
+
+
+def _touch_shared(name, spans):
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+        return [len(segment.buf[offset : offset + length]) for offset, length, _ in spans]
+    finally:
+        segment.close()
+
+
+def load_bodies(num_pages, page_kb):
+    directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "html_corpus")
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.htm*"))):
+        with open(path, "rb") as f:
+            corpus.append(f.read())
+    bodies = []
+    for i in range(num_pages):
+        body = corpus[i % len(corpus)]
+        # repeat the page body, as real pages carry far more markup than the samples
+        bodies.append(body * max(1, page_kb * 1024 // len(body)))
+    return bodies
+
+
+def make_response(url, body):
+    headers = {"content-type": "text/html; charset=utf-8", "server": "nginx", "cache-control": "max-age=600"}
+    response = httpx.Response(200, headers=headers, content=body, request=httpx.Request("GET", url, headers=headers))
+    response.read()
+    return response
+
+
+def run(label, batches, num_pages, fn):
+    start = time.perf_counter()
+    for _ in range(batches):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24}{elapsed / batches * 1000:>10.1f}{elapsed / (batches * num_pages) * 1e6:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--page-kb", type=int, default=100)
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    bodies = load_bodies(args.pages, args.page_kb)
+    responses = [make_response(f"https://example.com/{i}", body) for i, body in enumerate(bodies)]
+    pairs = [(body, "utf-8") for body in bodies]
+    pool = ParsePool(max_workers=args.workers)
+    resource_tracker.ensure_running()
+    persistent = ProcessPoolExecutor(max_workers=args.workers)
+    persistent.submit(len, b"").result()  # start the workers outside the timing
+
+    def response_new_pool():
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            [f.result() for f in [executor.submit(_touch_response, r) for r in responses]]
+
+    def response_persistent():
+        [f.result() for f in [persistent.submit(_touch_response, r) for r in responses]]
+
+    def bytes_chunked():
+        [f.result() for f in [persistent.submit(_touch_bodies, chunk) for chunk in pool._chunks(pairs)]]
+
+    def shared():
+        segment = shared_memory.SharedMemory(create=True, size=sum(len(b) for b in bodies))
+        try:
+            spans, offset = [], 0
+            for body in bodies:
+                segment.buf[offset : offset + len(body)] = body
+                spans.append((offset, len(body), "utf-8"))
+                offset += len(body)
+            [f.result() for f in [persistent.submit(_touch_shared, segment.name, c) for c in pool._chunks(spans)]]
+        finally:
+            segment.close()
+            segment.unlink()
+
+    total_mb = sum(len(b) for b in bodies) / 1e6
+    print(f"{args.pages} pages of ~{args.page_kb} KB ({total_mb:.1f} MB) per batch, {args.workers} workers\n")
+    print(f"{'transfer':<24}{'ms/batch':>10}{'us/page':>12}")
+    run("response, new pool", args.batches, args.pages, response_new_pool)
+    run("response, persistent", args.batches, args.pages, response_persistent)
+    run("bytes, chunked", args.batches, args.pages, bytes_chunked)
+    run("shared memory", args.batches, args.pages, shared)
+    persistent.shutdown()
+
+    pool.parse(pairs[:1])  # start the workers outside the timing
+    run("ParsePool, full parse", max(1, args.batches // 10), args.pages, lambda: pool.parse(pairs))
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
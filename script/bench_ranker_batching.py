@@ -0,0 +1,122 @@
+"""Benchmark of cross-encoder batching for passage reranking.
+
+Builds the (query, passage) pairs of a request of --claims claims, 3 queries each, from the
+pages of html_corpus/ (chunked as BaseRetriever does) and scores them three ways:
+
+  per query      one predict per query, as BaseRetriever did before
+  one pass       every pair of the request in one predict, in input order
+  one pass, len  every pair in one predict, sorted by length (PassageRanker)
+
+For each it reports forward passes, the tokens the model processes including padding and the
+share of padding. Token counts come from the model's tokenizer when sentence-transformers is
+installed, otherwise they are estimated as words and punctuation marks (marked "approx"),
+and only then are pairs/second timed on the CPU.
+
+Usage: python bench_ranker_batching.py [--claims 8] [--batch-size 32] [--repeat 3]
+"""
+
+import argparse
+import itertools
+import logging
+import os
+import re
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_main_content import load_corpus, load_ranker, load_tokenizer  # noqa: E402
+from factcheck.core.Retriever.base import BaseRetriever  # noqa: E402
+from factcheck.utils.html_extractor import get_extractor  # noqa: E402
+from factcheck.utils.passage_ranker import PassageRanker, pair_length  # noqa: E402
+
+QUERIES = [
+    "When was it built?",
+    "How tall is it and who designed it?",
+    "What are the main findings reported in 2023 and how do they compare with earlier years?",
+    "Who is responsible?",
+    "What does the product cost and which countries is it sold in?",
+    "Is it true?",
+]
+
+
+def build_requests(pages, tokenizer, num_claims, pages_per_query=3):
+    """Per query of every claim, the passages of pages_per_query pages of the corpus."""
+    retriever = SimpleNamespace(sentences_per_passage=10, sliding_distance=8)
+    extractor = get_extractor("main_content")
+    texts = [extractor.extract(html) for _, html in pages]
+    text_cycle, query_cycle = itertools.cycle(texts), itertools.cycle(QUERIES)
+    query_pairs = []
+    for _ in range(num_claims * 3):
+        query = next(query_cycle)
+        weball = "".join(next(text_cycle) for _ in range(pages_per_query))
+        passages = BaseRetriever._chunk_text(retriever, weball, tokenizer)
+        query_pairs.append([(query, p[0]) for p in passages])
+    return query_pairs
+
+
+def token_counter(ranker, max_length=512):
+    if ranker is not None:
+        tokenizer = ranker.tokenizer
+        return lambda pair: min(max_length, len(tokenizer(*pair)["input_ids"])), "tokenizer"
+    # [CLS] query [SEP] passage [SEP], words and punctuation as tokens
+    return lambda pair: min(max_length, len(re.findall(r"\w+|[^\w\s]", pair[0] + " " + pair[1])) + 3), "approx"
+
+
+def padded_tokens(batches, count):
+    real = padded = 0
+    for batch in batches:
+        lengths = [count(pair) for pair in batch]
+        real += sum(lengths)
+        padded += max(lengths) * len(lengths)
+    return real, padded
+
+
+def split(pairs, batch_size):
+    return [pairs[i : i + batch_size] for i in range(0, len(pairs), batch_size)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "html_corpus"))
+    parser.add_argument("--claims", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    tokenizer, split_mode = load_tokenizer()
+    model = load_ranker()
+    count, count_mode = token_counter(model)
+    query_pairs = build_requests(load_corpus(args.corpus), tokenizer, args.claims)
+    all_pairs = [pair for pairs in query_pairs for pair in pairs]
+    print(
+        f"{args.claims} claims, {len(query_pairs)} queries, {len(all_pairs)} pairs, batch size {args.batch_size}, "
+        f"sentence split: {split_mode}, tokens: {count_mode}\n"
+    )
+
+    modes = {
+        "per query": [batch for pairs in query_pairs for batch in split(pairs, args.batch_size)],
+        "one pass": split(all_pairs, args.batch_size),
+        "one pass, len": split(sorted(all_pairs, key=pair_length), args.batch_size),
+    }
+    print(f"{'mode':<16}{'passes':>8}{'tokens':>10}{'padded':>10}{'padding':>9}{'pairs/s':>10}")
+    for name, batches in modes.items():
+        real, padded = padded_tokens(batches, count)
+        rate = "-"
+        if model is not None:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                if name == "per query":
+                    for pairs in query_pairs:
+                        model.predict(pairs, batch_size=args.batch_size, show_progress_bar=False)
+                else:
+                    PassageRanker(model=model, batch_size=args.batch_size, sort_by_length=name.endswith("len")).score(
+                        all_pairs
+                    )
+            rate = f"{len(all_pairs) * args.repeat / (time.perf_counter() - start):.0f}"
+        print(f"{name:<16}{len(batches):>8}{real:>10}{padded:>10}{1 - real / padded:>9.1%}{rate:>10}")
+
+
+if __name__ == "__main__":
+    main()
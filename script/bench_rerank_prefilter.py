@@ -0,0 +1,81 @@
+"""Benchmark of the prefilter stage before cross-encoder reranking.
+
+Builds the (query, passage) pairs of a request of --claims claims, 3 queries each, every query
+with the passages of --pages pages of html_corpus/, and compares the full cross-encoder rerank
+with the two-stage one for each --top-n: the BM25 prefilter (and the bi-encoder one with
+--bi-encoder) keeps the N best passages of a query and only those are reranked.
+
+Reported per N: passages reranked, prefilter and rerank time per request, and recall@5, the
+share of the 5 best passages of the full rerank that the prefilter kept. The rerank time and
+recall need sentence-transformers; without it only the prefilter is timed.
+
+Usage: python bench_rerank_prefilter.py [--claims 8] [--pages 6] [--top-n 5,10,20] [--bi-encoder]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_main_content import load_corpus, load_ranker, load_tokenizer  # noqa: E402
+from bench_ranker_batching import build_requests  # noqa: E402
+from factcheck.utils.passage_prefilter import BiEncoderPrefilter, BM25Prefilter, prefilter_recall  # noqa: E402
+from factcheck.utils.passage_ranker import PassageRanker  # noqa: E402
+
+
+def rerank(ranker, query_passages, kept):
+    """Cross-encoder scores of the kept passages of every query, and the time it took."""
+    pairs = [(query, passages[i]) for (query, passages), indices in zip(query_passages, kept) for i in indices]
+    start = time.perf_counter()
+    scores = iter(ranker.score(pairs))
+    elapsed = time.perf_counter() - start
+    return [[next(scores) for _ in indices] for indices in kept], elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "html_corpus"))
+    parser.add_argument("--claims", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=6, help="pages concatenated per query")
+    parser.add_argument("--top-n", default="5,10,20")
+    parser.add_argument("--bi-encoder", action="store_true")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    tokenizer, split_mode = load_tokenizer()
+    model = load_ranker()
+    requests = build_requests(load_corpus(args.corpus), tokenizer, args.claims, pages_per_query=args.pages)
+    query_passages = [(pairs[0][0], [passage for _, passage in pairs]) for pairs in requests if pairs]
+    num_passages = sum(len(passages) for _, passages in query_passages)
+    print(f"{len(query_passages)} queries, {num_passages} passages, sentence split: {split_mode}\n")
+
+    ranker = PassageRanker(model=model) if model is not None else None
+    full_scores = None
+    if ranker is not None:
+        full_kept = [list(range(len(passages))) for _, passages in query_passages]
+        full_scores, full_seconds = rerank(ranker, query_passages, full_kept)
+    prefilters = [BM25Prefilter()] + ([BiEncoderPrefilter()] if args.bi_encoder else [])
+
+    print(f"{'stage':<18}{'reranked':>10}{'prefilter ms':>14}{'rerank ms':>11}{'recall@5':>10}")
+    if full_scores is not None:
+        print(f"{'full rerank':<18}{num_passages:>10}{0:>14.1f}{full_seconds * 1000:>11.1f}{1:>10.3f}")
+    for prefilter in prefilters:
+        for n in map(int, args.top_n.split(",")):
+            start = time.perf_counter()
+            kept = prefilter.select(query_passages, n)
+            prefilter_ms = (time.perf_counter() - start) * 1000
+            rerank_ms, recall = "-", "-"
+            if full_scores is not None:
+                _, seconds = rerank(PassageRanker(model=model), query_passages, kept)
+                rerank_ms = f"{seconds * 1000:.1f}"
+                recall = f"{np.mean([prefilter_recall(s, k, 5) for s, k in zip(full_scores, kept)]):.3f}"
+            label = f"{prefilter.name}, N={n}"
+            print(f"{label:<18}{sum(map(len, kept)):>10}{prefilter_ms:>14.1f}{rerank_ms:>11}{recall:>10}")
+
+
+if __name__ == "__main__":
+    main()
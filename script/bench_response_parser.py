@@ -0,0 +1,66 @@
+"""Microbenchmark of the shared LLM response parser.
+
+Runs every recorded response in malformed_responses.json through `parse_json_response`
+and through the cleanup that used to be copy-pasted in Decompose, and reports the time
+per call and how many responses each approach recovers.
+
+Usage: python bench_response_parser.py [--repeat 2000]
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factcheck.utils.response_parser import ResponseParseError, parse_json_response  # noqa: E402
+
+
+def legacy_parse(response):
+    """The cleanup previously inlined in Decompose.getclaims / restore_claims."""
+    cleaned_response = response.strip()
+    if cleaned_response.startswith("{") and not cleaned_response.endswith("}"):
+        cleaned_response += "}"
+    elif cleaned_response.startswith("{{") and not cleaned_response.endswith("}}"):
+        cleaned_response = cleaned_response[1:-1] if cleaned_response.endswith("}") else cleaned_response[1:] + "}"
+    cleaned_response = re.sub(r"```(?:json)?\s*([\s\S]*?)\s*```", r"\1", cleaned_response).strip()
+    try:
+        return json.loads(cleaned_response)
+    except json.JSONDecodeError:
+        # the legacy code eval()ed the response, literal_eval parses the same literals without running model output
+        return ast.literal_eval(cleaned_response)
+
+
+def try_parse(parser, response):
+    try:
+        return parser(response)
+    except (ResponseParseError, Exception):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "malformed_responses.json"), encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    print(f"{'case':<30}{'new (us)':>10}{'legacy (us)':>13}  new/legacy correct")
+    totals = {"new": 0, "legacy": 0}
+    for case in corpus:
+        row = []
+        for name, fn in (("new", parse_json_response), ("legacy", legacy_parse)):
+            elapsed = timeit.timeit(lambda: try_parse(fn, case["response"]), number=args.repeat)
+            row.append(elapsed / args.repeat * 1e6)
+            totals[name] += try_parse(fn, case["response"]) == case["expected"]
+        correct = [try_parse(fn, case["response"]) == case["expected"] for fn in (parse_json_response, legacy_parse)]
+        print(f"{case['name']:<30}{row[0]:>10.1f}{row[1]:>13.1f}  {correct[0]!s:>5}/{correct[1]!s:<5}")
+    print(f"\nRecovered: new {totals['new']}/{len(corpus)}, legacy {totals['legacy']}/{len(corpus)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Benchmark of sentence segmentation for passage chunking.
+
+Segments the main-content text of every page of html_corpus/ (repeated --copies times, the
+pages of a request) in these modes:
+
+  parser          en_core_web_sm with its dependency parser, one call per text (the old path)
+  rule            blank English tokenizer with the rule-based sentencizer, one call per text
+  rule, pipe      the same, all texts in one nlp.pipe (BaseRetriever)
+  rule, pipe x2   nlp.pipe with 2 worker processes
+  regex           split after sentence punctuation, no spaCy, as a floor
+
+Each mode runs in its own process and reports characters/second and the peak memory (RSS)
+of that process. Against the first mode that ran, it reports the share of sentence
+boundaries found (recall), the share of boundaries that are right (precision) and the share
+of its passages (BaseRetriever's chunking) that are identical; the reference mode is named
+in the output. The parser is the reference the other modes should be judged against, without
+en_core_web_sm "rule" takes its place and the numbers say nothing about the parser. Without
+spaCy only "regex" runs.
+
+Usage: python bench_sentence_split.py [--corpus DIR] [--copies 4] [--repeat 3]
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_main_content import _RegexSentencizer, load_corpus  # noqa: E402
+from factcheck.core.Retriever.base import chunk_sentences  # noqa: E402
+from factcheck.utils.html_extractor import get_extractor  # noqa: E402
+from factcheck.utils.sentence_segmenter import load_segmenter, segment_texts  # noqa: E402
+
+MODES = ["parser", "rule", "rule, pipe", "rule, pipe x2", "regex"]
+
+
+def load_texts(corpus, copies):
+    extractor = get_extractor("main_content")
+    return [extractor.extract(html) for _, html in load_corpus(corpus)] * copies
+
+
+def run_mode(mode, texts, repeat):
+    """Sentences of every text and the seconds per pass over all texts."""
+    if mode == "regex":
+        nlp = _RegexSentencizer()
+    else:
+        nlp = load_segmenter("parser" if mode == "parser" else "rule")
+    start = time.perf_counter()
+    for _ in range(repeat):
+        if "pipe" in mode:
+            sentences = segment_texts(nlp, texts, n_process=2 if mode.endswith("x2") else 1)
+        else:
+            sentences = [[s.text for s in nlp(text[:500000]).sents] for text in texts]
+    return sentences, (time.perf_counter() - start) / repeat
+
+
+def boundaries(sentences):
+    """Ends of the sentences of a text, as offsets in the text without whitespace."""
+    ends, offset = set(), 0
+    for sentence in sentences:
+        offset += len(re.sub(r"\s", "", sentence))
+        ends.add(offset)
+    return ends
+
+
+def child(args):
+    logging.disable(logging.INFO)
+    texts = load_texts(args.corpus, args.copies)
+    try:
+        sentences, seconds = run_mode(args.mode, texts, args.repeat)
+    except (ImportError, OSError) as e:
+        print(json.dumps({"error": str(e)}))
+        return
+    # ru_maxrss is in kilobytes on Linux
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"sentences": sentences, "seconds": seconds, "rss_mb": rss_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "html_corpus"))
+    parser.add_argument("--copies", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        return child(args)
+
+    logging.disable(logging.INFO)
+    num_chars = sum(len(text) for text in load_texts(args.corpus, args.copies))
+    print(f"{num_chars} chars in {args.copies} copies of the corpus, {args.repeat} passes per mode\n")
+    print(f"{'mode':<16}{'chars/s':>12}{'peak MB':>9}{'sents':>8}{'recall':>8}{'precision':>11}{'passages':>10}")
+    reference = None
+    for mode in MODES:
+        command = [sys.executable, os.path.abspath(__file__), "--mode", mode, "--corpus", args.corpus]
+        command += ["--copies", str(args.copies), "--repeat", str(args.repeat)]
+        result = json.loads(subprocess.run(command, capture_output=True, text=True, check=True).stdout)
+        if "error" in result:
+            print(f"{mode:<16}skipped: {result['error']}")
+            continue
+        sentences = result["sentences"]
+        if reference is None:
+            reference = sentences
+            print(f"{'':<16}(reference for recall, precision and passages: {mode})")
+        found = correct = total = 0
+        same_passages = num_passages = 0
+        for ref, cand in zip(reference, sentences):
+            ref_ends, cand_ends = boundaries(ref), boundaries(cand)
+            found += len(ref_ends & cand_ends)
+            total += len(ref_ends)
+            correct += len(cand_ends)
+            ref_passages = {p[0] for p in chunk_sentences(ref, 10, 8)}
+            same_passages += len(ref_passages & {p[0] for p in chunk_sentences(cand, 10, 8)})
+            num_passages += len(ref_passages)
+        print(
+            f"{mode:<16}{num_chars / result['seconds']:>12.0f}{result['rss_mb']:>9.0f}"
+            f"{sum(map(len, sentences)):>8}{found / max(total, 1):>8.1%}{found / max(correct, 1):>11.1%}"
+            f"{same_passages / max(num_passages, 1):>10.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
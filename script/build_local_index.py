@@ -0,0 +1,83 @@
+"""Build the local BM25 index used by the "local_bm25" retriever, or with --dense the
+embedding index used by the "local_dense" retriever.
+
+The input is either a JSON lines file with one {"title", "url", "text"} document per line
+(e.g. a Wikipedia dump converted with wikiextractor --json) or a directory of .txt files,
+each one a document titled by its file name. Pass --query to try the index afterwards.
+
+Usage: python build_local_index.py --input docs.jsonl --output ./cache/local_index [--query "..."]
+       python build_local_index.py --input docs.jsonl --output ./cache/local_dense_index --dense [--nlist N]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factcheck.utils.bm25_index import BM25Index  # noqa: E402
+from factcheck.utils.dense_index import DEFAULT_MODEL, DenseIndex, sentence_transformer_encoder  # noqa: E402
+
+
+def read_documents(path):
+    if os.path.isdir(path):
+        for file_path in sorted(glob.glob(os.path.join(path, "**", "*.txt"), recursive=True)):
+            with open(file_path, encoding="utf-8", errors="replace") as f:
+                title = os.path.splitext(os.path.basename(file_path))[0]
+                yield {"title": title, "url": os.path.abspath(file_path), "text": f.read()}
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", required=True, help="JSON lines file or directory of .txt files")
+    parser.add_argument("--output", required=True, help="index directory")
+    parser.add_argument("--passage-words", type=int, default=120)
+    parser.add_argument("--stride", type=int, default=100)
+    parser.add_argument("--query", default=None)
+    parser.add_argument("--dense", action="store_true", help="build an embedding index instead of BM25")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="sentence-transformers model of a dense index")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF lists of a dense index, 0 for flat")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.dense:
+        encode = sentence_transformer_encoder(args.model)
+        index = DenseIndex.build(
+            read_documents(args.input),
+            args.output,
+            encode=encode,
+            model_name=args.model,
+            nlist=args.nlist,
+            passage_words=args.passage_words,
+            stride=args.stride,
+        )
+        details = f"{index.meta['dim']} dimensions, {index.nlist} IVF lists"
+    else:
+        index = BM25Index.build(
+            read_documents(args.input), args.output, passage_words=args.passage_words, stride=args.stride
+        )
+        details = f"{index.meta['num_terms']} terms"
+    size_mb = sum(os.path.getsize(p) for p in glob.glob(os.path.join(args.output, "*"))) / 1e6
+    print(
+        f"{index.meta['num_documents']} documents, {index.num_passages} passages, {details}, "
+        f"{size_mb:.1f} MB in {time.perf_counter() - start:.1f}s"
+    )
+
+    if args.query:
+        start = time.perf_counter()
+        results = index.search(encode([args.query]), top_k=3)[0] if args.dense else index.search(args.query, top_k=3)
+        print(f"\n{args.query!r} in {(time.perf_counter() - start) * 1000:.2f} ms")
+        for pid, score in results:
+            passage = index.passage(pid)
+            print(f"{score:7.2f}  {passage['title']}: {passage['text'][:100]}")
+
+
+if __name__ == "__main__":
+    main()
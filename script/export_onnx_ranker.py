@@ -0,0 +1,67 @@
+"""Export the passage ranker to an int8 ONNX model and check it ranks like the original.
+
+Writes the quantized model, its tokenizer and ranker_meta.json to --output, the directory
+RANKER_ONNX_PATH points at. The parity check then scores the (query, passage) pairs of a
+request built from html_corpus/ (see bench_ranker_batching.py) with the PyTorch cross-encoder
+and the ONNX one and compares the rankings of every query: same best passage (top1), top-3
+overlap and Spearman rank correlation. The script exits with status 1 if the export ranks
+below --min-top1 or --min-spearman, so it can gate a deployment.
+
+Needs torch, sentence-transformers, onnxruntime and tokenizers.
+
+Usage: python export_onnx_ranker.py --output ./cache/ranker_onnx [--model NAME] [--claims 20]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_main_content import load_corpus, load_tokenizer  # noqa: E402
+from bench_ranker_batching import build_requests  # noqa: E402
+from factcheck.utils.onnx_ranker import MODEL_FILE, OnnxCrossEncoder, export_onnx_ranker, ranking_agreement  # noqa: E402
+from factcheck.utils.passage_ranker import DEFAULT_RANKER, PassageRanker, cross_encoder  # noqa: E402
+
+
+def score_queries(ranker, query_pairs):
+    scores = iter(ranker.score([pair for pairs in query_pairs for pair in pairs]))
+    return [[next(scores) for _ in pairs] for pairs in query_pairs]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", required=True, help="directory of the ONNX ranker")
+    parser.add_argument("--model", default=DEFAULT_RANKER)
+    parser.add_argument("--max-length", type=int, default=512)
+    parser.add_argument("--corpus", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "html_corpus"))
+    parser.add_argument("--claims", type=int, default=20)
+    parser.add_argument("--min-top1", type=float, default=0.9)
+    parser.add_argument("--min-spearman", type=float, default=0.95)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    export_onnx_ranker(args.model, args.output, max_length=args.max_length)
+    size_mb = os.path.getsize(os.path.join(args.output, MODEL_FILE)) / 1e6
+    print(f"exported {args.model} to {args.output}: {MODEL_FILE} {size_mb:.1f} MB in {time.perf_counter() - start:.1f}s")
+
+    logging.disable(logging.INFO)
+    tokenizer, split_mode = load_tokenizer()
+    query_pairs = [pairs for pairs in build_requests(load_corpus(args.corpus), tokenizer, args.claims) if pairs]
+    reference = score_queries(PassageRanker(model=cross_encoder(args.model, args.max_length, device="cpu")), query_pairs)
+    candidate = score_queries(PassageRanker(model=OnnxCrossEncoder(args.output)), query_pairs)
+    agreement = ranking_agreement(reference, candidate, k=3)
+    print(
+        f"\nparity on {agreement['queries']} queries ({split_mode} sentences): top1 {agreement['top1']:.3f}, "
+        f"top3 overlap {agreement['topk_overlap']:.3f}, spearman {agreement['spearman']:.3f}, "
+        f"max score difference {agreement['max_abs_diff']:.3f}"
+    )
+    if agreement["top1"] < args.min_top1 or agreement["spearman"] < args.min_spearman:
+        print(f"FAILED: below top1 {args.min_top1} or spearman {args.min_spearman}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test the incremental Checkworthy mode: valid items are kept, only missing or malformed
+claims are asked again, and large claim lists are split into token-budget sub-batches.
+"""
+
+import json
+import threading
+
+import pytest
+
+from factcheck.core.CheckWorthy import Checkworthy
+from factcheck.utils.llmclient.base import BaseClient
+from factcheck.utils.prompt.chatgpt_prompt import ChatGPTPrompt
+
+
+class ScriptedClient(BaseClient):
+    """Answers checkworthy prompts with a callback on the list of statements in the prompt."""
+
+    def __init__(self, answer):
+        super().__init__("fake", {}, max_requests_per_minute=100, request_window=60)
+        self.answer = answer
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def _call(self, messages, **kwargs):
+        statements = messages.split("For these statements:\n")[1].split("\n\nThe output should be:")[0]
+        claims = [line.split(". ", 1)[1] for line in statements.splitlines()]
+        with self.lock:
+            self.prompts.append(claims)
+        return self.answer(claims, kwargs.get("seed"))
+
+    def construct_message_list(self, prompt_list):
+        return prompt_list
+
+    def get_request_length(self, messages):
+        return 1
+
+
+CLAIMS = [
+    "Gary Smith is a distinguished professor of economics.",
+    "He is a professor at MBZUAI.",
+    "Obama is the president of the UK.",
+    "Apple announced iPhone 15 launch in California.",
+]
+
+
+def test_keeps_valid_items_and_reasks_only_missing():
+    def answer(claims, seed):
+        if seed == 42:
+            # truncated response: the last claim is cut off, the second one is malformed
+            return (
+                "{" + f'"{claims[0]}": "Yes (verifiable)", "{claims[1]}": "Maybe", '
+                f'"{claims[2]}": "Yes (verifiable)", "{claims[3]}": "Ye'
+            )
+        return json.dumps({claim: "No (unclear reference)" for claim in claims})
+
+    client = ScriptedClient(answer)
+    checkworthy = Checkworthy(llm_client=client, prompt=ChatGPTPrompt(), incremental=True)
+    checkworthy_claims, claim2checkworthy = checkworthy.identify_checkworthiness(CLAIMS, num_retries=3)
+
+    assert client.prompts[0] == CLAIMS
+    assert client.prompts[1] == [CLAIMS[1], CLAIMS[3]]
+    assert len(client.prompts) == 2
+    assert checkworthy_claims == [CLAIMS[0], CLAIMS[2]]
+    assert list(claim2checkworthy) == CLAIMS
+
+
+def test_unanswered_claims_are_assumed_checkworthy():
+    client = ScriptedClient(lambda claims, seed: json.dumps({CLAIMS[0]: "No (opinion)"} if CLAIMS[0] in claims else {}))
+    checkworthy = Checkworthy(llm_client=client, prompt=ChatGPTPrompt(), incremental=True)
+    checkworthy_claims, claim2checkworthy = checkworthy.identify_checkworthiness(CLAIMS[:2], num_retries=2)
+
+    assert checkworthy_claims == [CLAIMS[1]]
+    assert claim2checkworthy[CLAIMS[1]].startswith("Yes ([System Warning]")
+    assert client.prompts == [CLAIMS[:2], CLAIMS[1:2]]
+
+
+def test_numbered_and_respaced_keys_are_matched():
+    def answer(claims, seed):
+        return json.dumps({f"{i + 1}. {claim.upper()}  ": "Yes" for i, claim in enumerate(claims)})
+
+    checkworthy = Checkworthy(llm_client=ScriptedClient(answer), prompt=ChatGPTPrompt(), incremental=True)
+    checkworthy_claims, _ = checkworthy.identify_checkworthiness(CLAIMS, num_retries=1)
+    assert checkworthy_claims == CLAIMS
+
+
+def test_large_lists_are_split_by_token_budget():
+    client = ScriptedClient(lambda claims, seed: json.dumps({claim: "Yes" for claim in claims}))
+    checkworthy = Checkworthy(llm_client=client, prompt=ChatGPTPrompt(), incremental=True, max_batch_tokens=30)
+    claims = [f"Claim number {i} is about the city of Abu Dhabi." for i in range(10)]
+    checkworthy_claims, _ = checkworthy.identify_checkworthiness(claims)
+
+    assert checkworthy_claims == claims
+    assert len(client.prompts) > 1
+    assert sorted(c for batch in client.prompts for c in batch) == sorted(claims)
+
+
+def test_incremental_mode_is_opt_in():
+    assert Checkworthy(llm_client=None, prompt=ChatGPTPrompt()).incremental is False
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
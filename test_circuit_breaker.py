@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test the per-upstream circuit breaker: opening on error rate, half-open probing and recovery.
+"""
+
+import pytest
+
+from conftest import FakeClock
+from factcheck.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, breaker_states, get_breaker
+from factcheck.utils.llmclient.base import BaseClient
+
+
+def failing():
+    raise RuntimeError("upstream down")
+
+
+def test_opens_after_error_rate_threshold():
+    clock = FakeClock(0.0)
+    breaker = CircuitBreaker("test", failure_threshold=0.5, min_calls=4, recovery_timeout=10, clock=clock)
+
+    breaker.call(lambda: "ok")
+    breaker.call(lambda: "ok")
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            breaker.call(failing)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # open circuit rejects without calling the upstream
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: calls.append(1))
+    assert calls == []
+    assert breaker.snapshot()["rejected"] == 1
+
+
+def test_does_not_open_below_min_calls():
+    breaker = CircuitBreaker("test", failure_threshold=0.5, min_calls=5, clock=FakeClock(0.0))
+    for _ in range(4):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_old_outcomes_leave_the_window():
+    clock = FakeClock(0.0)
+    breaker = CircuitBreaker("test", failure_threshold=0.5, min_calls=3, window=10, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now = 20
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_probe_closes_or_reopens():
+    clock = FakeClock(0.0)
+    breaker = CircuitBreaker("test", failure_threshold=0.5, min_calls=2, recovery_timeout=10, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 11
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # only one probe at a time
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 22
+    assert breaker.call(lambda: "recovered") == "recovered"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_cancelled_probe_releases_its_slot():
+    clock = FakeClock(0.0)
+    breaker = CircuitBreaker("test", failure_threshold=0.5, min_calls=2, recovery_timeout=10, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now = 11
+
+    def cancelled():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        breaker.call(cancelled)
+    # neither success nor failure: still half open, and the next probe may go
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.call(lambda: "recovered") == "recovered"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_registry_reports_states():
+    breaker = get_breaker("test-registry", min_calls=1)
+    assert get_breaker("test-registry") is breaker
+    breaker.record_failure()
+    states = breaker_states()
+    assert states["test-registry"]["state"] == CircuitBreaker.OPEN
+    breaker.reset()
+    assert breaker_states()["test-registry"]["state"] == CircuitBreaker.CLOSED
+
+
+class DownClient(BaseClient):
+    upstream = "test-llm"
+
+    def __init__(self):
+        super().__init__("fake", {}, max_requests_per_minute=10, request_window=60)
+        self.num_calls = 0
+
+    def _call(self, messages, **kwargs):
+        self.num_calls += 1
+        return self.breaker.call(failing)
+
+
+def test_client_call_stops_retrying_when_circuit_opens():
+    client = DownClient()
+    client.breaker.min_calls = 2
+    with pytest.raises(CircuitOpenError):
+        client.call(["hello"], num_retries=5, waiting_time=0)
+    # two real attempts trip the breaker, the third is rejected and ends the retry ladder
+    assert client.num_calls == 3
+    client.breaker.reset()
+
+
+def test_client_without_upstream_is_not_guarded():
+    class PlainClient(BaseClient):
+        def _call(self, messages, **kwargs):
+            return "ok"
+
+    client = PlainClient("fake", {}, max_requests_per_minute=10, request_window=60)
+    assert client.breaker is None
+    assert "llm" not in breaker_states()
+    assert client.call(["hello"]) == "ok"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
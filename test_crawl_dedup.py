@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test per-request URL dedup in the crawler: a url returned for several queries or claims is
+fetched and parsed once and its text is shared by every query that references it.
+"""
+
+import pytest
+
+from conftest import FakeCrossEncoder, FakeResponse, QuietHandler
+from factcheck.core.Retriever import base
+from factcheck.core.Retriever.base import BaseRetriever
+from factcheck.core.Retriever.serper_retriever import SerperEvidenceRetriever
+from factcheck.utils.passage_ranker import PassageRanker
+from factcheck.utils.web_util import crawl_web, crawler_stats
+
+PAGE = "<html><body><p>Mary is a five-year old girl. She likes playing piano and drawing.</p></body></html>"
+
+
+class CountingHandler(QuietHandler):
+    paths = []
+
+    def do_GET(self):
+        CountingHandler.paths.append(self.path)
+        self.send_page(PAGE.encode())
+
+
+@pytest.fixture
+def server(serve):
+    CountingHandler.paths = []
+    return serve(CountingHandler)
+
+
+def test_each_url_is_fetched_once(server):
+    before = crawler_stats()["duplicate_urls_skipped"]
+    responses = crawl_web(
+        {
+            "q1": [f"{server}/mary", f"{server}/other"],
+            "q2": [f"{server}/mary#section", f"{server}/mary"],
+        }
+    )
+
+    assert sorted(CountingHandler.paths) == ["/mary", "/other"]
+    assert [(url, query) for _, _, url, query in responses] == [
+        (f"{server}/mary", "q1"),
+        (f"{server}/other", "q1"),
+        (f"{server}/mary#section", "q2"),
+        (f"{server}/mary", "q2"),
+    ]
+    assert responses[0][1] is responses[3][1]
+    assert crawler_stats()["duplicate_urls_skipped"] - before == 2
+
+
+def test_serper_extends_shared_page_for_every_query(server):
+    retriever = SerperEvidenceRetriever(llm_client=None, api_config={"SERPER_API_KEY": "fake"})
+
+    def request(questions):
+        organic = [{"snippet": "Mary is a five-year old girl.", "link": f"{server}/mary"}]
+        return FakeResponse([{"searchParameters": {"q": q}, "organic": organic} for q in questions])
+
+    retriever._request_serper_api = request
+    evidences = retriever.retrieve_evidence({"Mary is five.": ["Mary is five.", "How old is Mary?"]})
+
+    assert CountingHandler.paths == ["/mary"]
+    extended = [e["text"] for e in evidences["Mary is five."] if "likes playing piano" in e["text"]]
+    assert len(extended) == 2
+
+
+def test_page_shared_by_claims_is_fetched_once(server, monkeypatch):
+    monkeypatch.setattr(base, "PassageRanker", lambda **kwargs: PassageRanker(model=FakeCrossEncoder()))
+    retriever = BaseRetriever(llm_client=None, api_config={"SENTENCE_SEGMENTER": "rule"})
+    retriever._get_query_urls = lambda query_list: {query: [f"{server}/mary"] for query in query_list}
+
+    evidences = retriever.retrieve_evidence({"Mary is five.": ["How old is Mary?"], "Mary plays.": ["What does Mary play?"]})
+
+    assert CountingHandler.paths == ["/mary"]
+    texts = [[e["text"] for e in evidences[claim]] for claim in ("Mary is five.", "Mary plays.")]
+    assert texts[0] == texts[1]
+    assert "likes playing piano" in texts[1][0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
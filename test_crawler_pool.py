@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test the shared crawler pool: one long-lived client serves every crawl_web call, concurrency
+is capped globally and per host, and connections are kept alive between calls.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from conftest import QuietHandler
+from factcheck.utils.web_util import CrawlerPool, crawl_web, get_crawler
+
+
+class SlowHandler(QuietHandler):
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def do_GET(self):
+        with SlowHandler.lock:
+            SlowHandler.active += 1
+            SlowHandler.peak = max(SlowHandler.peak, SlowHandler.active)
+        time.sleep(0.05)
+        with SlowHandler.lock:
+            SlowHandler.active -= 1
+        self.send_page(b"<html><body>hello</body></html>", status=200 if self.path != "/missing" else 404)
+
+
+@pytest.fixture
+def server(serve):
+    SlowHandler.peak = 0
+    return serve(SlowHandler)
+
+
+def test_crawl_web_uses_shared_pool(server):
+    responses = crawl_web({"q1": [f"{server}/a", f"{server}/missing"], "q2": [f"{server}/b"]})
+
+    assert [(flag, url, key) for flag, _, url, key in responses] == [
+        (True, f"{server}/a", "q1"),
+        (False, f"{server}/missing", "q1"),
+        (True, f"{server}/b", "q2"),
+    ]
+    assert responses[0][1].text == "<html><body>hello</body></html>"
+    assert get_crawler().snapshot()["requests"] >= 3
+
+
+def test_per_host_limit_and_keep_alive(server):
+    pool = CrawlerPool(max_connections=16, max_per_host=2)
+    urls = [f"{server}/page{i}" for i in range(8)]
+
+    async def fetch_all():
+        return await asyncio.gather(*[pool.fetch(url, {}) for url in urls])
+
+    results = pool.run(fetch_all())
+    assert all(flag for flag, _ in results)
+    assert SlowHandler.peak <= 2
+    stats = pool.snapshot()
+    assert stats["host_waits"] > 0
+    assert stats["open_connections"] <= 2
+    assert stats["active_hosts"] == 0
+
+
+def test_pool_is_shared_across_threads(server):
+    results = []
+
+    def crawl(i):
+        results.append(crawl_web({f"q{i}": [f"{server}/t{i}"]})[0][0])
+
+    threads = [threading.Thread(target=crawl, args=(i,)) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [True] * 5
+
+
+def test_stats_from_many_threads_are_not_lost():
+    pool = CrawlerPool()
+
+    def count():
+        for _ in range(2000):
+            pool._count(urls_requested=1, in_flight=1)
+            pool._count(in_flight=-1)
+
+    threads = [threading.Thread(target=count) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = pool.snapshot()
+    assert stats["urls_requested"] == 16000
+    assert stats["in_flight"] == 0
+    assert 1 <= stats["peak_in_flight"] <= 8
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test the hedged-seed mode of Decompose: seed variants are requested concurrently and the
+first valid parse wins without waiting for the slower calls.
+"""
+
+import json
+import time
+
+import pytest
+
+from factcheck.core.Decompose import Decompose
+from factcheck.utils.llmclient.base import BaseClient
+from factcheck.utils.prompt.chatgpt_prompt import ChatGPTPrompt
+
+DOC = "Mary is a five-year old girl, she likes playing piano."
+CLAIMS = ["Mary is a five-year old girl.", "Mary likes playing piano."]
+
+
+class SeededClient(BaseClient):
+    """Returns a scripted (delay, response) per seed."""
+
+    def __init__(self, script, max_requests_per_minute=100):
+        super().__init__("fake", {}, max_requests_per_minute=max_requests_per_minute, request_window=60)
+        self.script = script
+        self.seeds = []
+
+    def _call(self, messages, **kwargs):
+        seed = kwargs.get("seed", 42)
+        self.seeds.append(seed)
+        delay, response = self.script[seed]
+        time.sleep(delay)
+        return response
+
+    def construct_message_list(self, prompt_list):
+        return prompt_list
+
+    def get_request_length(self, messages):
+        return 1
+
+
+def test_first_valid_seed_wins():
+    client = SeededClient(
+        {
+            42: (0.5, json.dumps({"claims": ["slow but valid"]})),
+            43: (0.01, "not json at all"),
+            44: (0.05, json.dumps({"claims": CLAIMS})),
+        }
+    )
+    decomposer = Decompose(llm_client=client, prompt=ChatGPTPrompt(), num_hedged_seeds=3)
+
+    start = time.time()
+    claims = decomposer.getclaims(DOC, num_retries=3)
+    assert claims == CLAIMS
+    assert time.time() - start < 0.4
+    assert sorted(client.seeds) == [42, 43, 44]
+
+
+def test_rounds_when_fewer_hedges_than_retries():
+    client = SeededClient(
+        {
+            42: (0, "oops"),
+            43: (0, "{}"),
+            44: (0, json.dumps({"claims": CLAIMS})),
+        }
+    )
+    decomposer = Decompose(llm_client=client, prompt=ChatGPTPrompt(), num_hedged_seeds=2)
+    assert decomposer.getclaims(DOC, num_retries=3) == CLAIMS
+
+
+def test_falls_back_to_sentence_split_when_all_seeds_fail():
+    client = SeededClient({42: (0, "oops"), 43: (0, "oops")})
+    decomposer = Decompose(llm_client=client, prompt=ChatGPTPrompt(), num_hedged_seeds=2)
+    decomposer.doc2sent = lambda text: ["fallback"]
+    assert decomposer.getclaims(DOC, num_retries=2) == ["fallback"]
+
+
+def test_restore_claims_hedged():
+    spans = {CLAIMS[0]: "Mary is a five-year old girl,", CLAIMS[1]: " she likes playing piano."}
+    client = SeededClient(
+        {
+            42: (0.3, json.dumps(spans)),
+            43: (0, json.dumps({CLAIMS[0]: "Mary is a five-year old girl,"})),
+        }
+    )
+    decomposer = Decompose(llm_client=client, prompt=ChatGPTPrompt(), num_hedged_seeds=2)
+    claim2doc = decomposer.restore_claims(DOC, CLAIMS, num_retries=2)
+    assert claim2doc[CLAIMS[0]]["text"] == "Mary is a five-year old girl,"
+    assert claim2doc[CLAIMS[1]]["end"] == len(DOC)
+
+
+def test_hedges_only_use_spare_rate_limit():
+    # with a rate limit of one request there is no room for a hedge, the second seed is never sent
+    client = SeededClient(
+        {42: (0, json.dumps({"claims": CLAIMS})), 43: (0, json.dumps({"claims": ["other"]}))},
+        max_requests_per_minute=1,
+    )
+    decomposer = Decompose(llm_client=client, prompt=ChatGPTPrompt(), num_hedged_seeds=2)
+    assert decomposer.getclaims(DOC, num_retries=2) == CLAIMS
+    assert client.seeds == [42]
+
+
+def test_cancelled_hedge_still_counts_against_the_rate_limit():
+    client = SeededClient({42: (0.01, "fast"), 43: (0.3, "slow")})
+
+    assert client.hedged_call(["prompt"], seeds=[42, 43], accept=lambda r: r) == "fast"
+    # the slow call was cancelled but its request was sent: it is traffic and in flight until it returns
+    assert len(client.traffic_queue) == 2
+    assert client.in_flight == 1
+    time.sleep(0.4)
+    assert client.in_flight == 0
+
+
+def test_clients_share_the_executor_of_their_upstream():
+    assert SeededClient({})._executor is SeededClient({})._executor
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
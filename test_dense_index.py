@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test the memory-mapped dense index: float16 storage, exact flat search, the IVF partition
+and its recall, and index building from documents with an encoder.
+"""
+
+import zlib
+
+import numpy as np
+import pytest
+
+from factcheck.core.Retriever import retriever_map
+from factcheck.utils.bm25_index import write_passages
+from factcheck.utils.dense_index import DenseIndex, auto_nlist, train_centroids
+
+
+def unit(vectors):
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def clustered_vectors(n, dim=32, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return unit(centers[rng.integers(0, clusters, n)] + 0.3 * rng.normal(size=(n, dim)))
+
+
+def write_index(path, vectors, nlist):
+    documents = [{"title": f"doc {i}", "url": f"https://example.com/{i}", "text": f"passage {i}"} for i in range(len(vectors))]
+    write_passages(documents, path)
+    batches = (vectors[i : i + 100] for i in range(0, len(vectors), 100))
+    DenseIndex.write_embeddings(path, batches, len(vectors), "test-model", nlist=nlist, num_documents=len(vectors))
+    return DenseIndex(path)
+
+
+def hashed_bag_of_words(texts, dim=64):
+    """A deterministic text encoder: every word adds to one hashed dimension."""
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.lower().split():
+            vectors[row, zlib.crc32(word.strip(".,?").encode()) % dim] += 1
+    return unit(vectors + 1e-6)
+
+
+def test_flat_search_is_exact(tmp_path):
+    vectors = clustered_vectors(1000)
+    index = write_index(str(tmp_path), vectors, nlist=0)
+    queries = clustered_vectors(5, seed=1)
+
+    assert index.embeddings.dtype == np.float16
+    assert isinstance(index.embeddings, np.memmap)
+    expected = np.asarray(index.embeddings, dtype=np.float32) @ queries.T
+    for q, results in enumerate(index.search(queries, top_k=10)):
+        assert [pid for pid, _ in results] == list(np.argsort(-expected[:, q], kind="stable")[:10])
+        assert results[0][1] == pytest.approx(expected[:, q].max(), rel=1e-5)
+
+
+def test_ivf_groups_rows_by_list_and_keeps_recall(tmp_path):
+    vectors = clustered_vectors(3000)
+    flat = write_index(str(tmp_path / "flat"), vectors, nlist=0)
+    ivf = write_index(str(tmp_path / "ivf"), vectors, nlist=20)
+
+    assert ivf.nlist == 20
+    assert sorted(ivf.row_ids.tolist()) == list(range(3000))
+    assert ivf.list_offsets[-1] == 3000
+    # every row of the grouped matrix is the vector of the passage it is stored for
+    np.testing.assert_array_equal(ivf.embeddings, flat.embeddings[ivf.row_ids])
+
+    queries = clustered_vectors(20, seed=2)
+    hits = 0
+    for exact, approximate in zip(flat.search(queries, top_k=10), ivf.search(queries, top_k=10, nprobe=4)):
+        hits += len({pid for pid, _ in exact} & {pid for pid, _ in approximate})
+    assert hits / 200 >= 0.9
+    # probing every list is exact
+    for exact, approximate in zip(flat.search(queries[:3], top_k=10), ivf.search(queries[:3], top_k=10, nprobe=20)):
+        assert [pid for pid, _ in approximate] == [pid for pid, _ in exact]
+        assert [score for _, score in approximate] == pytest.approx([score for _, score in exact], rel=1e-5)
+
+
+def test_train_centroids_are_unit_vectors():
+    centroids = train_centroids(clustered_vectors(500), nlist=8)
+    assert centroids.shape == (8, 32)
+    np.testing.assert_allclose(np.linalg.norm(centroids, axis=1), 1, rtol=1e-5)
+
+
+def test_auto_nlist():
+    assert auto_nlist(50_000) == 0
+    assert auto_nlist(1_000_000) == 1000
+
+
+def test_build_from_documents(tmp_path):
+    documents = [
+        {"title": "Eiffel Tower", "url": "https://example.com/eiffel", "text": "The Eiffel Tower is 330 metres tall."},
+        {"title": "Great Wall", "url": "https://example.com/wall", "text": "The Great Wall is not visible from orbit."},
+    ]
+    index = DenseIndex.build(documents, str(tmp_path), encode=hashed_bag_of_words, model_name="hashed", nlist=0)
+
+    assert index.meta["model"] == "hashed"
+    assert index.meta["dim"] == 64
+    pid, _ = index.search(hashed_bag_of_words(["how tall is the Eiffel Tower"]), top_k=1)[0][0]
+    assert index.passage(pid)["url"] == "https://example.com/eiffel"
+
+    reopened = DenseIndex(str(tmp_path))
+    assert reopened.search(hashed_bag_of_words(["Great Wall orbit"]), top_k=2) == index.search(
+        hashed_bag_of_words(["Great Wall orbit"]), top_k=2
+    )
+
+
+def test_empty_index(tmp_path):
+    index = DenseIndex.build([], str(tmp_path), encode=hashed_bag_of_words, model_name="hashed")
+    assert index.num_passages == 0
+    assert index.search(np.ones((2, 64)), top_k=3) == [[], []]
+
+
+def test_registered_in_retriever_map():
+    assert "local_dense" in retriever_map
+    with pytest.raises(ValueError):
+        retriever_map["local_dense"](llm_client=None, api_config={})
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
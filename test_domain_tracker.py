@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test the per-domain crawl tracker: timeouts follow observed latency, failing domains are
+skipped for a growing cooldown, the table is bounded and survives a restart.
+"""
+
+import pytest
+
+from conftest import FakeClock
+from factcheck.utils.circuit_breaker import get_breaker
+from factcheck.utils.domain_tracker import DomainTracker
+from factcheck.utils.web_util import CrawlerPool
+
+
+def test_timeout_follows_latency():
+    tracker = DomainTracker(default_timeout=3, min_timeout=0.5, max_timeout=6)
+    assert tracker.timeout("example.com") == 3
+    for _ in range(20):
+        tracker.record_success("example.com", 0.2)
+    assert tracker.timeout("example.com") == 0.5
+    for _ in range(20):
+        tracker.record_success("slow.com", 2.0)
+        tracker.record_success("slow.com", 4.0)
+    assert 4 < tracker.timeout("slow.com") <= 6
+
+
+def test_failing_domain_is_skipped_with_growing_cooldown():
+    clock = FakeClock()
+    tracker = DomainTracker(failure_threshold=2, cooldown=10, clock=clock)
+    tracker.record_failure("dead.com")
+    assert not tracker.should_skip("dead.com")
+    tracker.record_failure("dead.com")
+    assert tracker.should_skip("dead.com")
+    clock.now += 11
+    assert not tracker.should_skip("dead.com")
+    tracker.record_failure("dead.com")
+    clock.now += 11
+    assert tracker.should_skip("dead.com")
+    tracker.record_success("dead.com", 0.3)
+    assert not tracker.should_skip("dead.com")
+    assert tracker.snapshot()["skipped"] == 2
+
+
+def test_table_is_bounded_and_persisted(tmp_path):
+    path = str(tmp_path / "domains.json")
+    tracker = DomainTracker(max_domains=3, path=path, clock=FakeClock())
+    for domain in ["a.com", "b.com", "c.com", "d.com"]:
+        tracker.record_success(domain, 0.1)
+    tracker.record_failure("d.com")
+    tracker.save()
+
+    restored = DomainTracker(max_domains=3, path=path)
+    assert len(restored) == 3
+    assert restored.timeout("a.com") == restored.default_timeout
+    assert restored.timeout("b.com") == tracker.timeout("b.com")
+
+
+def test_saves_of_several_workers_are_merged(tmp_path):
+    path = str(tmp_path / "domains.json")
+    first, second = DomainTracker(path=path, failure_threshold=1), DomainTracker(path=path, failure_threshold=1)
+    first.record_success("fast.com", 0.1)
+    second.record_failure("dead.com")
+    first.save()
+    second.save()
+
+    restored = DomainTracker(path=path, failure_threshold=1)
+    assert restored.timeout("fast.com") == first.timeout("fast.com")
+    assert restored.should_skip("dead.com")
+    # a save also picks up the domains other workers saved
+    assert second.timeout("fast.com") == first.timeout("fast.com")
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_crawler_skips_unreachable_domain():
+    get_breaker("crawl").reset()
+    pool = CrawlerPool(domain_tracker=DomainTracker(failure_threshold=2))
+    for _ in range(3):
+        assert pool.run(pool.fetch("http://127.0.0.1:1/page", {})) == (False, None)
+    assert pool.snapshot()["failures"] == 2
+    assert pool.snapshot()["skipped_slow_domain"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test the evidence store: passages of fetched pages kept with their provenance, BM25 search
+with a confidence, eviction by age and size, and the serper retriever filling the store for
+later claims.
+"""
+
+import pytest
+
+from conftest import FakeClock, FakeResponse, QuietHandler
+from factcheck.core.Retriever import retriever_map
+from factcheck.core.Retriever.evidence_store_retriever import EvidenceStoreRetriever
+from factcheck.core.Retriever.hybrid_retriever import HybridRetriever, default_local
+from factcheck.core.Retriever.serper_retriever import SerperEvidenceRetriever
+from factcheck.utils.evidence_store import EvidenceStore
+
+EIFFEL = "The Eiffel Tower in Paris is 330 metres tall and was completed in 1889 for the World's Fair."
+MARS = "Mars is the fourth planet from the Sun and has two small moons, Phobos and Deimos."
+PAGE = (
+    '<html><body><nav><a href="/">Home</a> <a href="/travel">Travel</a> <a href="/contact">Contact us</a></nav>'
+    f"<article><h1>Eiffel Tower</h1><p>{EIFFEL} It was designed by the engineering company of Gustave Eiffel.</p></article>"
+    "<footer>Copyright 2024 Example Media. All rights reserved.</footer></body></html>"
+)
+
+
+class PageHandler(QuietHandler):
+    def do_GET(self):
+        self.send_page(PAGE.encode("utf-8"), content_type="text/html; charset=utf-8")
+
+
+@pytest.fixture
+def server(serve):
+    return serve(PageHandler)
+
+
+def test_pages_are_searchable_with_provenance(tmp_path):
+    clock = FakeClock(1_000_000.0)
+    store = EvidenceStore(str(tmp_path / "store.sqlite"), clock=clock)
+
+    assert store.add_page("https://example.com/eiffel", EIFFEL, query="Eiffel Tower height") == 1
+    store.add_page("https://example.com/mars", MARS, query="Mars moons")
+
+    pid, confidence = store.search("How tall is the Eiffel Tower?", top_k=3)[0]
+    assert 0 < confidence <= 1
+    assert store.passage(pid) == {
+        "text": EIFFEL,
+        "url": "https://example.com/eiffel",
+        "fetched": clock.now,
+        "query": "Eiffel Tower height",
+    }
+    assert store.search("Phobos Deimos", top_k=3)[0][0] != pid
+    assert store.search("volcano", top_k=3) == []
+    assert store.search("the of", top_k=3) == []
+
+
+def test_long_pages_are_chunked_and_refetches_stored_once(tmp_path):
+    store = EvidenceStore(str(tmp_path / "store.sqlite"), passage_words=20, stride=10)
+    text = " ".join(f"word{i}" for i in range(50))
+
+    assert store.add_page("https://example.com/long", text, query="q") == 4
+    assert store.add_page("https://example.com/long", text, query="other") == 0
+    assert len(store) == 4
+    assert store.stats["refreshed"] == 4
+    assert store.add_page("https://example.com/empty", "   ") == 0
+
+
+def test_confidence_follows_the_share_of_matched_terms(tmp_path):
+    store = EvidenceStore(str(tmp_path / "store.sqlite"))
+    store.add_page("https://example.com/eiffel", EIFFEL)
+    store.add_page("https://example.com/mars", MARS)
+    store.add_page("https://example.com/other", "Paris is the capital of France.")
+
+    full = dict(store.search("Eiffel Tower 330 metres", top_k=3))
+    partial = dict(store.search("Eiffel Tower Tokyo Skytree", top_k=3))
+    assert max(full.values()) > max(partial.values())
+
+
+def test_eviction_by_age_and_size(tmp_path):
+    clock = FakeClock(1_000_000.0)
+    store = EvidenceStore(str(tmp_path / "store.sqlite"), max_age=100, max_entries=2, clock=clock)
+    store.add_page("https://example.com/eiffel", EIFFEL)
+    clock.now += 60
+    store.add_page("https://example.com/mars", MARS)
+    clock.now += 60
+
+    # the Eiffel passage is past max_age: no longer returned, then removed
+    assert store.search("Eiffel Tower", top_k=3) == []
+    store.purge()
+    assert len(store) == 1
+
+    store.add_page("https://example.com/a", "Alpha centauri is the closest star system.")
+    clock.now += 1
+    store.add_page("https://example.com/b", "Betelgeuse is a red supergiant star.")
+    clock.now += 1
+    # a search keeps the Mars passage in use, the least recently used one goes
+    assert store.search("Mars moons", top_k=1)
+    store.purge()
+    assert len(store) == 2
+    assert store.search("Alpha centauri", top_k=3) == []
+
+
+def test_store_survives_reopening(tmp_path):
+    path = str(tmp_path / "store.sqlite")
+    EvidenceStore(path).add_page("https://example.com/eiffel", EIFFEL, query="Eiffel Tower")
+    reopened = EvidenceStore(path)
+
+    assert len(reopened) == 1
+    assert reopened.search("Eiffel Tower", top_k=1)
+    assert reopened.snapshot()["entries"] == 1
+
+
+def test_serper_fills_the_store_for_later_claims(tmp_path, server):
+    path = str(tmp_path / "store.sqlite")
+    web = SerperEvidenceRetriever(
+        llm_client=None, api_config={"SERPER_API_KEY": "fake", "EVIDENCE_STORE_PATH": path}, num_batch_retries=0
+    )
+    web._request_serper_api = lambda questions: FakeResponse(
+        [
+            {"searchParameters": {"q": q}, "organic": [{"snippet": "The Eiffel Tower in Paris", "link": f"{server}/eiffel"}]}
+            for q in questions
+        ]
+    )
+    web.retrieve_evidence({"The Eiffel Tower is in Paris.": ["Eiffel Tower location"]})
+
+    local = EvidenceStoreRetriever(llm_client=None, api_config={"EVIDENCE_STORE_PATH": path})
+    (pid, confidence, evidence), *_ = local.search_queries(["Eiffel Tower height metres"], top_k=3)[0]
+    assert evidence["url"] == f"{server}/eiffel"
+    assert "330 metres" in evidence["text"]
+    # the page is stored as its main content, without navigation and footer
+    assert "Contact us" not in evidence["text"] and "All rights reserved" not in evidence["text"]
+    assert local.store.passage(pid)["query"] == "Eiffel Tower location"
+
+
+def test_registered_retrievers(tmp_path):
+    assert retriever_map["evidence_store"] is EvidenceStoreRetriever
+    with pytest.raises(ValueError):
+        EvidenceStoreRetriever(llm_client=None, api_config={})
+
+    assert default_local({"EVIDENCE_STORE_PATH": "store.sqlite"}) == "evidence_store"
+    assert default_local({"EVIDENCE_STORE_PATH": "store.sqlite", "LOCAL_INDEX_PATH": "index"}) == "local_bm25"
+    config = {"SERPER_API_KEY": "fake", "EVIDENCE_STORE_PATH": str(tmp_path / "store.sqlite")}
+    assert isinstance(HybridRetriever(llm_client=None, api_config=config).local, EvidenceStoreRetriever)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
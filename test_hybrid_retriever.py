@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test the hybrid retriever: reciprocal rank fusion of web and local results, and the
+latency-first mode answering confident claims from the local index without waiting for
+the web search.
+"""
+
+import threading
+import time
+
+import pytest
+
+from conftest import FakeResponse
+from factcheck.core.Retriever import retriever_map
+from factcheck.core.Retriever.hybrid_retriever import HybridRetriever, reciprocal_rank_fusion
+from factcheck.core.Retriever.local_bm25_retriever import LocalBM25Retriever
+from factcheck.core.Retriever.serper_retriever import SerperEvidenceRetriever
+from factcheck.utils.bm25_index import BM25Index
+
+DOCUMENTS = [
+    {"title": "Eiffel Tower", "url": "https://local/eiffel", "text": "The Eiffel Tower in Paris is 330 metres tall."},
+    {"title": "Eiffel Tower history", "url": "https://local/eiffel-history", "text": "The Eiffel Tower in Paris opened in 1889."},
+    {"title": "Eiffel Tower visits", "url": "https://local/eiffel-visits", "text": "The Eiffel Tower in Paris has three levels."},
+    {"title": "Mars", "url": "https://local/mars", "text": "Mars is the fourth planet from the Sun."},
+]
+EIFFEL = "The Eiffel Tower is in Paris."
+STARTUP = "Acme Robotics raised 40 million dollars last week."
+
+
+@pytest.fixture
+def local(tmp_path):
+    index = BM25Index.build(DOCUMENTS, str(tmp_path / "index"))
+    return LocalBM25Retriever(llm_client=None, index_path=index.path)
+
+
+def make_web(delay=0.0, fail=False):
+    web = SerperEvidenceRetriever(llm_client=None, api_config={"SERPER_API_KEY": "fake"}, num_batch_retries=0)
+    calls = []
+
+    def request(questions):
+        calls.append(list(questions))
+        time.sleep(delay)
+        if fail:
+            raise Exception("Failed to authenticate. Check your API key.")
+        organic = lambda q: [{"snippet": f"web result {i} for {q}", "link": f"https://web/{q}/{i}"} for i in range(3)]  # noqa: E731
+        return FakeResponse([{"searchParameters": {"q": q}, "organic": organic(q)} for q in questions])
+
+    web._request_serper_api = request
+    return web, calls
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a", "d"]], k=60)
+    assert fused[0] == "a"  # 1/61 + 1/62
+    assert fused[1] == "c"  # 1/63 + 1/61
+    assert set(fused[2:]) == {"b", "d"}
+
+
+def test_confident_claims_do_not_wait_for_the_web(local):
+    web, calls = make_web(delay=1.0)
+    retriever = HybridRetriever(llm_client=None, web_retriever=web, local_retriever=local)
+
+    start = time.time()
+    evidences = retriever.retrieve_evidence({EIFFEL: ["Eiffel Tower Paris"]}, snippet_extend_flag=False)
+
+    assert time.time() - start < 0.5
+    assert {e["url"] for e in evidences[EIFFEL]} == {"https://local/eiffel", "https://local/eiffel-history", "https://local/eiffel-visits"}
+    assert retriever.stats["local_only"] == 1
+    assert retriever.stats["web_not_awaited"] == 1
+
+
+def test_unknown_claims_are_fused_with_the_web(local):
+    web, calls = make_web(delay=0.1)
+    retriever = HybridRetriever(llm_client=None, web_retriever=web, local_retriever=local)
+
+    evidences = retriever.retrieve_evidence(
+        {EIFFEL: ["Eiffel Tower Paris"], STARTUP: ["Acme Robotics funding"]}, snippet_extend_flag=False
+    )
+
+    # both queries were searched on the web at once, only the unknown claim waits for it
+    assert calls == [["Eiffel Tower Paris", "Acme Robotics funding"]]
+    assert all(e["url"].startswith("https://local/") for e in evidences[EIFFEL])
+    assert evidences[STARTUP][0]["url"] == "https://web/Acme Robotics funding/0"
+    assert len(evidences[STARTUP]) == 3
+    assert retriever.stats["local_only"] == 1
+    assert retriever.stats["fused"] == 1
+
+
+def test_fusion_mode_merges_both_sources(local):
+    web, _ = make_web()
+    retriever = HybridRetriever(llm_client=None, web_retriever=web, local_retriever=local, latency_first=False)
+
+    evidences = retriever.retrieve_evidence({EIFFEL: ["Eiffel Tower Paris"]}, top_k=2, snippet_extend_flag=False)[EIFFEL]
+
+    # the first web and the first local result share rank 1
+    assert len(evidences) == 2
+    assert {e["url"].split("/")[2] for e in evidences} == {"web", "local"}
+
+
+def test_web_failure_falls_back_to_local(local):
+    web, _ = make_web(fail=True)
+    retriever = HybridRetriever(llm_client=None, web_retriever=web, local_retriever=local, latency_first=False)
+
+    evidences = retriever.retrieve_evidence({EIFFEL: ["Eiffel Tower Paris"]}, snippet_extend_flag=False)
+
+    assert [e["url"] for e in evidences[EIFFEL]][0].startswith("https://local/")
+
+
+def test_slow_local_index_does_not_hold_the_web(local):
+    web, _ = make_web()
+    release = threading.Event()
+    search_queries = local.search_queries
+
+    def slow_search(query_list, top_k):
+        release.wait(2)
+        return search_queries(query_list, top_k)
+
+    local.search_queries = slow_search
+    retriever = HybridRetriever(llm_client=None, web_retriever=web, local_retriever=local, local_grace=0.05)
+    start = time.time()
+    evidences = retriever.retrieve_evidence({EIFFEL: ["Eiffel Tower Paris"]}, snippet_extend_flag=False)
+    release.set()
+
+    assert time.time() - start < 1
+    assert all(e["url"].startswith("https://web/") for e in evidences[EIFFEL])
+
+
+def test_registered_in_retriever_map():
+    assert retriever_map["hybrid"] is HybridRetriever
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
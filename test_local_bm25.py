@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test the offline BM25 retriever: index build, memory-mapped postings, ranking, and the
+evidence dict it returns through the retriever map.
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from factcheck.core.Retriever import retriever_mapper
+from factcheck.utils.bm25_index import BM25Index, chunk_document, tokenize
+
+DOCUMENTS = [
+    {
+        "title": "Eiffel Tower",
+        "url": "https://en.wikipedia.org/wiki/Eiffel_Tower",
+        "text": "The Eiffel Tower is a wrought-iron lattice tower in Paris. It is 330 metres tall and was completed in 1889.",
+    },
+    {
+        "title": "Great Wall of China",
+        "url": "https://en.wikipedia.org/wiki/Great_Wall_of_China",
+        "text": "The Great Wall of China is not visible to the naked eye from low Earth orbit. 长城 is its Chinese name.",
+    },
+    {
+        "title": "Paris",
+        "url": "https://en.wikipedia.org/wiki/Paris",
+        "text": "Paris is the capital of France. Paris hosted the Summer Olympics in 1900, 1924 and 2024.",
+    },
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    return BM25Index.build(DOCUMENTS, str(tmp_path / "index"))
+
+
+def test_tokenize_drops_stopwords_and_splits_cjk():
+    assert tokenize("The Eiffel Tower is in PARIS, 长城!") == ["eiffel", "tower", "paris", "长", "城"]
+
+
+def test_chunk_document_covers_the_whole_text():
+    words = [f"w{i}" for i in range(250)]
+    passages = chunk_document(" ".join(words), passage_words=120, stride=100)
+    assert [p.split()[0] for p in passages] == ["w0", "w100", "w200"]
+    assert passages[-1].split()[-1] == "w249"
+    assert chunk_document("") == []
+
+
+def test_postings_are_memory_mapped(index):
+    assert isinstance(index.posting_pids, np.memmap)
+    assert index.posting_pids.dtype == np.uint32
+    assert index.posting_tfs.dtype == np.uint16
+    assert index.num_passages == 3
+
+
+def test_search_ranks_the_matching_passage_first(index):
+    results = index.search("How tall is the Eiffel Tower?", top_k=2)
+    assert index.passage(results[0][0])["title"] == "Eiffel Tower"
+    assert results[0][1] > 0
+    assert index.search("Olympics capital of France")[0][0] == 2
+    assert index.search("长城")[0][0] == 1
+    assert index.search("zeppelin") == []
+
+
+def test_bm25_score_matches_the_formula(index):
+    # "paris" occurs in passages 0 (once) and 2 (twice)
+    (pid, score), _ = index.search("paris", top_k=2)
+    assert pid == 2
+    n, df, tf = 3, 2, 2
+    lengths = [len(tokenize(d["text"])) for d in DOCUMENTS]
+    norm = 1.2 * (1 - 0.75 + 0.75 * lengths[2] / (sum(lengths) / 3))
+    expected = math.log(1 + (n - df + 0.5) / (df + 0.5)) * tf * 2.2 / (tf + norm)
+    assert score == pytest.approx(expected, rel=1e-5)
+
+
+def test_term_lookup_uses_sorted_vocabulary(index):
+    assert index.term_id("eiffel") is not None
+    assert index.terms[index.term_id("eiffel")] == "eiffel"
+    assert index.term_id("aaaa") is None
+    assert index.term_id("zzzz") is None
+
+
+def test_index_reopens_from_disk(index):
+    reopened = BM25Index(index.path)
+    assert reopened.search("wrought iron lattice") == index.search("wrought iron lattice")
+
+
+def test_empty_collection(tmp_path):
+    index = BM25Index.build([], str(tmp_path / "empty"))
+    assert index.num_passages == 0
+    assert index.search("anything") == []
+
+
+def test_retriever_returns_the_evidence_dict_shape(index):
+    retriever = retriever_mapper("local_bm25")(llm_client=None, api_config={"LOCAL_INDEX_PATH": index.path})
+    claim_queries_dict = {
+        "The Eiffel Tower is 330 metres tall.": ["Eiffel Tower height", "how tall is the eiffel tower"],
+        "Paris is the capital of France.": ["capital of France"],
+    }
+    evidences = retriever.retrieve_evidence(claim_queries_dict, top_k=1)
+
+    assert list(evidences) == list(claim_queries_dict)
+    # both queries of the first claim find the same passage, it is returned once
+    assert evidences["The Eiffel Tower is 330 metres tall."] == [
+        {"text": DOCUMENTS[0]["text"], "url": DOCUMENTS[0]["url"]}
+    ]
+    assert evidences["Paris is the capital of France."][0]["url"] == DOCUMENTS[2]["url"]
+
+
+def test_retriever_requires_an_index_path():
+    with pytest.raises(ValueError):
+        retriever_mapper("local_bm25")(llm_client=None, api_config={})
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test main-content extraction: boilerplate (navigation, banners, footers, link lists) is
+dropped while the article text is kept, and the retriever parses pages with it.
+"""
+
+import os
+
+import pytest
+
+from factcheck.core.Retriever import serper_retriever
+from factcheck.core.Retriever.serper_retriever import SerperEvidenceRetriever
+from factcheck.utils.html_extractor import MainContentExtractor, get_extractor
+from factcheck.utils.web_util import CrawledPage, parse_response
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "script", "html_corpus")
+
+
+def read_page(name):
+    with open(os.path.join(CORPUS_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_news_article_drops_boilerplate():
+    text = get_extractor("main_content").extract(read_page("news_article.html"))
+
+    assert text.startswith("City council approves new tram line")
+    assert "£420m tram line linking the central station" in text
+    assert "£60m in council borrowing" in text
+    for boilerplate in ["We use cookies", "Politics", "Bus fares to rise", "All rights reserved", "Privacy"]:
+        assert boilerplate not in text
+
+
+def test_main_content_is_shorter_than_visible_text():
+    for name in ["news_article.html", "wiki_article.html", "broken_markup.html"]:
+        html = read_page(name)
+        main = get_extractor("main_content").extract(html)
+        full = get_extractor("stream").extract(html)
+        assert 0 < len(main) < len(full)
+
+
+def test_title_and_trailing_list_items_are_kept():
+    text = get_extractor("main_content").extract(read_page("gov_report.html"))
+
+    assert text.startswith("Annual Report on Air Quality 2023")
+    assert text.endswith("Figures are ratified annual means.")
+
+
+def test_link_dense_blocks_are_dropped():
+    html = (
+        "<div><h1>Title</h1><p>This paragraph is long enough to be considered the main content of the page.</p>"
+        "<p><a href='/a'>one</a> <a href='/b'>two</a> <a href='/c'>three</a> four</p>"
+        "<p>A second paragraph that also has more than ten words in it, so it counts.</p></div>"
+        "<div id='sidebar'>Sidebar text that is not part of the article at all, even if long.</div>"
+    )
+    text = get_extractor("main_content").extract(html)
+
+    assert text == (
+        "Title This paragraph is long enough to be considered the main content of the page. "
+        "A second paragraph that also has more than ten words in it, so it counts."
+    )
+
+
+def test_unclosed_table_cells_do_not_hide_content():
+    html = (
+        "<table><tr><td class=nav>Home > Forum<tr><td>"
+        "This post was written without closing a single table cell, as old forums did."
+        "</table>"
+    )
+    text = get_extractor("main_content").extract(html)
+
+    assert text == "This post was written without closing a single table cell, as old forums did."
+
+
+def test_cjk_text_is_counted_by_characters():
+    html = "<nav>首页 新闻 体育</nav><p>长城虽然很长，但宽度大多只有5到8米，在近地轨道上几乎不可能用肉眼分辨。</p>"
+    text = get_extractor("main_content").extract(html)
+
+    assert text.startswith("长城虽然很长")
+    assert "首页" not in text
+
+
+def test_page_without_content_falls_back_to_visible_text():
+    html = "<ul><li><a href='/a'>Home</a></li><li>Short line</li></ul>"
+    assert get_extractor("main_content").extract(html) == get_extractor("stream").extract(html)
+
+
+def test_thresholds_are_configurable():
+    html = "<p>Five words in this paragraph.</p><nav>menu</nav>"
+    assert MainContentExtractor(min_words=5).extract(html) == "Five words in this paragraph."
+
+
+def test_parse_response_with_main_content():
+    html = read_page("news_article.html")
+    page = CrawledPage(
+        url="https://example.com/tram",
+        status_code=200,
+        content=html.encode("utf-8"),
+        encoding="utf-8",
+        headers={"content-type": "text/html; charset=utf-8"},
+    )
+    web_text, url, _ = parse_response(page, "https://example.com/tram", extractor="main_content")
+
+    assert url == "https://example.com/tram"
+    assert web_text == get_extractor("main_content").extract(html)
+
+
+def test_serper_extends_snippets_from_the_configured_extractor(monkeypatch):
+    html = read_page("news_article.html")
+    page = CrawledPage(
+        url="https://example.com/tram",
+        status_code=200,
+        content=html.encode("utf-8"),
+        encoding="utf-8",
+        headers={"content-type": "text/html; charset=utf-8"},
+    )
+    snippet = "£420m tram line linking the central station"
+    retriever = SerperEvidenceRetriever(
+        llm_client=None, api_config={"SERPER_API_KEY": "fake", "CONTENT_EXTRACTOR": "main_content"}
+    )
+    retriever._request_serper_batch = lambda questions: [
+        {"searchParameters": {"q": q}, "organic": [{"snippet": snippet, "link": page.url}]} for q in questions
+    ]
+    monkeypatch.setattr(
+        serper_retriever, "crawl_web", lambda query_url_dict: [(True, page, page.url, q) for q in query_url_dict]
+    )
+
+    evidences = retriever.retrieve_evidence({"claim": ["tram line"]})
+
+    text = get_extractor("main_content").extract(html)
+    start = text.find(snippet[:-10])
+    assert evidences["claim"][-1]["text"] == text[start : start + len(snippet) + 500] + " ..."
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Test the int8 ONNX ranker backend: the thread count per server process, the ranking
+agreement used as its parity check, and (with torch, sentence-transformers and onnxruntime
+installed) the export and scoring of a tiny model and the ranking parity of the exported
+production model, skipped when that model cannot be loaded.
+"""
+
+import os
+
+import pytest
+
+from factcheck.utils.onnx_ranker import OnnxCrossEncoder, export_onnx_ranker, ranker_threads, ranking_agreement
+from factcheck.utils.passage_ranker import DEFAULT_RANKER
+
+WORDS = "the eiffel tower is in paris and was built in 1889 mars has two moons phobos deimos".split()
+
+
+def test_threads_share_the_cpus_among_workers(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert ranker_threads() == 8
+    assert ranker_threads(num_workers=2) == 4
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    assert ranker_threads() == 2
+    assert ranker_threads(num_workers=16) == 1
+
+
+def test_identical_rankings_agree():
+    scores = [[3.0, 1.0, 2.0, -1.0], [0.5, 0.7]]
+    agreement = ranking_agreement(scores, [[s + 0.01 for s in q] for q in scores])
+
+    assert agreement["queries"] == 2
+    assert agreement["top1"] == 1.0
+    assert agreement["topk_overlap"] == 1.0
+    assert agreement["spearman"] == pytest.approx(1.0)
+    assert agreement["max_abs_diff"] == pytest.approx(0.01)
+
+
+def test_swapped_passages_lower_the_agreement():
+    reference = [[4.0, 3.0, 2.0, 1.0], [1.0, 2.0]]
+    candidate = [[3.0, 4.0, 2.0, 1.0], [1.0, 2.0]]
+    agreement = ranking_agreement(reference, candidate, k=2)
+
+    assert agreement["top1"] == 0.5
+    assert agreement["topk_overlap"] == 1.0  # the top 2 are the same passages
+    assert agreement["spearman"] == pytest.approx((0.8 + 1.0) / 2)
+
+
+def test_queries_without_passages_are_ignored():
+    assert ranking_agreement([[], [1.0]], [[], [2.0]])["queries"] == 1
+
+
+def make_tiny_cross_encoder(model_dir):
+    """Save a randomly initialised two-layer BERT cross-encoder with a word-level tokenizer."""
+    import torch
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors
+    from transformers import BertConfig, BertForSequenceClassification, PreTrainedTokenizerFast
+
+    vocab = {token: i for i, token in enumerate(dict.fromkeys(["[PAD]", "[UNK]", "[CLS]", "[SEP]", *WORDS]))}
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]",
+        pair="[CLS] $A [SEP] $B:1 [SEP]:1",
+        special_tokens=[("[CLS]", vocab["[CLS]"]), ("[SEP]", vocab["[SEP]"])],
+    )
+    fast_tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, unk_token="[UNK]", pad_token="[PAD]", cls_token="[CLS]", sep_token="[SEP]"
+    )
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        max_position_embeddings=64,
+        num_labels=1,
+    )
+    BertForSequenceClassification(config).save_pretrained(model_dir)
+    fast_tokenizer.save_pretrained(model_dir)
+
+
+def test_exported_tiny_model_scores_like_the_original(tmp_path):
+    for module in ("torch", "transformers", "sentence_transformers", "onnxruntime", "tokenizers"):
+        pytest.importorskip(module)
+    from sentence_transformers import CrossEncoder
+
+    model_dir, onnx_dir = str(tmp_path / "tiny"), str(tmp_path / "onnx")
+    make_tiny_cross_encoder(model_dir)
+    export_onnx_ranker(model_dir, onnx_dir, max_length=64)
+    reference = CrossEncoder(model_dir, max_length=64, device="cpu")
+    candidate = OnnxCrossEncoder(onnx_dir, num_threads=1)
+
+    queries = {
+        "eiffel tower height": ["the eiffel tower is in paris", "mars has two moons", "built in 1889"],
+        "moons of mars": ["phobos and deimos", "the tower is in paris"],
+        "paris": ["paris", "mars", "the eiffel tower was built in 1889 in paris"],
+    }
+    reference_scores, candidate_scores = [], []
+    for query, passages in queries.items():
+        pairs = [(query, passage) for passage in passages]
+        reference_scores.append(reference.predict(pairs, batch_size=2, show_progress_bar=False))
+        candidate_scores.append(candidate.predict(pairs, batch_size=2))
+
+    assert [len(scores) for scores in candidate_scores] == [3, 2, 3]
+    agreement = ranking_agreement(reference_scores, candidate_scores)
+    assert agreement["queries"] == 3
+    # int8 weights move the scores of a random model only slightly
+    assert agreement["max_abs_diff"] < 0.1
+
+
+PARITY_QUERIES = {
+    "How tall is the Eiffel Tower?": [
+        "The Eiffel Tower is 330 metres tall, about the height of an 81-storey building.",
+        "The tower was the main exhibit of the 1889 World's Fair in Paris.",
+        "Tickets for the summit can be booked online up to two months in advance.",
+        "Gustave Eiffel's company designed and built the tower.",
+        "The Statue of Liberty is 93 metres tall including its pedestal.",
+    ],
+    "How many moons does Mars have?": [
+        "Mars has two small moons, Phobos and Deimos, discovered in 1877.",
+        "Mars is the fourth planet from the Sun.",
+        "Jupiter has 95 officially recognised moons.",
+        "Phobos orbits Mars three times a day and is slowly spiralling inwards.",
+        "The Red Planet owes its colour to iron oxide on its surface.",
+    ],
+    "When did the Berlin Wall fall?": [
+        "The Berlin Wall fell on 9 November 1989 when the border crossings were opened.",
+        "Berlin is the capital and largest city of Germany.",
+        "Construction of the wall began on 13 August 1961.",
+        "German reunification took place on 3 October 1990.",
+        "The Great Wall of China is more than 20,000 kilometres long.",
+    ],
+    "Who wrote Pride and Prejudice?": [
+        "Pride and Prejudice is an 1813 novel by Jane Austen.",
+        "Charlotte Bronte wrote Jane Eyre, published in 1847.",
+        "The novel follows Elizabeth Bennet and Mr Darcy.",
+        "Austen's other novels include Emma and Sense and Sensibility.",
+        "Prejudice is a preconceived opinion not based on reason.",
+    ],
+    "What is the boiling point of water at sea level?": [
+        "At sea level water boils at 100 degrees Celsius, or 212 degrees Fahrenheit.",
+        "Water freezes at 0 degrees Celsius.",
+        "At higher altitudes water boils at a lower temperature because the air pressure is lower.",
+        "The sea level has risen by about 20 centimetres since 1900.",
+        "Salt water has a slightly higher boiling point than fresh water.",
+    ],
+    "Is the Great Wall of China visible from space?": [
+        "The Great Wall is not visible to the naked eye from the Moon, despite the popular myth.",
+        "Astronauts report that the wall is very hard to see even from low Earth orbit.",
+        "The Great Wall was built over many centuries, mostly during the Ming dynasty.",
+        "The International Space Station orbits about 400 kilometres above the Earth.",
+        "China is the most populous country in East Asia.",
+    ],
+}
+
+
+def test_exported_production_model_ranks_like_the_original(tmp_path):
+    """The parity gate of script/export_onnx_ranker.py on a fixed set of queries."""
+    for module in ("torch", "transformers", "sentence_transformers", "onnxruntime", "tokenizers"):
+        pytest.importorskip(module)
+    from sentence_transformers import CrossEncoder
+
+    try:
+        # only a model already downloaded, the test does not fetch 90 MB
+        reference = CrossEncoder(DEFAULT_RANKER, max_length=512, device="cpu", local_files_only=True)
+    except Exception as e:
+        pytest.skip(f"{DEFAULT_RANKER} is not downloaded: {e}")
+    onnx_dir = str(tmp_path / "onnx")
+    export_onnx_ranker(DEFAULT_RANKER, onnx_dir, max_length=512)
+    candidate = OnnxCrossEncoder(onnx_dir, num_threads=1)
+
+    reference_scores, candidate_scores = [], []
+    for query, passages in PARITY_QUERIES.items():
+        pairs = [(query, passage) for passage in passages]
+        reference_scores.append(reference.predict(pairs, batch_size=8, show_progress_bar=False))
+        candidate_scores.append(candidate.predict(pairs, batch_size=8))
+
+    agreement = ranking_agreement(reference_scores, candidate_scores, k=3)
+    # the defaults of --min-top1 and --min-spearman
+    assert agreement["top1"] >= 0.9
+    assert agreement["spearman"] >= 0.95
+    assert agreement["topk_overlap"] >= 0.9
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
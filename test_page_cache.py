@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test the on-disk page cache: fresh pages are served without a request, stale pages are
+revalidated with ETag / Last-Modified and a 304 answer reuses the stored body.
+"""
+
+import threading
+
+import pytest
+
+from conftest import FakeClock, QuietHandler
+from factcheck.utils.page_cache import PageCache
+from factcheck.utils.web_util import CrawledPage, CrawlerPool
+
+BODY = "<html><body>The Eiffel Tower is 330 metres tall.</body></html>".encode()
+
+
+class ETagHandler(QuietHandler):
+    requests = []
+    etag = '"v1"'
+
+    def do_GET(self):
+        ETagHandler.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == ETagHandler.etag:
+            self.send_page(b"", content_type=None, status=304, headers={"ETag": ETagHandler.etag})
+            return
+        self.send_page(BODY, content_type="text/html; charset=utf-8", headers={"ETag": ETagHandler.etag})
+
+
+@pytest.fixture
+def server(serve):
+    ETagHandler.requests = []
+    return serve(ETagHandler)
+
+
+def fetch(pool, url):
+    return pool.run(pool.fetch(url, {}))
+
+
+def test_fresh_page_is_served_from_disk(server, tmp_path):
+    pool = CrawlerPool(page_cache=PageCache(str(tmp_path / "pages.sqlite")))
+    first = fetch(pool, f"{server}/tower")
+    second = fetch(pool, f"{server}/tower")
+
+    assert first[0] and second[0]
+    assert second[1].text == BODY.decode() and second[1].url == f"{server}/tower"
+    assert len(ETagHandler.requests) == 1
+    assert pool.page_cache.snapshot()["hits"] == 1
+
+
+def test_stale_page_is_revalidated(server, tmp_path):
+    clock = FakeClock()
+    pool = CrawlerPool(page_cache=PageCache(str(tmp_path / "pages.sqlite"), ttl=60, clock=clock))
+    fetch(pool, f"{server}/tower")
+    clock.now += 120
+    flag, page = fetch(pool, f"{server}/tower")
+
+    assert flag and page.content == BODY
+    assert ETagHandler.requests == [("/tower", None), ("/tower", '"v1"')]
+    assert pool.page_cache.stats["revalidated"] == 1
+    # the 304 made the entry fresh again
+    fetch(pool, f"{server}/tower")
+    assert len(ETagHandler.requests) == 2
+
+
+def test_cache_io_runs_off_the_crawler_loop(server, tmp_path):
+    threads = []
+
+    class RecordingCache(PageCache):
+        def get(self, url):
+            threads.append(threading.current_thread().name)
+            return super().get(url)
+
+        def put(self, url, page):
+            threads.append(threading.current_thread().name)
+            super().put(url, page)
+
+    pool = CrawlerPool(page_cache=RecordingCache(str(tmp_path / "pages.sqlite")))
+    fetch(pool, f"{server}/tower")
+
+    assert len(threads) == 2
+    assert "crawler-loop" not in threads
+
+
+def test_entries_are_compressed_and_expire(tmp_path):
+    clock = FakeClock()
+    cache = PageCache(str(tmp_path / "pages.sqlite"), ttl=10, max_age=100, clock=clock)
+    page = CrawledPage(url="https://x/a", status_code=200, content=b"a" * 100000, headers={"etag": '"1"'})
+    cache.put("https://x/a", page)
+
+    stored = cache._conn.execute("SELECT length(body) FROM page_cache").fetchone()[0]
+    assert stored < 2000
+    assert cache.get("https://x/a")[1] is True
+    clock.now += 50
+    entry, fresh = cache.get("https://x/a")
+    assert entry["etag"] == '"1"' and fresh is False
+    clock.now += 100
+    assert cache.get("https://x/a") == (None, False)
+
+
+class ErrorHandler(QuietHandler):
+    def do_GET(self):
+        self.send_page(b"down", status=503)
+
+
+def test_stale_page_is_served_when_revalidation_fails(serve, tmp_path):
+    clock = FakeClock()
+    cache = PageCache(str(tmp_path / "pages.sqlite"), ttl=10, max_age=100, clock=clock)
+    pool = CrawlerPool(page_cache=cache)
+    failing = serve(ErrorHandler)
+    for url in (f"{failing}/tower", "http://127.0.0.1:1/tower"):
+        cache.put(url, CrawledPage(url=url, status_code=200, content=BODY, headers={"etag": '"v1"'}))
+    clock.now += 50
+
+    # the server answers with an error, then a server that cannot be reached at all
+    for url in (f"{failing}/tower", "http://127.0.0.1:1/tower"):
+        flag, page = fetch(pool, url)
+        assert flag and page.content == BODY
+    assert pool.snapshot()["stale_served"] == 2
+
+    # past max_age there is nothing left to serve
+    clock.now += 100
+    assert fetch(pool, f"{failing}/tower") == (False, None)
+
+
+def test_no_store_and_private_pages_are_not_cached(tmp_path):
+    cache = PageCache(str(tmp_path / "pages.sqlite"))
+    for url, cache_control in [("https://x/a", "no-store"), ("https://x/b", "private, max-age=60"), ("https://x/c", "max-age=60")]:
+        cache.put(url, CrawledPage(url=url, status_code=200, content=BODY, headers={"cache-control": cache_control}))
+
+    assert len(cache) == 1
+    assert cache.get("https://x/c")[0] is not None
+    assert cache.stats["uncacheable"] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test the persistent parse worker pool: pages go to the workers as (bytes, encoding), through
+pickling for small batches and shared memory for large ones, and come back in order.
+"""
+
+import glob
+import os
+
+import pytest
+
+from factcheck.utils.html_extractor import get_extractor
+from factcheck.utils.parse_pool import ParsePool, parse_pages
+from factcheck.utils.web_util import CrawledPage
+
+CORPUS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "script", "html_corpus", "*.html")))
+
+
+@pytest.fixture(scope="module")
+def bodies():
+    pages = []
+    for path in CORPUS:
+        with open(path, "rb") as f:
+            pages.append((f.read(), "utf-8"))
+    return pages
+
+
+@pytest.fixture
+def pool():
+    pool = ParsePool(max_workers=2)
+    yield pool
+    pool.shutdown()
+
+
+def expected(bodies, extractor=None):
+    return [get_extractor(extractor).extract(body.decode(encoding)) for body, encoding in bodies]
+
+
+def test_pickled_batch_matches_in_process_extraction(pool, bodies):
+    assert pool.parse(bodies) == expected(bodies)
+    assert pool.stats["shared_memory_batches"] == 0
+
+
+def test_shared_memory_batch_matches_in_process_extraction(bodies):
+    pool = ParsePool(max_workers=2, shm_min_bytes=0)
+    try:
+        assert pool.parse(bodies, extractor="main_content") == expected(bodies, "main_content")
+        assert pool.parse(bodies) == expected(bodies)
+        assert pool.stats["shared_memory_batches"] == 2
+    finally:
+        pool.shutdown()
+
+
+def test_workers_are_reused_across_batches(pool, bodies):
+    pool.parse(bodies[:2])
+    executor = pool._executor
+    pool.parse(bodies[2:])
+    assert pool._executor is executor
+    assert pool.stats["batches"] == 2
+    assert pool.stats["pages"] == len(bodies)
+
+
+def test_non_utf8_and_unparseable_pages(pool):
+    latin = "<p>Café in Zürich</p>".encode("latin-1")
+    results = pool.parse([(latin, "latin-1"), (b"<p>x</p>", "no-such-encoding"), (b"", "utf-8")])
+    assert results == ["Café in Zürich", None, ""]
+
+
+def test_empty_batch_starts_no_workers(pool):
+    assert pool.parse([]) == []
+    assert pool._executor is None
+
+
+def test_parse_pages_takes_crawled_pages(bodies):
+    pages = [CrawledPage(url=f"https://example.com/{i}", status_code=200, content=body) for i, (body, _) in enumerate(bodies)]
+    assert parse_pages(pages) == expected(bodies)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
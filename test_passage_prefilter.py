@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test the prefilter stage before cross-encoder reranking: BM25 and bi-encoder selection of the
+top-N passages of every query, its recall against a full rerank, and the crawling retriever
+sending only the kept passages to the cross-encoder.
+"""
+
+import zlib
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from conftest import FakeCrossEncoder
+from factcheck.core.Retriever.base import BaseRetriever
+from factcheck.utils.passage_prefilter import (
+    BiEncoderPrefilter,
+    BM25Prefilter,
+    bm25_scores,
+    get_prefilter,
+    prefilter_recall,
+    top_n,
+)
+from factcheck.utils.passage_ranker import PassageRanker
+
+PASSAGES = [
+    "The weather in Paris was mild last spring.",
+    "The Eiffel Tower is 330 metres tall.",
+    "Gustave Eiffel's company designed and built the tower.",
+    "Tickets for the museum are sold online.",
+    "The tower was the tallest structure in the world until 1930.",
+]
+
+
+def hashed_bag_of_words(texts, dim=64):
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.lower().split():
+            vectors[row, zlib.crc32(word.strip(".,?'s").encode()) % dim] += 1
+    vectors += 1e-6
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_bm25_scores_favour_matching_passages():
+    scores = bm25_scores("How tall is the Eiffel Tower?", PASSAGES)
+    assert scores.argmax() == 1
+    assert scores[3] == 0
+    assert bm25_scores("the of", PASSAGES).tolist() == [0] * 5
+
+
+def test_top_n_keeps_passage_order():
+    assert top_n([0.1, 0.9, 0.5, 0.9], 2) == [1, 3]
+    assert top_n([0.3, 0.1], 5) == [0, 1]
+
+
+def test_prefilter_recall():
+    full = [5.0, 1.0, 4.0, 3.0]
+    assert prefilter_recall(full, kept=[0, 2], k=2) == 1.0
+    assert prefilter_recall(full, kept=[0, 1], k=2) == 0.5
+    assert prefilter_recall([], kept=[], k=2) == 1.0
+
+
+def test_bm25_prefilter_keeps_top_n():
+    selected = BM25Prefilter().select([("Eiffel Tower height", PASSAGES), ("short", PASSAGES[:2])], n=2)
+    assert selected[0] == [1, 2]
+    assert selected[1] == [0, 1]
+
+
+def test_bi_encoder_prefilter_embeds_a_request_in_two_batches():
+    calls = []
+
+    def encode(texts):
+        calls.append(len(texts))
+        return hashed_bag_of_words(texts)
+
+    prefilter = BiEncoderPrefilter(encode=encode)
+    selected = prefilter.select([("tower tall metres", PASSAGES), ("museum tickets", PASSAGES), ("few", PASSAGES[:1])], n=2)
+
+    assert calls == [2, 10]
+    assert 1 in selected[0]
+    assert 3 in selected[1]
+    assert selected[2] == [0]
+
+
+def test_get_prefilter():
+    assert get_prefilter("none") is None
+    assert isinstance(get_prefilter("bm25"), BM25Prefilter)
+    with pytest.raises(NotImplementedError):
+        get_prefilter("tfidf")
+
+
+def test_retriever_reranks_only_the_kept_passages():
+    retriever = BaseRetriever.__new__(BaseRetriever)
+    retriever.tokenizer = SimpleNamespace(
+        pipe=lambda texts, **kwargs: [SimpleNamespace(sents=[SimpleNamespace(text=s) for s in PASSAGES]) for _ in texts]
+    )
+    retriever.segment_processes = 1
+    retriever.passage_ranker = PassageRanker(model=FakeCrossEncoder())
+    retriever.prefilter = BM25Prefilter()
+    retriever.rerank_top_n = 2
+    retriever.sentences_per_passage = 1
+    retriever.sliding_distance = 1
+    retriever.max_passages_per_search_result_to_return = 5
+
+    snippets = retriever._sorted_passage_by_relevant_score("Eiffel Tower tall", [["page text", "https://example.com"]])
+
+    assert len(retriever.passage_ranker.model.scored) == 2
+    assert snippets[0]["text"] == PASSAGES[1]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
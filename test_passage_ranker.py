@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test the batched passage ranker: pairs are scored in one length-sorted pass with the scores
+returned in input order, and the crawling retriever scores every claim of a request at once.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import FakeCrossEncoder
+from factcheck.core.Retriever.base import BaseRetriever
+from factcheck.utils.passage_ranker import PassageRanker
+
+
+class WordSentencizer:
+    """Every word is a sentence."""
+
+    def __call__(self, text):
+        return SimpleNamespace(sents=[SimpleNamespace(text=word) for word in text.split()])
+
+    def pipe(self, texts, batch_size=16, n_process=1):
+        return (self(text) for text in texts)
+
+
+def test_scores_are_returned_in_input_order():
+    model = FakeCrossEncoder()
+    ranker = PassageRanker(model=model, batch_size=2)
+    pairs = [("a b", "a b c d e f g"), ("a", "a"), ("b", "x b y"), ("c", "")]
+
+    assert ranker.score(pairs) == [2.0, 1.0, 1.0, 0.0]
+    # one predict call, shortest pairs first
+    assert len(model.calls) == 1
+    assert [len(q) + len(p) for q, p in model.calls[0]] == [1, 2, 6, 16]
+    assert (ranker.stats["calls"], ranker.stats["pairs"], ranker.stats["batches"]) == (1, 4, 2)
+    # the rerank time of the request is reported
+    snapshot = ranker.snapshot()
+    assert snapshot["reranks"] == 1
+    assert snapshot["rerank_ms_per_request"] == snapshot["last_rerank_ms"] >= 0
+
+
+def test_unsorted_keeps_the_input_order():
+    model = FakeCrossEncoder()
+    ranker = PassageRanker(model=model, sort_by_length=False)
+    pairs = [("a b", "a b c"), ("a", "a")]
+
+    assert ranker.score(pairs) == [2.0, 1.0]
+    assert model.calls == [pairs]
+
+
+def test_no_pairs():
+    model = FakeCrossEncoder()
+    assert PassageRanker(model=model).score([]) == []
+    assert model.calls == []
+
+
+def make_retriever(pages):
+    retriever = BaseRetriever.__new__(BaseRetriever)
+    retriever.tokenizer = WordSentencizer()
+    retriever.passage_ranker = PassageRanker(model=FakeCrossEncoder())
+    retriever.prefilter = None
+    retriever.segment_processes = 1
+    retriever.sentences_per_passage = 2
+    retriever.sliding_distance = 1
+    retriever.max_passages_per_search_result_to_return = 5
+    retriever._get_query_urls = lambda query_list: {query: [f"https://example.com/{query}"] for query in query_list}
+    retriever._crawl_and_parse_web = lambda query_url_dict: {
+        query: [[pages[query], urls[0]]] for query, urls in query_url_dict.items()
+    }
+    return retriever
+
+
+def test_all_claims_are_scored_in_one_pass():
+    pages = {"tower": "the tower is tall", "moon": "the moon orbits", "river": "the river is long"}
+    retriever = make_retriever(pages)
+
+    evidences = retriever.retrieve_evidence({"claim 1": ["tower", "moon"], "claim 2": ["river"]})
+
+    assert len(retriever.passage_ranker.model.calls) == 1
+    # words under 3 characters are dropped as sentences, every page has 3 sentences and passages
+    assert retriever.passage_ranker.stats["pairs"] == 9
+    assert evidences["claim 1"][0] == {
+        "text": "the tower",
+        "url": "https://example.com/tower",
+        "sents_per_passage": 2,
+        "retrieval_score": 1.0,
+    }
+    assert evidences["claim 1"][1]["text"] == "the moon"
+    assert evidences["claim 2"][0]["text"] == "the river"
+    # scoring a single claim on its own gives the same evidences
+    assert retriever._retrieve_evidence4singleclaim("claim 2", ["river"]) == evidences["claim 2"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
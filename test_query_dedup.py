@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test query canonicalization and cross-claim dedup: every distinct query is searched once
+and its evidences are fanned out to every claim that asked for it.
+"""
+
+import pytest
+
+from conftest import FakeResponse
+from factcheck.core.Retriever.serper_retriever import SerperEvidenceRetriever
+from factcheck.utils.query_util import canonicalize_query, dedup_queries, query_stats
+
+
+def test_canonicalize_query():
+    assert canonicalize_query("  Who is   Mary? ") == "who is mary"
+    assert canonicalize_query("“Who is Mary”") == canonicalize_query("who is mary")
+    assert canonicalize_query("Ｍａｒｙ") == "mary"
+    assert canonicalize_query("Mary likes Bob") != canonicalize_query("Bob likes Mary")
+
+
+def test_dedup_queries_across_claims():
+    before = query_stats["saved"]
+    queries, indices = dedup_queries(
+        {
+            "claim a": ["claim a", "Who is Mary?", "who is mary"],
+            "claim b": ["claim b", "Who is  Mary", "Where does Mary live?"],
+        }
+    )
+    assert queries == ["claim a", "Who is Mary?", "claim b", "Where does Mary live?"]
+    assert indices == {"claim a": [0, 1], "claim b": [2, 1, 3]}
+    assert query_stats["saved"] - before == 2
+
+
+def test_retriever_searches_each_query_once():
+    retriever = SerperEvidenceRetriever(llm_client=None, api_config={"SERPER_API_KEY": "fake"})
+    searched = []
+
+    def request(questions):
+        searched.extend(questions)
+        return FakeResponse(
+            [
+                {"searchParameters": {"q": q}, "organic": [{"snippet": f"about {q}", "link": f"https://x/{q}"}]}
+                for q in questions
+            ]
+        )
+
+    retriever._request_serper_api = request
+    claim_evidence_dict = retriever.retrieve_evidence(
+        {"Mary is five.": ["Mary is five.", "How old is Mary?"], "Mary is a girl.": ["Mary is a girl.", "how old is mary"]},
+        snippet_extend_flag=False,
+    )
+
+    assert searched == ["Mary is five.", "How old is Mary?", "Mary is a girl."]
+    assert [e["text"] for e in claim_evidence_dict["Mary is a girl."]] == ["about Mary is a girl.", "about How old is Mary?"]
+    # fanned out evidences are independent copies
+    assert claim_evidence_dict["Mary is five."][1] is not claim_evidence_dict["Mary is a girl."][1]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
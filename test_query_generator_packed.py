@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test packed query generation: many claims share one prompt, missing answers are asked again
+for those claims only, and adaptive budgets skip the LLM for simple claims.
+"""
+
+import json
+import re
+import threading
+
+import pytest
+
+from factcheck.core.QueryGenerator import QueryGenerator
+from factcheck.utils.llmclient.base import BaseClient
+from factcheck.utils.prompt.chatgpt_prompt import ChatGPTPrompt
+
+
+class PackedClient(BaseClient):
+    """Answers packed prompts with a callback on {claim_number: (max_questions, claim)}."""
+
+    def __init__(self, answer):
+        super().__init__("fake", {}, max_requests_per_minute=100, request_window=60)
+        self.answer = answer
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def _call(self, messages, **kwargs):
+        claims_block = messages.rsplit("Claims:\n", 1)[1].rsplit("\nOutput:", 1)[0]
+        claims = {}
+        for line in claims_block.splitlines():
+            match = re.match(r"(\d+)\. \[max (\d+)\] (.*)", line)
+            claims[match.group(1)] = (int(match.group(2)), match.group(3))
+        with self.lock:
+            self.prompts.append(claims)
+        return self.answer(claims)
+
+    def construct_message_list(self, prompt_list):
+        return prompt_list
+
+    def get_request_length(self, messages):
+        return 1
+
+
+def answer_all(claims):
+    return json.dumps({key: [f"Q{i} {claim}" for i in range(budget)] for key, (budget, claim) in claims.items()})
+
+
+CLAIMS = [
+    "Mary is a five-year old girl.",
+    "Mary likes playing piano.",
+    "Mary doesn't like cookies.",
+]
+
+
+def test_one_request_for_many_claims():
+    client = PackedClient(answer_all)
+    generator = QueryGenerator(llm_client=client, prompt=ChatGPTPrompt(), max_query_per_claim=3, packed=True)
+    claim_query_dict = generator.generate_query(CLAIMS)
+
+    assert len(client.prompts) == 1
+    assert list(claim_query_dict) == CLAIMS
+    assert claim_query_dict[CLAIMS[1]] == [CLAIMS[1], f"Q0 {CLAIMS[1]}", f"Q1 {CLAIMS[1]}"]
+
+
+def test_only_missing_claims_are_asked_again():
+    def answer(claims):
+        # the first response drops claim 2 and truncates
+        if len(claims) == 3:
+            return '{"1": ["Who is Mary?"], "3": ["Does Mary like cookies?"], "2": ["Does Ma'
+        return answer_all(claims)
+
+    client = PackedClient(answer)
+    generator = QueryGenerator(llm_client=client, prompt=ChatGPTPrompt(), max_query_per_claim=2, packed=True)
+    claim_query_dict = generator.generate_query(CLAIMS)
+
+    assert list(client.prompts[1]) == ["2"]
+    assert claim_query_dict[CLAIMS[0]] == [CLAIMS[0], "Who is Mary?"]
+    assert claim_query_dict[CLAIMS[1]] == [CLAIMS[1], f"Q0 {CLAIMS[1]}"]
+
+
+def test_claims_are_split_into_packs():
+    client = PackedClient(answer_all)
+    generator = QueryGenerator(
+        llm_client=client, prompt=ChatGPTPrompt(), max_query_per_claim=2, packed=True, max_claims_per_pack=2
+    )
+    claim_query_dict = generator.generate_query(CLAIMS)
+
+    assert sorted(list(claims) for claims in client.prompts) == [["1", "2"], ["3"]]
+    assert all(len(queries) == 2 for queries in claim_query_dict.values())
+
+
+def test_adaptive_budget_skips_simple_claims():
+    client = PackedClient(answer_all)
+    generator = QueryGenerator(llm_client=client, prompt=ChatGPTPrompt(), packed=True, adaptive_query_count=True)
+    simple = "Mary likes playing piano."
+    compound = "Mary, who was born in 2001 in Paris, moved to Berlin because of her father's job."
+    claim_query_dict = generator.generate_query([simple, compound])
+
+    assert claim_query_dict[simple] == [simple]
+    assert len(client.prompts) == 1 and list(client.prompts[0].values())[0][1] == compound
+    assert 2 < len(claim_query_dict[compound]) <= generator.max_query_per_claim
+
+
+def test_unanswered_claims_keep_the_claim_as_query():
+    client = PackedClient(lambda claims: "I cannot help with that.")
+    generator = QueryGenerator(llm_client=client, prompt=ChatGPTPrompt(), packed=True)
+    claim_query_dict = generator.generate_query(CLAIMS, generating_time=2)
+
+    assert len(client.prompts) == 2
+    assert claim_query_dict == {claim: [claim] for claim in CLAIMS}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
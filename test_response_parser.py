@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test the shared LLM response parser against the corpus of recorded malformed responses
+in script/malformed_responses.json.
+"""
+
+import json
+import os
+
+import pytest
+
+from factcheck.utils.response_parser import ResponseParseError, parse_json_response, strip_code_fences
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "script", "malformed_responses.json")
+
+with open(CORPUS_PATH, encoding="utf-8") as f:
+    CORPUS = json.load(f)
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[case["name"] for case in CORPUS])
+def test_recorded_responses(case):
+    if case["expected"] is None:
+        with pytest.raises(ResponseParseError):
+            parse_json_response(case["response"])
+    else:
+        assert parse_json_response(case["response"]) == case["expected"]
+
+
+def test_expected_type_is_enforced():
+    with pytest.raises(ResponseParseError):
+        parse_json_response('["a", "b"]', expected_type=dict)
+    assert parse_json_response('["a", "b"]', expected_type=list) == ["a", "b"]
+
+
+def test_no_code_execution():
+    with pytest.raises(ResponseParseError):
+        parse_json_response("__import__('os').getcwd()")
+
+
+def test_trailing_commas_inside_strings_are_kept():
+    response = 'Here you go: {"claims": ["a, ]", "b,}",],}'
+    assert parse_json_response(response, dict) == {"claims": ["a, ]", "b,}"]}
+
+
+def test_strip_code_fences():
+    assert strip_code_fences('```json\n{"a": 1}\n```') == '{"a": 1}'
+    assert strip_code_fences('```json\n{"a": 1') == '{"a": 1'
+    assert strip_code_fences('  {"a": 1}  ') == '{"a": 1}'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test the cross-encoder score cache: repeated pairs are not scored again, the cache is bounded
+and reports its hit rate, and persisted scores survive a restart.
+"""
+
+import pytest
+
+from conftest import FakeCrossEncoder
+from factcheck.utils.passage_ranker import PassageRanker
+from factcheck.utils.score_cache import ScoreCache, score_key, text_hash
+
+
+PAIRS = [("height", "The tower is 330 metres tall."), ("height", "It opened in 1889."), ("age", "It opened in 1889.")]
+
+
+def test_repeated_reranking_costs_nothing():
+    model = FakeCrossEncoder()
+    ranker = PassageRanker(model=model, cache=ScoreCache())
+
+    first = ranker.score(PAIRS)
+    second = ranker.score(list(reversed(PAIRS)))
+
+    assert second == list(reversed(first))
+    assert len(model.scored) == 3
+    assert ranker.stats["cached"] == 3
+    assert ranker.cache.snapshot()["hit_rate"] == 0.5
+
+
+def test_pairs_repeated_in_one_request_are_scored_once():
+    model = FakeCrossEncoder()
+    ranker = PassageRanker(model=model, cache=ScoreCache())
+
+    assert ranker.score(PAIRS + PAIRS[:2]) == ranker.score(PAIRS) + ranker.score(PAIRS[:2])
+    assert len(model.scored) == 3
+
+
+def test_keys_separate_models_queries_and_passages():
+    keys = {
+        score_key("model-a", text_hash("q"), text_hash("p")),
+        score_key("model-b", text_hash("q"), text_hash("p")),
+        score_key("model-a", text_hash("p"), text_hash("q")),
+        score_key("model-a", text_hash("q"), text_hash("p2")),
+    }
+    assert len(keys) == 4
+
+    cache = ScoreCache()
+    PassageRanker(model=FakeCrossEncoder(), cache=cache, model_id="model-a").score(PAIRS)
+    other = FakeCrossEncoder()
+    PassageRanker(model=other, cache=cache, model_id="model-b").score(PAIRS)
+    assert len(other.scored) == 3
+
+
+def test_least_recently_used_scores_are_evicted():
+    cache = ScoreCache(max_entries=2)
+    cache.put_many([b"a", b"b"], [1.0, 2.0])
+    assert cache.get_many([b"a"]) == [1.0]
+    cache.put_many([b"c"], [3.0])
+
+    assert len(cache) == 2
+    assert cache.get_many([b"a", b"b", b"c"]) == [1.0, None, 3.0]
+    assert cache.stats["evictions"] == 1
+
+
+def test_persisted_scores_survive_a_restart(tmp_path):
+    path = str(tmp_path / "scores.sqlite")
+    model = FakeCrossEncoder()
+    scores = PassageRanker(model=model, cache=ScoreCache(path=path)).score(PAIRS)
+
+    restarted = PassageRanker(model=model, cache=ScoreCache(path=path))
+    assert restarted.score(PAIRS) == scores
+    assert len(model.scored) == 3
+    assert restarted.cache.stats["disk_hits"] == 3
+    assert restarted.cache.snapshot()["persistent"] is True
+
+
+def test_disk_is_bounded(tmp_path):
+    clock = iter(range(100)).__next__
+    cache = ScoreCache(path=str(tmp_path / "scores.sqlite"), max_disk_entries=2, clock=clock)
+    for key in (b"a", b"b", b"c"):
+        cache.put_many([key], [1.0])
+    cache.purge()
+
+    reopened = ScoreCache(path=str(tmp_path / "scores.sqlite"))
+    assert reopened.get_many([b"a", b"b", b"c"]) == [None, 1.0, 1.0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
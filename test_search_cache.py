@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test the persistent search-result cache: canonical keys, per-class TTL, negative caching,
+eviction and its use by the Serper retriever.
+"""
+
+import pytest
+
+from conftest import FakeClock, FakeResponse
+from factcheck.core.Retriever import serper_retriever
+from factcheck.core.Retriever.serper_retriever import SerperEvidenceRetriever
+from factcheck.utils.search_cache import SearchCache, classify_query
+
+
+def result(query):
+    return {"searchParameters": {"q": query}, "organic": [{"snippet": f"about {query}", "link": "https://x"}]}
+
+
+def test_hit_uses_canonical_query_lang_and_top_k(tmp_path):
+    cache = SearchCache(str(tmp_path / "cache.sqlite"))
+    cache.put("Who is Mary?", result("Who is Mary?"))
+
+    assert cache.get("who is  mary") == result("Who is Mary?")
+    assert cache.get("Who is Mary?", lang="zh") is None
+    assert cache.get("Who is Mary?", top_k=5) is None
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 2
+
+
+def test_ttl_per_query_class(tmp_path):
+    clock = FakeClock()
+    cache = SearchCache(str(tmp_path / "cache.sqlite"), ttl_by_class={"time_sensitive": 60, "default": 600}, clock=clock)
+    assert classify_query("What is the latest score of the match?") == "time_sensitive"
+    cache.put("What is the latest score of the match?", result("a"))
+    cache.put("Where was Mary born?", result("b"))
+
+    clock.now += 120
+    assert cache.get("What is the latest score of the match?") is None
+    assert cache.get("Where was Mary born?") is not None
+    assert cache.stats["expired"] == 1
+
+
+def test_empty_results_are_cached_shorter(tmp_path):
+    clock = FakeClock()
+    cache = SearchCache(str(tmp_path / "cache.sqlite"), negative_ttl=30, clock=clock)
+    cache.put("nothing to find", {"searchParameters": {"q": "nothing to find"}, "organic": []})
+
+    assert cache.get("nothing to find") is not None
+    assert cache.stats["negative_hits"] == 1
+    clock.now += 31
+    assert cache.get("nothing to find") is None
+
+
+def test_persists_and_evicts_oldest(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "cache.sqlite")
+    cache = SearchCache(path, max_entries=2, clock=clock)
+    for query in ["one", "two", "three"]:
+        clock.now += 1
+        cache.put(query, result(query))
+    cache.purge()
+    cache.close()
+
+    reopened = SearchCache(path, clock=clock)
+    assert len(reopened) == 2
+    assert reopened.get("one") is None and reopened.get("three") is not None
+
+
+def test_retriever_only_searches_misses(tmp_path):
+    retriever = SerperEvidenceRetriever(
+        llm_client=None, api_config={"SERPER_API_KEY": "fake", "SEARCH_CACHE_PATH": str(tmp_path / "cache.sqlite")}
+    )
+    searched = []
+
+    def request(questions):
+        searched.append(list(questions))
+        return FakeResponse([result(q) for q in questions])
+
+    retriever._request_serper_api = request
+    retriever.retrieve_evidence({"Mary is five.": ["Mary is five."]}, snippet_extend_flag=False)
+    evidences = retriever.retrieve_evidence({"Mary is five.": ["Mary is five.", "How old is Mary?"]}, snippet_extend_flag=False)
+
+    assert searched == [["Mary is five."], ["How old is Mary?"]]
+    assert [e["text"] for e in evidences["Mary is five."]] == ["about Mary is five.", "about How old is Mary?"]
+
+
+def test_cache_hit_with_other_spelling_is_not_a_changed_query(tmp_path, monkeypatch):
+    retriever = SerperEvidenceRetriever(
+        llm_client=None, api_config={"SERPER_API_KEY": "fake", "SEARCH_CACHE_PATH": str(tmp_path / "cache.sqlite")}
+    )
+    retriever._request_serper_api = lambda questions: FakeResponse([result(q) for q in questions])
+    errors = []
+    monkeypatch.setattr(serper_retriever.logger, "error", errors.append)
+
+    retriever.retrieve_evidence({"Mary is five.": ["Mary is five."]}, snippet_extend_flag=False)
+    evidences = retriever.retrieve_evidence({"Mary is five.": ["mary is five"]}, snippet_extend_flag=False)
+
+    assert [e["text"] for e in evidences["Mary is five."]] == ["about Mary is five."]
+    assert errors == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,119 @@
+"""Tests for sentence segmentation and the batched passage chunking of BaseRetriever."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from factcheck.core.Retriever.base import BaseRetriever, chunk_sentences
+from factcheck.utils.sentence_segmenter import MAX_CHARS, load_segmenter, segment_texts
+
+
+class FakeNlp:
+    """Splits on ". ", records every pipe call."""
+
+    def __init__(self, fail_on=None):
+        self.pipe_calls = []
+        self.fail_on = fail_on
+
+    def __call__(self, text):
+        if self.fail_on is not None and self.fail_on in text:
+            raise UnicodeEncodeError("utf-8", text, 0, 1, "surrogates not allowed")
+        return SimpleNamespace(sents=[SimpleNamespace(text=s) for s in text.split(". ") if s])
+
+    def pipe(self, texts, batch_size=16, n_process=1):
+        texts = list(texts)
+        self.pipe_calls.append((texts, n_process))
+        return [self(text) for text in texts]
+
+
+def make_retriever(nlp):
+    retriever = BaseRetriever.__new__(BaseRetriever)
+    retriever.tokenizer = nlp
+    retriever.segment_processes = 1
+    retriever.sentences_per_passage = 2
+    retriever.sliding_distance = 1
+    return retriever
+
+
+def test_chunk_sentences_windows():
+    sentences = ["First one", "x", "Second\none", "Third one"]
+
+    passages = chunk_sentences(sentences, sentences_per_passage=2, sliding_distance=1)
+
+    # "x" is too short to be a sentence, newlines become spaces
+    assert passages == [
+        ("First one Second one", 0, 1),
+        ("Second one Third one", 1, 2),
+        ("Third one", 2, 3),
+    ]
+
+
+def test_batched_chunking_matches_per_text_chunking():
+    nlp = FakeNlp()
+    retriever = make_retriever(nlp)
+    scraped = [
+        {"q1": [["Alpha one. Beta two. ", "u1"], ["Gamma three.", "u2"]], "q2": []},
+        {"q3": [["Delta four. Epsilon five.", "u3"]]},
+    ]
+
+    chunked = retriever._chunk_all_scraped_results(scraped)
+
+    # one pipe over the texts of every query of every claim
+    assert len(nlp.pipe_calls) == 1
+    assert len(nlp.pipe_calls[0][0]) == 2
+    assert chunked[0]["q2"] == ([], None)
+    assert chunked[0]["q1"] == (retriever._chunk_text("Alpha one. Beta two. Gamma three.", nlp), "u2")
+    assert chunked[1]["q3"] == (retriever._chunk_text("Delta four. Epsilon five.", nlp), "u3")
+
+
+def test_failing_text_is_skipped_alone():
+    nlp = FakeNlp(fail_on="bad")
+    retriever = make_retriever(nlp)
+
+    chunked = retriever._chunk_all_scraped_results([{"q1": [["bad text", "u1"]], "q2": [["Good one. Fine two.", "u2"]]}])
+
+    assert chunked[0]["q1"] == ([], "u1")
+    assert [p[0] for p in chunked[0]["q2"][0]] == ["Good one Fine two.", "Fine two."]
+
+
+def test_segment_texts_cuts_long_texts():
+    nlp = FakeNlp()
+
+    sentences = segment_texts(nlp, ["a" * (MAX_CHARS + 10), "One. Two"], n_process=4)
+
+    assert len(sentences[0][0]) == MAX_CHARS
+    assert sentences[1] == ["One", "Two"]
+    # never more processes than texts
+    assert nlp.pipe_calls[0][1] == 2
+    assert segment_texts(nlp, []) == []
+
+
+def test_rule_segmenter_splits_on_punctuation():
+    pytest.importorskip("spacy")
+    nlp = load_segmenter("rule")
+
+    sentences = segment_texts(nlp, ["The tower is tall. It was built in 1889!", "One sentence"])
+
+    assert sentences == [["The tower is tall.", "It was built in 1889!"], ["One sentence"]]
+
+
+def test_segment_processes_are_configurable(monkeypatch):
+    from factcheck.core.Retriever import base
+
+    monkeypatch.setattr(base, "load_segmenter", lambda kind: FakeNlp())
+    monkeypatch.setattr(base, "PassageRanker", lambda **kwargs: None)
+    retriever = BaseRetriever(llm_client=None, api_config={"SEGMENT_PROCESSES": "2"})
+    assert retriever.sentence_segmenter == "parser"
+    assert retriever.segment_processes == 2
+
+    retriever._chunk_all_scraped_results([{"q1": [["One. Two", "u1"]], "q2": [["Three. Four", "u2"]]}])
+    assert retriever.tokenizer.pipe_calls[0][1] == 2
+
+
+def test_unknown_segmenter():
+    with pytest.raises(NotImplementedError):
+        load_segmenter("neural")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test concurrent Serper batch requests: batches run in parallel, transient failures are
+retried per batch and a failed batch does not discard the evidences of the others.
+"""
+
+import threading
+import time
+
+import pytest
+
+from conftest import FakeResponse
+from factcheck.core.Retriever import serper_retriever
+from factcheck.core.Retriever.serper_retriever import SerperEvidenceRetriever, SerperRetryableError
+
+
+def result(query):
+    return {"searchParameters": {"q": query}, "organic": [{"snippet": f"about {query}", "link": "https://x"}]}
+
+
+def make_retriever(request, **kwargs):
+    retriever = SerperEvidenceRetriever(llm_client=None, api_config={"SERPER_API_KEY": "fake"}, **kwargs)
+    retriever._request_serper_api = request
+    return retriever
+
+
+CLAIMS = {f"claim {i}": [f"claim {i}"] for i in range(6)}
+
+
+def test_batches_run_concurrently():
+    lock = threading.Lock()
+    active = {"now": 0, "max": 0}
+
+    def request(questions):
+        with lock:
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+        time.sleep(0.1)
+        with lock:
+            active["now"] -= 1
+        return FakeResponse([result(q) for q in questions])
+
+    retriever = make_retriever(request, batch_size=2, max_concurrent_batches=3)
+    start = time.time()
+    evidences = retriever.retrieve_evidence(CLAIMS, snippet_extend_flag=False)
+
+    assert time.time() - start < 0.25
+    assert active["max"] == 3
+    assert all(len(evidences[claim]) == 1 for claim in CLAIMS)
+
+
+def test_failed_batch_keeps_other_batches(monkeypatch):
+    monkeypatch.setattr(serper_retriever.time, "sleep", lambda seconds: None)
+
+    def request(questions):
+        if "claim 2" in questions:
+            raise SerperRetryableError("503")
+        return FakeResponse([result(q) for q in questions])
+
+    retriever = make_retriever(request, batch_size=2, num_batch_retries=1)
+    evidences = retriever.retrieve_evidence(CLAIMS, snippet_extend_flag=False)
+
+    assert evidences["claim 2"] == [] and evidences["claim 3"] == []
+    assert [e["text"] for e in evidences["claim 5"]] == ["about claim 5"]
+
+
+def test_transient_errors_are_retried(monkeypatch):
+    monkeypatch.setattr(serper_retriever.time, "sleep", lambda seconds: None)
+    calls = []
+
+    def request(questions):
+        calls.append(list(questions))
+        if len(calls) == 1:
+            raise SerperRetryableError("429")
+        return FakeResponse([result(q) for q in questions])
+
+    retriever = make_retriever(request, num_batch_retries=2)
+    evidences = retriever.retrieve_evidence(CLAIMS, snippet_extend_flag=False)
+
+    assert len(calls) == 2
+    assert all(len(evidences[claim]) == 1 for claim in CLAIMS)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test streamed crawling: non-HTML responses are dropped after the headers, bodies are cut
+at the byte cap and the charset comes from the header or a <meta> tag.
+"""
+
+import pytest
+
+from conftest import QuietHandler
+from factcheck.utils.web_util import CrawledPage, CrawlerPool
+
+PAGES = {
+    "/pdf": ("application/pdf", b"%PDF-1.4" + b"0" * 500000),
+    "/big": ("text/html", b"<html><body>" + b"x" * 500000 + b"</body></html>"),
+    "/latin": ("text/html", '<html><head><meta charset="iso-8859-1"></head><body>café</body></html>'.encode("latin-1")),
+    "/header": ("text/html; charset=cp1252", "<p>“quoted”</p>".encode("cp1252")),
+    "/untyped": ("", b"\x89PNG\r\n\x1a\n" + b"\x00" * 1000),
+}
+
+
+class PageHandler(QuietHandler):
+    bytes_sent = {}
+
+    def do_GET(self):
+        content_type, body = PAGES[self.path]
+        self.send_response(200)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        sent = 0
+        try:
+            for i in range(0, len(body), 16384):
+                self.wfile.write(body[i : i + 16384])
+                sent += 16384
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        PageHandler.bytes_sent[self.path] = sent
+
+
+@pytest.fixture
+def server(serve):
+    return serve(PageHandler)
+
+
+def fetch(pool, url):
+    return pool.run(pool.fetch(url, {}))
+
+
+def test_non_html_is_dropped(server):
+    pool = CrawlerPool()
+    assert fetch(pool, f"{server}/pdf") == (False, None)
+    assert fetch(pool, f"{server}/untyped") == (False, None)
+    assert fetch(pool, "http://127.0.0.1:1/report.pdf") == (False, None)
+    assert pool.snapshot()["skipped_content_type"] == 3
+    assert pool.snapshot()["bytes_read"] < 10000
+
+
+def test_body_is_capped(server):
+    pool = CrawlerPool(max_bytes=64 * 1024)
+    flag, page = fetch(pool, f"{server}/big")
+    assert flag and isinstance(page, CrawledPage)
+    assert page.truncated and len(page.content) == 64 * 1024
+    assert page.text.startswith("<html><body>xxx")
+    assert pool.snapshot()["truncated"] == 1
+
+
+def test_charset_from_meta_and_header(server):
+    pool = CrawlerPool()
+    _, page = fetch(pool, f"{server}/latin")
+    assert page.encoding == "iso8859-1" and "café" in page.text
+    _, page = fetch(pool, f"{server}/header")
+    assert page.encoding == "cp1252" and page.text == "<p>“quoted”</p>"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
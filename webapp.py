@@ -7,6 +7,7 @@ import os
 import tempfile
 
 from factcheck.utils.utils import load_yaml
+from factcheck.utils.circuit_breaker import CircuitBreaker, breaker_states
 from factcheck import FactCheck
 
 app = Flask(__name__, static_folder="assets")
@@ -137,6 +138,19 @@ def index():
     return render_template("main_layout.html")
 
 
+@app.route("/health")
+def health():
+    upstreams = breaker_states()
+    degraded = any(u["state"] != CircuitBreaker.CLOSED for u in upstreams.values())
+    return jsonify(
+        {
+            "status": "degraded" if degraded else "healthy",
+            "factcheck_ready": app.config.get("FACTCHECK_INSTANCE") is not None,
+            "upstreams": upstreams,
+        }
+    )
+
+
 @app.route("/shownClaim/<content_id>")
 def get_content(content_id):
     # load the response json file